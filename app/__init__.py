@@ -0,0 +1,5 @@
+# .env 는 패키지를 처음 임포트할 때 한 번만 읽음
+# (각 모듈은 임포트 시점에 os.getenv 로 설정을 읽으므로 어느 모듈보다 먼저 실행되어야 함)
+from dotenv import load_dotenv
+
+load_dotenv()
@@ -1,18 +1,19 @@
 from fastapi import APIRouter, HTTPException, Cookie, Response, Depends, Request
 from fastapi.responses import RedirectResponse, JSONResponse
-from dotenv import load_dotenv
-import httpx
 import os
 import jwt
 from datetime import datetime, timedelta
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models import User, Token  # User와 Token 모델 import
 from app.database import get_db  # DB 세션을 가져오는 함수를 import합니다.
+from app.kakao import KAKAO_AUTH_HOST, KakaoGateway, get_kakao  # 카카오 API 게이트웨이
+from app.nicknames import NICKNAME_MAX_LENGTH, nicknames
+from app.token_cache import TokenCache
 
 router = APIRouter(prefix="/auth")
 
-load_dotenv()
-
 KAKAO_CLIENT_ID = os.getenv("KAKAO_CLIENT_ID")
 KAKAO_REDIRECT_URI = os.getenv("KAKAO_REDIRECT_URI")
 JWT_SECRET = os.getenv("JWT_SECRET")  # JWT 비밀키
@@ -20,11 +21,44 @@ JWT_ALGORITHM = "HS256"
 JWT_EXPIRATION_MINUTES = 30  # JWT 토큰 유효 시간 1분으로 설정 (테스트용)
 JWT_REFRESH_EXPIRATION_MINUTES = 60  # JWT 리프레시 토큰 유효 시간 60분
 
+# 검증이 끝난 액세스 토큰 캐시
+token_cache = TokenCache(maxsize=int(os.getenv("TOKEN_CACHE_SIZE", 10000)))
+
+
+async def current_user(access_token: str = Cookie(None), db: AsyncSession = Depends(get_db)) -> int:
+    # 보호된 라우트에서 사용하는 인증 의존성 : 요청당 한 번만 쿠키를 검증하고 user_id 를 반환
+    if not access_token:
+        raise HTTPException(status_code=401, detail="JWT 토큰이 없습니다.")
+
+    user_id = token_cache.get(access_token)
+    if user_id is not None:
+        db.info["user_id"] = user_id  # 최근에 쓰기를 한 사용자는 기본 DB 에서 읽도록 함
+        return user_id
+
+    try:
+        payload = jwt.decode(access_token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
+    except jwt.PyJWTError:
+        raise HTTPException(status_code=401, detail="Invalid JWT token")
+
+    user_id = payload.get("user_id")
+    db.info["user_id"] = user_id
+    query = select(User.user_id).where(User.user_id == user_id)
+    found = (await db.execute(query)).scalar() is not None
+    if not found and db.info.get("read_only"):
+        # 다른 워커/인스턴스에서 방금 가입한 사용자가 아직 복제본에 없을 수 있으므로 기본 DB 에서 다시 확인
+        db.info["read_only"] = False
+        found = (await db.execute(query)).scalar() is not None
+    if not found:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    token_cache.set(access_token, user_id, payload["exp"])
+    return user_id
+
 
 @router.get("/kakao/login")
 def kakao_login():
     kakao_auth_url = (
-        f"https://kauth.kakao.com/oauth/authorize?"
+        f"{KAKAO_AUTH_HOST}/oauth/authorize?"
         f"client_id={KAKAO_CLIENT_ID}&"
         f"redirect_uri={KAKAO_REDIRECT_URI}&"
         f"response_type=code"
@@ -33,113 +67,113 @@ def kakao_login():
 
 
 @router.get("/kakao/callback")
-async def kakao_callback(code: str, db: Session = Depends(get_db)):
-    kakao_token_url = "https://kauth.kakao.com/oauth/token"
-    headers = {"Content-Type": "application/x-www-form-urlencoded"}
-    data = {
-        "grant_type": "authorization_code",
-        "client_id": KAKAO_CLIENT_ID,
-        "redirect_uri": KAKAO_REDIRECT_URI,
-        "code": code,
-    }
+async def kakao_callback(code: str, db: AsyncSession = Depends(get_db), kakao: KakaoGateway = Depends(get_kakao)):
+    token_response = await kakao.get_token(code, KAKAO_CLIENT_ID, KAKAO_REDIRECT_URI)
+    if token_response.status_code != 200:
+        raise HTTPException(status_code=token_response.status_code, detail="Failed to get Kakao token")
 
-    async with httpx.AsyncClient() as client:
-        token_response = await client.post(kakao_token_url, headers=headers, data=data)
-        if token_response.status_code != 200:
-            raise HTTPException(status_code=token_response.status_code, detail="Failed to get Kakao token")
-
-        token_json = token_response.json()
-        kakao_access_token = token_json.get("access_token")
-
-        # 사용자 정보 요청
-        user_info_url = "https://kapi.kakao.com/v2/user/me"
-        user_headers = {"Authorization": f"Bearer {kakao_access_token}"}
-        user_response = await client.get(user_info_url, headers=user_headers)
-
-        if user_response.status_code != 200:
-            raise HTTPException(status_code=user_response.status_code, detail="Failed to get user info")
-
-        user_info = user_response.json()
-        kakao_id = user_info.get("id")
-        nickname = user_info.get("properties", {}).get("nickname")
-
-        # DB에 사용자 정보 저장
-        user = db.query(User).filter(User.kakao_id == kakao_id).first()
-        if user:
-            # 기존 토큰을 삭제하지 않고 새로 추가
-            new_token = Token(user_id=user.user_id, token=kakao_access_token, created_at=datetime.now(), expires_at=None)
-            db.add(new_token)
-        else:
-            user = User(kakao_id=kakao_id, nickname=nickname, created_at=datetime.now())
-            db.add(user)
-            db.commit()
-            db.refresh(user)
+    token_json = token_response.json()
+    kakao_access_token = token_json.get("access_token")
 
-            new_token = Token(user_id=user.user_id, token=kakao_access_token, created_at=datetime.now(), expires_at=None)
-            db.add(new_token)
+    # 사용자 정보 요청
+    user_response = await kakao.get_user_info(kakao_access_token)
 
-        db.commit()  # 모든 변경 사항 저장
+    if user_response.status_code != 200:
+        raise HTTPException(status_code=user_response.status_code, detail="Failed to get user info")
 
-        # JWT 액세스 토큰 생성
-        jwt_access_payload = {
-            "user_id": user.user_id,
-            "exp": datetime.utcnow() + timedelta(seconds=JWT_EXPIRATION_MINUTES),
-        }
-        access_token = jwt.encode(jwt_access_payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    user_info = user_response.json()
+    kakao_id = user_info.get("id")
+    nickname = user_info.get("properties", {}).get("nickname")
 
-        # JWT 리프레시 토큰 생성
-        jwt_refresh_payload = {
-            "user_id": user.user_id,
-            "exp": datetime.utcnow() + timedelta(minutes=JWT_REFRESH_EXPIRATION_MINUTES),
-        }
-        refresh_token = jwt.encode(jwt_refresh_payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
+    # GET 이지만 사용자/토큰을 쓰는 라우트이므로 복제본이 아닌 기본 DB 에서 조회
+    db.info["read_only"] = False
 
-        response = JSONResponse(content={"message": "Login successful"})
-        response.set_cookie(key="access_token", value=access_token, httponly=True, max_age=60)  # JWT 액세스 토큰 쿠키에 저장
-        response.set_cookie(key="refresh_token", value=refresh_token, httponly=True, secure=True, max_age=3600 * 24 * 30)  # JWT 리프레시 토큰을 쿠키에 저장
-        return response
+    # DB에 사용자 정보 저장
+    result = await db.execute(select(User).where(User.kakao_id == kakao_id))
+    user = result.scalars().first()
+    if not user:
+        # 카카오 닉네임이 이미 사용 중이면 닉네임 없이 가입 (이후 /users/nickname 으로 설정)
+        if not nickname or len(nickname) > NICKNAME_MAX_LENGTH or not (await nicknames.available(db, [nickname]))[nickname]:
+            nickname = None
+        user = User(kakao_id=kakao_id, nickname=nickname, created_at=datetime.now(), updated_at=datetime.now())
+        db.add(user)
+        try:
+            await db.flush()  # user_id 를 발급받기 위해 flush
+        except IntegrityError:
+            # 확인과 가입 사이에 다른 사용자가 같은 닉네임을 가져간 경우
+            await db.rollback()
+            user = User(kakao_id=kakao_id, nickname=None, created_at=datetime.now(), updated_at=datetime.now())
+            db.add(user)
+            await db.flush()
+        nicknames.add(user.nickname)
+    db.info["user_id"] = user.user_id  # 로그인 직후 요청도 기본 DB 에서 읽도록 함
 
+    # 사용자의 유효한 토큰이 있으면 새 토큰으로 교체하고, 없을 때만 새로 추가
+    result = await db.execute(
+        select(Token).where(Token.user_id == user.user_id, Token.expires_at.is_(None)).order_by(Token.created_at.desc()).limit(1)
+    )
+    token_entry = result.scalars().first()
+    if token_entry:
+        token_entry.token = kakao_access_token
+        token_entry.created_at = datetime.now()
+    else:
+        db.add(Token(user_id=user.user_id, token=kakao_access_token, created_at=datetime.now(), expires_at=None))
+
+    await db.commit()  # 모든 변경 사항 저장
+
+    # JWT 액세스 토큰 생성
+    jwt_access_payload = {
+        "user_id": user.user_id,
+        "exp": datetime.utcnow() + timedelta(seconds=JWT_EXPIRATION_MINUTES),
+    }
+    access_token = jwt.encode(jwt_access_payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
-@router.get("/kakao/logout")
-async def kakao_logout(response: Response, access_token: str = Cookie(None), db: Session = Depends(get_db)):
-    if not access_token:
-        raise HTTPException(status_code=401, detail="JWT 토큰이 없습니다.")
+    # JWT 리프레시 토큰 생성
+    jwt_refresh_payload = {
+        "user_id": user.user_id,
+        "exp": datetime.utcnow() + timedelta(minutes=JWT_REFRESH_EXPIRATION_MINUTES),
+    }
+    refresh_token = jwt.encode(jwt_refresh_payload, JWT_SECRET, algorithm=JWT_ALGORITHM)
 
-    # JWT 토큰 검증
-    try:
-        payload = jwt.decode(access_token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
-        user_id = payload.get("user_id")
-        user = db.query(User).filter(User.user_id == user_id).first()
-    except (jwt.ExpiredSignatureError, jwt.JWTError):
-        raise HTTPException(status_code=401, detail="Invalid JWT token")
+    response = JSONResponse(content={"message": "Login successful"})
+    response.set_cookie(key="access_token", value=access_token, httponly=True, max_age=60)  # JWT 액세스 토큰 쿠키에 저장
+    response.set_cookie(key="refresh_token", value=refresh_token, httponly=True, secure=True, max_age=3600 * 24 * 30)  # JWT 리프레시 토큰을 쿠키에 저장
+    return response
 
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
 
+@router.get("/kakao/logout")
+async def kakao_logout(
+    response: Response,
+    access_token: str = Cookie(None),
+    user_id: int = Depends(current_user),
+    db: AsyncSession = Depends(get_db),
+    kakao: KakaoGateway = Depends(get_kakao),
+):
+    db.info["read_only"] = False  # 토큰을 만료 처리하므로 기본 DB 에서 조회
     # Token 테이블에서 Kakao 액세스 토큰 가져오기 (가장 최근의 유효한 토큰)
-    token_entry = db.query(Token).filter(Token.user_id == user.user_id, Token.expires_at.is_(None)).order_by(Token.created_at.desc()).first()
+    result = await db.execute(
+        select(Token).where(Token.user_id == user_id, Token.expires_at.is_(None)).order_by(Token.created_at.desc()).limit(1)
+    )
+    token_entry = result.scalars().first()
     if not token_entry:
         raise HTTPException(status_code=404, detail="Token not found")
 
     # 카카오 로그아웃 요청
-    kakao_logout_url = "https://kapi.kakao.com/v1/user/unlink"
-    headers = {"Authorization": f"Bearer {token_entry.token}"}
-
-    async with httpx.AsyncClient() as client:
-        logout_response = await client.post(kakao_logout_url, headers=headers)
+    logout_response = await kakao.unlink(token_entry.token)
 
-        if logout_response.status_code != 200:
-            raise HTTPException(status_code=logout_response.status_code, detail="Kakao 로그아웃에 실패했습니다.")
+    if logout_response.status_code != 200:
+        raise HTTPException(status_code=logout_response.status_code, detail="Kakao 로그아웃에 실패했습니다.")
 
-        # JWT 토큰 쿠키 삭제
-        response.delete_cookie(key="access_token")
-        response.delete_cookie(key="refresh_token")
+    # JWT 토큰 쿠키 삭제 (캐시에서도 제거)
+    token_cache.discard(access_token)
+    response.delete_cookie(key="access_token")
+    response.delete_cookie(key="refresh_token")
 
-        # Token 테이블에서 해당 사용자의 액세스 토큰 만료 시간 기록
-        token_entry.expires_at = datetime.now()  # 로그아웃 시간을 expires_at에 설정
-        db.commit()
+    # Token 테이블에서 해당 사용자의 액세스 토큰 만료 시간 기록
+    token_entry.expires_at = datetime.now()  # 로그아웃 시간을 expires_at에 설정
+    await db.commit()
 
-        return {"message": "Kakao에서 성공적으로 로그아웃되었습니다."}    
+    return {"message": "Kakao에서 성공적으로 로그아웃되었습니다."}    
 
 from jwt import PyJWTError  # PyJWTError를 import
 @router.post("/refresh")
@@ -174,6 +208,8 @@ async def refresh_token(request: Request):
 
 
 def is_valid_token(token: str) -> bool:
+    if token_cache.get(token) is not None:
+        return True  # 이미 검증된 토큰
     try:
         jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])
         return True  # 유효한 토큰
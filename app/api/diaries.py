@@ -1,10 +1,27 @@
-from fastapi import APIRouter, Request, Query
+from fastapi import APIRouter, Depends, Request, Query
 from pydantic import BaseModel
 from enum import Enum
 from typing import List, Optional
-from fastapi.responses import JSONResponse
-
-router = APIRouter(prefix="/diaries")
+from datetime import date as Date, datetime
+import zipfile
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.archive import restore_diary as restore_archived_diary
+from app.backup import ImportTooLarge, InvalidItem, export_ndjson, export_zip, import_diaries, ndjson_lines, parse_timestamp, stored_image_url, zip_lines
+from app.database import engine, get_db
+from app.models import Diary as DiaryModel, Image as ImageModel, TempDiary as TempDiaryModel, User
+from app.image_store import ImageTooLarge, InvalidImage, digest_from_url, image_store, image_url, thumbnail_url
+from app.likes import LIKE_BATCH_MAX, liked_ids, set_likes, toggle_like
+from app.pagination import PAGE_MAX_SIZE, PAGE_SIZE, InvalidCursor, page, paginate
+from app.response_cache import cached_response, conditional_response, not_modified, response_cache, row_validators
+from app.search import search_query
+from app.stats import MOOD, WEATHER, read_stats, stat_keys, update_stats
+from app.temp_buffer import temp_buffer
+from .auth import current_user
+
+# 모든 다이어리 라우트는 로그인한 사용자만 접근 가능
+router = APIRouter(prefix="/diaries", dependencies=[Depends(current_user)])
 
 
 class Mood(Enum):
@@ -35,6 +52,15 @@ class Diary(BaseModel):
     story: str
 
 
+class LikeChange(BaseModel):
+    id: int
+    bookmark: bool
+
+
+class LikeBatch(BaseModel):
+    items: List[LikeChange]
+
+
 class TempDiary(BaseModel):
     id: int | None = None
     date: str | None = None
@@ -45,192 +71,702 @@ class TempDiary(BaseModel):
     story: str | None = None
 
 
+# 응답 모델 (OpenAPI 문서용 응답 형태 선언)
+class DiaryDetail(BaseModel):
+    id: int
+    date: Date
+    nickname: str | None = None
+    mood: int | None = None
+    weather: int | None = None
+    title: str | None = None
+    image: str | None = None
+    story: str | None = None
+
+
+class DiaryListItem(BaseModel):
+    id: int
+    date: Date
+    title: str | None = None
+    image: str | None = None  # 썸네일 주소
+    bookmark: bool
+
+
+class CalendarItem(BaseModel):
+    id: int
+    date: Date
+    image: str | None = None  # 썸네일 주소
+    bookmark: bool
+
+
+class DiaryDetailResponse(BaseModel):
+    status: int = 200
+    message: str
+    data: DiaryDetail
+
+
+class DiaryEditResponse(DiaryDetailResponse):
+    temp_id: int | None = None
+
+
+class DiaryListResponse(BaseModel):
+    status: int = 200
+    message: str
+    data: list[DiaryListItem]
+    next_cursor: str | None = None
+
+
+class CalendarResponse(BaseModel):
+    status: int = 200
+    message: str
+    data: list[CalendarItem]
+    next_cursor: str | None = None
+
+
+class MessageResponse(BaseModel):
+    # 오류 응답 : HTTP 상태는 200 이고 결과는 status 필드로 알림 (예: {"status": 400, "message": "잘못된 커서입니다."})
+    status: int
+    message: str
+
+
+# 아래 조회 라우트는 캐시한 본문이나 304 를 Response 로 직접 돌려주므로 response_model 대신 responses 로 문서화만 함
+NOT_MODIFIED = {304: {"description": "ETag/Last-Modified 가 같으면 본문 없이 응답"}}
+
+
+def parse_date(value: str | int) -> Date | None:
+    # "2024-08-13", "20240813", 20240813 형식을 모두 date 로 변환
+    value = str(value).replace("-", "")
+    try:
+        return datetime.strptime(value, "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def parse_month(value: str) -> tuple[Date, Date] | None:
+    # "202408" / "2024-08" 을 해당 월의 [1일, 다음 달 1일) 범위로 변환
+    value = value.replace("-", "")
+    try:
+        first = datetime.strptime(value, "%Y%m").date()
+    except ValueError:
+        return None
+    if first.month == 12:
+        return first, first.replace(year=first.year + 1, month=1)
+    return first, first.replace(month=first.month + 1)
+
+
+def enum_value(enum_cls, value) -> int | None:
+    # Enum, 이름("HAPPY"), 숫자 문자열("6") 을 DB 에 저장할 정수로 변환 (그 밖의 값은 ValueError)
+    if value is None:
+        return None
+    if isinstance(value, enum_cls):
+        return value.value
+    if value in enum_cls.__members__:
+        return enum_cls[value].value
+    return enum_cls(int(value)).value
+
+
+async def get_user_diary(db: AsyncSession, user_id: int, id: int) -> DiaryModel | None:
+    result = await db.execute(
+        select(DiaryModel).where(
+            DiaryModel.diary_id == id,
+            DiaryModel.user_id == user_id,
+            DiaryModel.is_deleted == False,
+        )
+    )
+    return result.scalars().first()
+
+
+async def store_image(image: str | None) -> tuple[str | None, str | None]:
+    # 클라이언트가 보낸 이미지를 (원본 주소, 썸네일 주소)로 변환
+    # base64 data URL 은 이미지 저장소에 저장하고 짧은 주소만 DB/응답에 사용
+    if not image:
+        return None, None
+    if image.startswith("data:"):
+        digest = await image_store.save_data_url(image)
+    else:
+        digest = digest_from_url(image)
+    if digest:
+        return image_url(digest), thumbnail_url(digest)
+    return image, image  # 외부 이미지 주소
+
+
+async def set_image(db: AsyncSession, diary: DiaryModel, image: str | None):
+    # 대표 이미지를 Image 테이블에 기록하고 목록/캘린더용 썸네일 주소를 다이어리에 함께 저장
+    url, thumb = await store_image(image)
+    if diary.diary_id and diary.thumbnail_url == thumb:
+        return  # 이미지 변경 없음
+
+    diary.thumbnail_url = thumb
+    await db.flush()  # 새 다이어리의 diary_id 발급
+    await db.execute(
+        update(ImageModel).where(ImageModel.diary_id == diary.diary_id, ImageModel.is_active == True).values(is_active=False)
+    )
+    if url:
+        db.add(ImageModel(diary_id=diary.diary_id, image_url=url, created_at=datetime.now(), is_temp=False, is_active=True, is_deleted=False))
+
+
 # /diaries
 @router.post("/")
-async def new_diary(diary: Diary):
-    print(diary)
-    # diary.mood = diary.mood.name
-    # diary.weather = diary.weather.name
-    return {"status": 201, "message": "다이어리 저장 성공", "id": 1}
+async def new_diary(diary: Diary, user_id: int = Depends(current_user), db: AsyncSession = Depends(get_db)):
+    diary_date = parse_date(diary.date)
+    if not diary_date:
+        return {"status": 400, "message": "날짜 형식이 올바르지 않습니다."}
+    try:
+        weather, emotion = enum_value(Weather, diary.weather), enum_value(Mood, diary.mood)
+    except (KeyError, ValueError):
+        return {"status": 400, "message": "기분/날씨 값이 올바르지 않습니다."}
+
+    now = datetime.now()
+    new = DiaryModel(
+        user_id=user_id,
+        title=diary.title,
+        content=diary.story,
+        weather=weather,
+        emotion=emotion,
+        diary_date=diary_date,
+        created_at=now,
+        updated_at=now,
+        is_deleted=False,
+        like=False,
+    )
+    db.add(new)
+    try:
+        await set_image(db, new, diary.image)
+    except InvalidImage:
+        return {"status": 415, "message": "지원하지 않는 이미지 형식입니다."}
+    except ImageTooLarge:
+        return {"status": 413, "message": "이미지 용량이 너무 큽니다."}
+    await update_stats(db, added=stat_keys(user_id, new.diary_date, new.emotion, new.weather))
+    await db.commit()
+    response_cache.invalidate(user_id)
+    return {"status": 201, "message": "다이어리 저장 성공", "id": new.diary_id}
+
+
+# /diaries/like
+# 목록 화면에서 여러 일기의 좋아요를 한 번에 반영 {"items": [{"id": 1, "bookmark": true}, ...]}
+# 같은 일기가 여러 번 있으면 마지막 상태를 사용하고, 이미 같은 상태인 일기는 쓰지 않음
+# (PUT /{id} 보다 먼저 등록해야 함)
+@router.put("/like")
+async def like_diaries(batch: LikeBatch, user_id: int = Depends(current_user), db: AsyncSession = Depends(get_db)):
+    changes = {item.id: item.bookmark for item in batch.items}
+    if not changes:
+        return {"status": 400, "message": "바꿀 일기가 없습니다."}
+    if len(changes) > LIKE_BATCH_MAX:
+        return {"status": 400, "message": f"한 번에 {LIKE_BATCH_MAX}개까지 바꿀 수 있습니다."}
+
+    states, missing, changed = await set_likes(db, user_id, changes)
+    await db.commit()
+    liked_ids.apply(user_id, states)
+    if changed:
+        response_cache.invalidate(user_id)
+    return {
+        "status": 200,
+        "data": [{"id": diary_id, "bookmark": bookmark} for diary_id, bookmark in states.items()],
+        "missing": missing,
+    }
 
 
 # /diaries/{id}
 @router.put("/{id}")
-async def edit_diary(id: int, diary: Diary):
+async def edit_diary(id: int, diary: Diary, user_id: int = Depends(current_user), db: AsyncSession = Depends(get_db)):
+    diary_date = parse_date(diary.date)
+    if not diary_date:
+        return {"status": 400, "message": "날짜 형식이 올바르지 않습니다."}
+    try:
+        weather, emotion = enum_value(Weather, diary.weather), enum_value(Mood, diary.mood)
+    except (KeyError, ValueError):
+        return {"status": 400, "message": "기분/날씨 값이 올바르지 않습니다."}
+
+    entry = await get_user_diary(db, user_id, id)
+    if not entry:
+        return {"status": 404, "message": f"id가 {id}인 다이어리가 존재하지 않음"}
+
+    before = stat_keys(user_id, entry.diary_date, entry.emotion, entry.weather)
+    entry.title = diary.title
+    entry.content = diary.story
+    entry.weather = weather
+    entry.emotion = emotion
+    entry.diary_date = diary_date
+    entry.updated_at = datetime.now()
+    try:
+        await set_image(db, entry, diary.image)
+    except InvalidImage:
+        return {"status": 415, "message": "지원하지 않는 이미지 형식입니다."}
+    except ImageTooLarge:
+        return {"status": 413, "message": "이미지 용량이 너무 큽니다."}
+    await update_stats(db, removed=before, added=stat_keys(user_id, entry.diary_date, entry.emotion, entry.weather))
+    await db.commit()
+    response_cache.invalidate(user_id)
     return {"status": 200, "message": "다이어리 수정 성공", "id": id}
 
 
+def temp_values(diary: TempDiary) -> dict:
+    # 요청에 포함된 필드만 임시 저장본에 반영 (기분/날씨 값이 올바르지 않으면 ValueError)
+    fields = diary.model_dump(exclude_unset=True)
+    values = {"updated_at": datetime.now()}
+    if "title" in fields:
+        values["title"] = diary.title
+    if "story" in fields:
+        values["content"] = diary.story
+    if "mood" in fields:
+        values["emotion"] = str(enum_value(Mood, diary.mood)) if diary.mood is not None else None
+    if "weather" in fields:
+        values["weather"] = str(enum_value(Weather, diary.weather)) if diary.weather is not None else None
+    if "date" in fields:
+        values["diary_date"] = parse_date(diary.date) if diary.date else None
+    return values
+
+
+def temp_item(temp: dict) -> dict:
+    diary_date = temp.get("diary_date")
+    return {
+        "id": temp["temp_diary_id"],
+        "diary_id": temp.get("diary_id"),
+        "date": diary_date.isoformat() if diary_date else None,
+        "mood": int(temp["emotion"]) if temp.get("emotion") else None,
+        "weather": int(temp["weather"]) if temp.get("weather") else None,
+        "title": temp.get("title"),
+        "image": temp.get("image_url"),
+        "story": temp.get("content"),
+    }
+
+
 # /diaries/temp/{id}
+# id 가 0 이면 새 임시 저장본을 만들어 temp_id 를 돌려주고,
+# 이후 같은 temp_id 로 들어오는 저장은 write-behind 버퍼를 거쳐 모아서 기록
 @router.put("/temp/{id}")
-async def save_temp(id: int, diary: TempDiary):
+async def save_temp(id: int, diary: TempDiary, user_id: int = Depends(current_user), db: AsyncSession = Depends(get_db)):
+    try:
+        values = temp_values(diary)
+    except (KeyError, ValueError):
+        return {"status": 400, "message": "기분/날씨 값이 올바르지 않습니다."}
+    if diary.image is not None:
+        try:
+            values["image_url"], _ = await store_image(diary.image)
+        except InvalidImage:
+            return {"status": 415, "message": "지원하지 않는 이미지 형식입니다."}
+        except ImageTooLarge:
+            return {"status": 413, "message": "이미지 용량이 너무 큽니다."}
+
+    if id == 0:
+        if diary.id and not await get_user_diary(db, user_id, diary.id):
+            return {"status": 404, "message": f"id가 {diary.id}인 다이어리가 존재하지 않음"}
+        temp = TempDiaryModel(diary_id=diary.id, user_id=user_id, created_at=values["updated_at"], is_deleted=False, **values)
+        db.add(temp)
+        await db.commit()
+        return {"status": 200, "message": "다이어리 임시 저장 성공", "temp_id": temp.temp_diary_id}
+
+    if not await temp_buffer.is_owner(user_id, id):
+        return {"status": 404, "message": f"id가 {id}인 임시 저장 다이어리가 존재하지 않음"}
+
+    temp_buffer.put(user_id, id, values)
     return {"status": 200, "message": "다이어리 임시 저장 성공", "temp_id": id}
 
 
+# /diaries/temp/{id}
+@router.get("/temp/{id}")
+async def get_temp(id: int, user_id: int = Depends(current_user), db: AsyncSession = Depends(get_db)):
+    # 다른 워커가 버퍼에서 방금 기록한 내용을 놓치지 않도록 기본 DB 에서 조회
+    db.info["read_only"] = False
+    result = await db.execute(
+        select(TempDiaryModel).where(
+            TempDiaryModel.temp_diary_id == id,
+            TempDiaryModel.user_id == user_id,
+            TempDiaryModel.is_deleted == False,
+        )
+    )
+    temp = result.scalars().first()
+    if not temp:
+        return {"status": 404, "message": f"id가 {id}인 임시 저장 다이어리가 존재하지 않음"}
+
+    # 아직 flush 되지 않은 최신 내용을 우선 사용
+    data = {column.key: getattr(temp, column.key) for column in TempDiaryModel.__table__.columns}
+    data.update(temp_buffer.get(user_id, id) or {})
+    return {"status": 200, "message": f"{id}번 임시 저장 다이어리 조회 완료", "data": temp_item(data)}
+
+
 # /diaries?date
 @router.get("/")
-async def search_diary_exist(date: int):
-    if date == 20240909:
+async def search_diary_exist(date: int, user_id: int = Depends(current_user), db: AsyncSession = Depends(get_db)):
+    diary_date = parse_date(date)
+    if not diary_date:
+        return {"status": 400, "message": "날짜 형식이 올바르지 않습니다."}
+
+    result = await db.execute(
+        select(DiaryModel.diary_id).where(
+            DiaryModel.user_id == user_id,
+            DiaryModel.is_deleted == False,
+            DiaryModel.diary_date == diary_date,
+        ).limit(1)
+    )
+    diary_id = result.scalar()
+    if diary_id:
         return {
             "status": 200,
             "message": "작성한 다이어리가 존재합니다.",
-            "data": {"date": "2024-01-01", "is_exist": True, "id": 30},
+            "data": {"date": diary_date.isoformat(), "is_exist": True, "id": diary_id},
         }
     return {
         "status": 200,
         "message": "작성한 다이어리가 존재하지 않습니다.",
-        "data": {"date": "2024-01-01", "is_exist": False, "id": 55},
+        "data": {"date": diary_date.isoformat(), "is_exist": False, "id": None},
     }
 
 
-# /diaries/{id}?edit={bool}
-# edit 생략 가능
-@router.get("/{id}")
-async def get_diary(id: int, edit: bool = None):
-    # id가 999인 경우 존재하지 않는 다이어리
-    if id == 999:
+# 목록/캘린더 조회에 필요한 컬럼만 조회 (content 는 읽지 않음)
+LIST_COLUMNS = (
+    DiaryModel.diary_id,
+    DiaryModel.diary_date,
+    DiaryModel.title,
+    DiaryModel.thumbnail_url,
+    DiaryModel.like,
+    DiaryModel.created_at,
+)
+
+# 목록 커서 정렬 키 : 최신 작성 순 (user_id, is_deleted, created_at) 인덱스 사용
+CREATED_KEYS = [DiaryModel.created_at, DiaryModel.diary_id]
+CREATED_KEY_NAMES = ["created_at", "diary_id"]
+# 월별 조회 커서 정렬 키 : 날짜 순 (user_id, is_deleted, diary_date) 인덱스 사용 (InnoDB 는 PK 를 인덱스 끝에 포함)
+DATE_KEYS = [DiaryModel.diary_date, DiaryModel.diary_id]
+DATE_KEY_NAMES = ["diary_date", "diary_id"]
+
+
+# 목록 응답은 항목이 많으므로 모델 인스턴스 대신 dict 로 만들어 orjson 으로 바로 직렬화
+# (응답 형태는 responses 로 문서화한 DiaryListItem / CalendarItem 과 같음)
+def list_item(row) -> dict:
+    return {"id": row.diary_id, "date": row.diary_date, "title": row.title, "image": row.thumbnail_url, "bookmark": bool(row.like)}
+
+
+def calendar_item(row) -> dict:
+    return {"id": row.diary_id, "date": row.diary_date, "image": row.thumbnail_url, "bookmark": bool(row.like)}
+
+
+async def fetch_page(db: AsyncSession, query, keys, key_names, scope: str, cursor: str | None, size: int, descending: bool = True):
+    # 목록 라우트 공통 커서 페이지 조회
+    rows = (await db.execute(paginate(query, keys, scope, cursor, size, descending))).all()
+    return page(rows, key_names, scope, size)
+
+
+# /diaries/search/{keyword}?cursor=&size=20
+@router.get("/search/{keyword}", responses={200: {"model": DiaryListResponse | MessageResponse}})
+async def search_diary(keyword: str = "",
+                       cursor: str | None = Query(None, description="다음 페이지 커서"),
+                       size: int = Query(PAGE_SIZE, ge=1, le=PAGE_MAX_SIZE, description="페이지 크기"),
+                       user_id: int = Depends(current_user),
+                       db: AsyncSession = Depends(get_db)):
+    keyword = keyword.strip()
+    if keyword == "":
+        return ORJSONResponse({"status": 200, "message": "모든 다이어리 조회"})
+
+    query = search_query(user_id, keyword, engine.dialect.name, LIST_COLUMNS)
+    try:
+        rows, next_cursor = await fetch_page(db, query, CREATED_KEYS, CREATED_KEY_NAMES, f"search:{user_id}:{keyword}", cursor, size)
+    except InvalidCursor:
+        return ORJSONResponse({"status": 400, "message": "잘못된 커서입니다."})
+    if not rows and not cursor:
+        return ORJSONResponse({"status": 404, "message": "해당 키워드로 검색이 되지 않았습니다."})
+
+    return ORJSONResponse({
+        "status": 200,
+        "message": f"{keyword}에 관한 일기 조회 완료",
+        "data": [list_item(row) for row in rows],
+        "next_cursor": next_cursor,
+    })
+
+
+# /diaries/like?cursor=&size=20
+@router.get("/like", responses={200: {"model": DiaryListResponse | MessageResponse}, **NOT_MODIFIED})
+async def get_like_diaries(request: Request,
+                           cursor: str | None = Query(None, description="다음 페이지 커서"),
+                           size: int = Query(PAGE_SIZE, ge=1, le=PAGE_MAX_SIZE, description="페이지 크기"),
+                           user_id: int = Depends(current_user),
+                           db: AsyncSession = Depends(get_db)):
+    async def build() -> dict:
+        query = select(*LIST_COLUMNS).where(
+            DiaryModel.user_id == user_id, DiaryModel.is_deleted == False, DiaryModel.like == True
+        )
+        try:
+            rows, next_cursor = await fetch_page(db, query, CREATED_KEYS, CREATED_KEY_NAMES, f"like:{user_id}", cursor, size)
+        except InvalidCursor:
+            return {"status": 400, "message": "잘못된 커서입니다."}
+
         return {
-            "status": 404,
-            "message": f"id가 {id}인 다이어리가 존재하지 않음",
+            "status": 200,
+            "message": "좋아요 누른 일기 조회 완료",
+            "data": [list_item(row) for row in rows],
+            "next_cursor": next_cursor,
         }
 
-    # edit 이 True 경우 수정 중인 것으로 리턴
-    if edit:
+    return await cached_response(request, user_id, ("like", cursor, size), build)
+
+
+# /diaries/main?type=calender&date=202406&cursor=&size=20
+@router.get("/main", responses={200: {"model": CalendarResponse | DiaryListResponse | MessageResponse}, **NOT_MODIFIED})
+async def get_main_diaries(request: Request,
+                           type: str = Query(..., description="조회 유형 (list 또는 calender)"),
+                           date: str = Query(..., description="조회할 년월 (예: 202408)"),
+                           cursor: str | None = Query(None, description="다음 페이지 커서"),
+                           size: int = Query(PAGE_MAX_SIZE, ge=1, le=PAGE_MAX_SIZE, description="페이지 크기"),
+                           user_id: int = Depends(current_user),
+                           db: AsyncSession = Depends(get_db)):
+    if type not in ("list", "calender"):
+        return ORJSONResponse({"status": 400, "message": "조회 유형은 list 또는 calender 입니다."})
+
+    month = parse_month(date)
+    if not month:
+        return ORJSONResponse({"status": 400, "message": "날짜 형식이 올바르지 않습니다."})
+
+    async def build() -> dict:
+        # (user_id, is_deleted, diary_date) 인덱스의 한 구간만 읽음
+        first, next_first = month
+        query = select(*LIST_COLUMNS).where(
+            DiaryModel.user_id == user_id,
+            DiaryModel.is_deleted == False,
+            DiaryModel.diary_date >= first,
+            DiaryModel.diary_date < next_first,
+        )
+        try:
+            rows, next_cursor = await fetch_page(
+                db, query, DATE_KEYS, DATE_KEY_NAMES, f"main:{user_id}:{first.isoformat()}", cursor, size, descending=False
+            )
+        except InvalidCursor:
+            return {"status": 400, "message": "잘못된 커서입니다."}
+
+        if type == "calender":
+            data = [calendar_item(row) for row in rows]
+            message = "다이어리 캘린더형 조회 완료"
+        else:
+            data = [list_item(row) for row in rows]
+            message = "다이어리 목록형 조회 완료"
+
         return {
             "status": 200,
-            "message": f"{id}번 다이어리 수정 준비 완료",
-            "data": {
-                "id": 1,
-                "date": "2024-08-13",
-                "nickname": "팡팡이",
-                "mood": 1,
-                "weather": 3,
-                "title": "신나는 산책을 했따",
-                "image": "data:image/jpeg;base64,/9j/4AAQSkZJRgABAQAAAQABAAD...AYH/",
-                "story": "아침에 쿨쿨자고 ,,,,",
-            },
-            "temp_id": 55,
+            "message": message,
+            "data": data,
+            "next_cursor": next_cursor,
         }
-    return {
-        "status": 200,
-        "message": f"{id}번 다이어리 조회 완료",
-        "data": {
-            "id": 1,
-            "date": 20240813,
-            "nickname": "팡팡이",
-            "mood": 1,
-            "weather": 3,
-            "title": "신나는 산책을 했따",
-            "image": "data:image/jpeg;base64,/9j/4AAQSkZJRgABAQAAAQABAAD...AYH/",
-            "story": "아침에 쿨쿨자고 ,,,,",
-        },
-    }
 
+    return await cached_response(request, user_id, ("main", type, month[0], cursor, size), build)
 
-# /diaries/{id}
-@router.delete("/{id}")
-async def delete_diary(id: int):
-    return {"status": 200, "message": "다이어리 삭제 성공"}
 
+def distribution(enum_cls, counts: dict) -> dict:
+    # 모든 값을 0 으로 채운 {"HAPPY": 3, ...} 형태
+    return {member.name: counts.get(member.value, 0) for member in enum_cls}
 
-# /diaries/like/{id}
-@router.put("/like/{id}")
-async def like_diary(id: int):
-    # id가 999인 경우 좋아요 취소
-    if id == 999:
-        return {"status": 200, "id": 999, "bookmark": False}
-    return {"status": 200, "id": 1, "bookmark": True}
 
+# /diaries/stats?year=2024
+# 집계 테이블(diary_stat)에서 해당 연도의 월별/연간 기분·날씨 분포를 조회
+@router.get("/stats")
+async def get_diary_stats(year: int = Query(None, ge=1900, le=9999, description="조회할 연도 (기본: 올해)"),
+                          user_id: int = Depends(current_user),
+                          db: AsyncSession = Depends(get_db)):
+    year = year or Date.today().year
+    months: dict[Date, dict] = {}
+    totals = {MOOD: {}, WEATHER: {}}
+    for month, kind, value, count in await read_stats(db, user_id, year):
+        counts = months.setdefault(month, {MOOD: {}, WEATHER: {}})[kind]
+        counts[value] = counts.get(value, 0) + count
+        totals[kind][value] = totals[kind].get(value, 0) + count
 
-# /diaries/search/{keyword}
-@router.get("/search/{keyword}")
-async def search_diary(keyword: str = ""):
-    if keyword == "":
-        return {"status": 200, "message": "모든 다이어리 조회"}
+    return ORJSONResponse({
+        "status": 200,
+        "message": f"{year}년 통계 조회 완료",
+        "data": {
+            "year": year,
+            # 일기마다 기분은 하나씩 기록되므로 기분 개수의 합이 일기 수
+            "count": sum(totals[MOOD].values()),
+            "mood": distribution(Mood, totals[MOOD]),
+            "weather": distribution(Weather, totals[WEATHER]),
+            "months": [
+                {
+                    "month": month.month,
+                    "count": sum(counts[MOOD].values()),
+                    "mood": distribution(Mood, counts[MOOD]),
+                    "weather": distribution(Weather, counts[WEATHER]),
+                }
+                for month, counts in sorted(months.items())
+            ],
+        },
+    })
 
-    if keyword == "999":
-        return {"status": 404, "message": "해당 키워드로 검색이 되지 않았습니다."}
 
+# /diaries/export?format=ndjson|zip
+# 전체 일기를 NDJSON(한 줄에 일기 하나) 또는 zip(diaries.ndjson + images/<해시>)으로 내려받음
+# 서버 측 커서로 나누어 읽으며 바로 전송하므로 일기 수와 관계없이 메모리 사용량이 일정함
+@router.get("/export")
+async def export_diary(format: str = Query("ndjson", pattern="^(ndjson|zip)$"), user_id: int = Depends(current_user)):
+    stream, media_type = (export_zip, "application/zip") if format == "zip" else (export_ndjson, "application/x-ndjson")
+    filename = f"ddrawry-diaries-{Date.today():%Y%m%d}.{format}"
+    return StreamingResponse(stream(user_id), media_type=media_type, headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+
+async def import_values(item: dict) -> dict:
+    # 내보내기 형식의 일기 한 줄을 검증하여 DB 컬럼 값으로 변환 (새 일기 작성과 같은 규칙)
+    diary_date = parse_date(item.get("date") or "")
+    if not diary_date:
+        raise InvalidItem("날짜 형식이 올바르지 않습니다.")
+    try:
+        mood = enum_value(Mood, item.get("mood"))
+        weather = enum_value(Weather, item.get("weather"))
+    except (KeyError, TypeError, ValueError):
+        raise InvalidItem("기분/날씨 값이 올바르지 않습니다.")
+    if mood is None or weather is None:
+        raise InvalidItem("기분/날씨 값이 없습니다.")
+    title, story, image = item.get("title"), item.get("story"), item.get("image")
+    if not isinstance(title, str) or not isinstance(story, str) or not isinstance(image, str | None):
+        raise InvalidItem("제목/내용/이미지 형식이 올바르지 않습니다.")
+    if len(title) > 255:
+        raise InvalidItem("제목이 너무 깁니다.")
+    if image and not image.startswith("data:"):
+        image = stored_image_url(image)
+    try:
+        url, thumb = await store_image(image)
+    except InvalidImage:
+        raise InvalidItem("지원하지 않는 이미지 형식입니다.")
+    except ImageTooLarge:
+        raise InvalidItem("이미지 용량이 너무 큽니다.")
+
+    created_at = parse_timestamp(item.get("created_at")) or datetime.now().replace(microsecond=0)
     return {
-        "status": 200,
-        "message": f"{keyword}에 관한 일기 조회 완료",
-        "data": [
-            {
-                "id": 1,
-                "date": "2024-08-13",
-                "title": f"신나는 {keyword}을 했따",
-                "image": "data:image/jpeg;base64,/9j/4AAQSkZJRgABAQAAAQABAAD...AYH/",
-                "bookmark": 1,
-            },
-            {
-                "id": 3,
-                "date": "2024-08-20",
-                "title": f"{keyword} 가기 싫다",
-                "image": "띠로리_로고.jpg",
-                "bookmark": 0,
-            },
-        ],
+        "title": title,
+        "content": story,
+        "weather": weather,
+        "emotion": mood,
+        "diary_date": diary_date,
+        "thumbnail_url": thumb,
+        "created_at": created_at,
+        "updated_at": parse_timestamp(item.get("updated_at")) or created_at,
+        "like": bool(item.get("bookmark")),
+        "image": url,
     }
 
 
-# /diaries/like
-@router.get("/like")
-async def get_like_diaries():
-    return {
-        "status": 200,
-        "message": "좋아요 누른 일기 조회 완료",
-        "data": [
-            {
-                "id": 1,
-                "date": "2024-08-13",
-                "title": "신나는 산책을 했따",
-                "image": "data:image/jpeg;base64,/9j/4AAQSkZJRgABAQAAAQABAAD...AYH/",
-                "bookmark": 1,
-            },
-            {
-                "id": 2,
-                "date": "2024-08-19",
-                "title": "냠냠 맛있는거 먹기",
-                "image": "띠로리 로고.jpg",
-                "bookmark": 0,
-            },
-        ],
-    }
+# /diaries/import
+# 내보낸 NDJSON(application/x-ndjson) 또는 zip(application/zip) 파일을 요청 본문으로 받아 IMPORT_BATCH 개씩 저장
+# 같은 날짜/작성 시각의 일기가 이미 있으면 건너뛰고, 형식이 잘못된 줄은 errors 에 줄 번호와 함께 알려줌
+@router.post("/import")
+async def import_diary(request: Request, user_id: int = Depends(current_user), db: AsyncSession = Depends(get_db)):
+    if request.headers.get("content-type", "").startswith(("application/zip", "application/x-zip")):
+        lines = zip_lines(request.stream())
+    else:
+        lines = ndjson_lines(request.stream())
+    try:
+        result = await import_diaries(db, user_id, lines, import_values)
+    except ImportTooLarge:
+        return {"status": 413, "message": "가져올 파일이 너무 큽니다."}
+    except zipfile.BadZipFile:
+        return {"status": 400, "message": "zip 파일 형식이 올바르지 않습니다."}
+    finally:
+        # 배치마다 커밋하므로 중간에 실패해도 이미 저장된 일기가 보이도록 비움
+        liked_ids.discard(user_id)
+        response_cache.invalidate(user_id)
+    return {"status": 200, "message": "다이어리 가져오기 완료", **result}
 
 
-# /diaries/main?type=calender&date=202406
-@router.get("/main")
-async def get_main_diaries(type: str = Query(..., description="조회 유형 (list 또는 calender)"),
-                           date: str = Query(..., description="조회할 년월 (예: 202408)")):
-    calendar_data = [
-        {
-            "id": diary["id"],
-            "date": diary["date"],
-            "image": diary["image"],
-            "bookmark": diary["bookmark"]
-        }
-        for diary in diaries_list
-    ]
+# /diaries/{id}?edit={bool}
+# edit 생략 가능
+@router.get("/{id}", responses={200: {"model": DiaryEditResponse | DiaryDetailResponse | MessageResponse}, **NOT_MODIFIED})
+async def get_diary(id: int, request: Request, edit: bool = None, user_id: int = Depends(current_user), db: AsyncSession = Depends(get_db)):
+    # 다시 조회하는 요청이면 수정 시각만 먼저 확인하여 바뀌지 않았으면 본문 없이 304 로 응답
+    # (닉네임도 응답에 포함되므로 사용자의 수정 시각도 함께 비교)
+    if not edit and (request.headers.get("if-none-match") or request.headers.get("if-modified-since")):
+        result = await db.execute(
+            select(DiaryModel.updated_at, DiaryModel.created_at, User.updated_at)
+            .join(User, User.user_id == DiaryModel.user_id)
+            .where(DiaryModel.diary_id == id, DiaryModel.user_id == user_id, DiaryModel.is_deleted == False)
+        )
+        row = result.first()
+        validators = row and row_validators(row[0] or row[1], row[2])
+        if validators and not_modified(request, *validators):
+            return conditional_response(request, b"", *validators)
+
+    result = await db.execute(
+        select(DiaryModel, User.nickname, User.updated_at, ImageModel.image_url)
+        .join(User, User.user_id == DiaryModel.user_id)
+        .outerjoin(ImageModel, (ImageModel.diary_id == DiaryModel.diary_id) & (ImageModel.is_active == True))
+        .where(DiaryModel.diary_id == id, DiaryModel.user_id == user_id, DiaryModel.is_deleted == False)
+    )
+    row = result.first()
+    if not row:
+        return ORJSONResponse({
+            "status": 404,
+            "message": f"id가 {id}인 다이어리가 존재하지 않음",
+        })
+
+    diary, nickname, user_updated_at, image = row
+    data = {
+        "id": diary.diary_id,
+        "date": diary.diary_date,
+        "nickname": nickname,
+        "mood": diary.emotion,
+        "weather": diary.weather,
+        "title": diary.title,
+        "image": image,
+        "story": diary.content,
+    }
 
-    return JSONResponse(content={
+    # edit 이 True 경우 수정 중인 것으로 리턴
+    if edit:
+        result = await db.execute(
+            select(TempDiaryModel.temp_diary_id)
+            .where(TempDiaryModel.diary_id == id, TempDiaryModel.user_id == user_id, TempDiaryModel.is_deleted == False)
+            .order_by(TempDiaryModel.updated_at.desc())
+            .limit(1)
+        )
+        return ORJSONResponse({
+            "status": 200,
+            "message": f"{id}번 다이어리 수정 준비 완료",
+            "data": data,
+            "temp_id": result.scalar(),
+        })
+    response = ORJSONResponse({
         "status": 200,
-        "message": "다이어리 목록형 조회 완료",
-        "data": calendar_data
+        "message": f"{id}번 다이어리 조회 완료",
+        "data": data,
     })
+    validators = row_validators(diary.updated_at or diary.created_at, user_updated_at)
+    if validators:
+        return conditional_response(request, response.body, *validators)
+    return response
 
-# 더미
-diaries_list = [
-    {
-        "id": 1,
-        "date": "2024-08-13",
-        "title": "신나는 산책을 했따",
-        "image": "data:image/jpeg;base64,/9j/4AAQSkZJRgABAQAAAQABAAD...AYH/",
-        "bookmark": True
-    },
-    {
-        "id": 2,
-        "date": "2024-08-19",
-        "title": "냠냠 맛있는거 먹기",
-        "image": None,  # 이미지가 없는 경우
-        "bookmark": False
-    }
-]
\ No newline at end of file
+
+# /diaries/{id}
+@router.delete("/{id}")
+async def delete_diary(id: int, user_id: int = Depends(current_user), db: AsyncSession = Depends(get_db)):
+    entry = await get_user_diary(db, user_id, id)
+    if not entry:
+        return {"status": 404, "message": f"id가 {id}인 다이어리가 존재하지 않음"}
+
+    # 소프트 삭제
+    entry.is_deleted = True
+    entry.updated_at = datetime.now()
+    await update_stats(db, removed=stat_keys(user_id, entry.diary_date, entry.emotion, entry.weather))
+    await db.commit()
+    liked_ids.apply(user_id, {id: False})
+    response_cache.invalidate(user_id)
+    return {"status": 200, "message": "다이어리 삭제 성공"}
+
+
+# /diaries/restore/{id}
+# 삭제 후 보관 기간(ARCHIVE_RETENTION_DAYS) 안의 일기를 복구 (보관 테이블로 옮겨진 일기도 같은 id 로 되돌림)
+@router.put("/restore/{id}")
+async def restore_diary(id: int, user_id: int = Depends(current_user), db: AsyncSession = Depends(get_db)):
+    if not await restore_archived_diary(db, user_id, id):
+        return {"status": 404, "message": f"id가 {id}인 복구할 수 있는 다이어리가 존재하지 않음"}
+    await db.commit()
+    liked_ids.discard(user_id)
+    response_cache.invalidate(user_id)
+    return {"status": 200, "message": "다이어리 복구 성공", "id": id}
+
+
+# /diaries/like/{id}
+@router.put("/like/{id}")
+async def like_diary(id: int, user_id: int = Depends(current_user), db: AsyncSession = Depends(get_db)):
+    # 좋아요한 id 집합으로 현재 상태를 알고 있으므로 행을 읽지 않고 UPDATE 한 번으로 토글
+    bookmark = await toggle_like(db, user_id, id)
+    if bookmark is None:
+        return {"status": 404, "message": f"id가 {id}인 다이어리가 존재하지 않음"}
+
+    await db.commit()
+    liked_ids.apply(user_id, {id: bookmark})
+    response_cache.invalidate(user_id)
+    return {"status": 200, "id": id, "bookmark": bookmark}
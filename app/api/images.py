@@ -1,8 +1,196 @@
-from fastapi import APIRouter
+import hmac
+import os
+import time
+
+import anyio
+import orjson
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db
+from app.image_jobs import DONE, FAILED, IMAGE_JOB_POLL_INTERVAL, QueueFull, image_jobs, prompt_cache
+from app.image_store import ImageTooLarge, InvalidImage, detect_type, image_store, image_url, is_digest, thumbnail_url
+from app.notifications import NOTIFY_HEARTBEAT
+from .auth import current_user
+from .diaries import get_user_diary
 
 router = APIRouter(prefix="/images")
 
+CHUNK_SIZE = 64 * 1024
+# 해시 이름의 파일은 내용이 바뀌지 않으므로 브라우저/CDN 에 오래 캐시
+CACHE_CONTROL = "public, max-age=31536000, immutable"
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")  # 운영용 라우트(X-Admin-Token) 토큰 (비어 있으면 운영용 라우트를 사용하지 않음)
+
+
+def parse_range(range_header: str, size: int) -> tuple[int, int] | None:
+    # "bytes=0-499", "bytes=500-", "bytes=-500" 형식의 단일 구간만 지원
+    if not range_header.startswith("bytes=") or "," in range_header:
+        return None
+    start, _, end = range_header[len("bytes="):].strip().partition("-")
+    try:
+        if start == "":
+            length = int(end)
+            if length <= 0:
+                return None
+            return max(size - length, 0), size - 1
+        start = int(start)
+        end = int(end) if end else size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        return None
+    return start, min(end, size - 1)
+
+
+async def iter_file(path: str, start: int, end: int):
+    async with await anyio.open_file(path, "rb") as f:
+        await f.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await f.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+async def file_response(request: Request, path: str, etag: str, content_type: str | None = None) -> Response:
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="이미지가 존재하지 않습니다.")
+
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL, "Accept-Ranges": "bytes"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in if_none_match):
+        return Response(status_code=304, headers=headers)
+
+    if content_type is None:
+        async with await anyio.open_file(path, "rb") as f:
+            content_type = detect_type(await f.read(12)) or "application/octet-stream"
+
+    size = os.path.getsize(path)
+    range_header = request.headers.get("range")
+    if range_header and request.headers.get("if-range", etag) == etag:
+        byte_range = parse_range(range_header, size)
+        if byte_range is None:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+        start, end = byte_range
+        return StreamingResponse(
+            iter_file(path, start, end),
+            status_code=206,
+            media_type=content_type,
+            headers={**headers, "Content-Range": f"bytes {start}-{end}/{size}", "Content-Length": str(end - start + 1)},
+        )
+
+    return FileResponse(path, media_type=content_type, headers=headers)
+
+
+# /images
+# 요청 본문(이미지 바이너리)을 그대로 스트리밍하여 저장
+@router.post("/", dependencies=[Depends(current_user)])
+async def upload_image(request: Request):
+    try:
+        digest = await image_store.save_stream(request.stream())
+    except ImageTooLarge:
+        raise HTTPException(status_code=413, detail="이미지 용량이 너무 큽니다.")
+    except InvalidImage:
+        raise HTTPException(status_code=415, detail="지원하지 않는 이미지 형식입니다.")
+
+    return {
+        "status": 201,
+        "message": "이미지 업로드 성공",
+        "data": {"id": digest, "url": image_url(digest), "thumbnail": thumbnail_url(digest)},
+    }
+
+
+class ImageJobRequest(BaseModel):
+    diary_id: int | None = None  # 저장된 일기의 내용으로 생성하고 결과를 Image 에 기록
+    story: str | None = None  # 아직 저장하지 않은 일기 내용으로 생성
+
+
+# /images/jobs
+# 이미지 생성 작업을 큐에 넣고 작업 id 를 바로 반환
+@router.post("/jobs", status_code=202)
+async def submit_image_job(body: ImageJobRequest, user_id: int = Depends(current_user), db: AsyncSession = Depends(get_db)):
+    story = body.story
+    if body.diary_id is not None:
+        diary = await get_user_diary(db, user_id, body.diary_id)
+        if diary is None:
+            raise HTTPException(status_code=404, detail=f"id가 {body.diary_id}인 다이어리가 존재하지 않음")
+        story = diary.content
+    if not story:
+        raise HTTPException(status_code=400, detail="일기 내용이 없습니다.")
+
+    try:
+        job = await image_jobs.submit(user_id, story, body.diary_id)
+    except QueueFull:
+        # 대기 중인 작업이 너무 많으면 받지 않고 잠시 후 다시 요청하도록 함
+        raise HTTPException(status_code=503, detail="이미지 생성 요청이 많습니다. 잠시 후 다시 시도해 주세요.", headers={"Retry-After": "10"})
+
+    return {"status": 202, "message": "이미지 생성 요청 완료", "data": job}
+
+
+# /images/jobs/{job_id}
+@router.get("/jobs/{job_id}")
+async def get_image_job(job_id: str, user_id: int = Depends(current_user)):
+    job = await image_jobs.get(job_id, user_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="이미지 생성 작업이 존재하지 않습니다.")
+    return {"status": 200, "message": "이미지 생성 작업 조회", "data": job}
+
+
+async def job_events(job: dict, user_id: int):
+    # 상태가 바뀔 때마다 전송하고 완료/실패하면 스트림 종료
+    # (다른 워커가 생성 중인 작업은 IMAGE_JOB_POLL_INTERVAL 마다 DB 에서 다시 읽음)
+    yield b"event: status\ndata: %s\n\n" % orjson.dumps(job)
+    last_sent = time.monotonic()
+    while job["status"] not in (DONE, FAILED):
+        await image_jobs.wait_change(job["job_id"], IMAGE_JOB_POLL_INTERVAL)
+        current = await image_jobs.get(job["job_id"], user_id)
+        if current is None:
+            return
+        if current != job:
+            job = current
+            yield b"event: status\ndata: %s\n\n" % orjson.dumps(job)
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent >= NOTIFY_HEARTBEAT:
+            yield b": ping\n\n"
+            last_sent = time.monotonic()
+
+
+# /images/jobs/{job_id}/events (Server-Sent Events)
+@router.get("/jobs/{job_id}/events")
+async def stream_image_job(job_id: str, user_id: int = Depends(current_user)):
+    job = await image_jobs.get(job_id, user_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="이미지 생성 작업이 존재하지 않습니다.")
+    return StreamingResponse(job_events(job, user_id), media_type="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+
+# /images/prompts/reload
+# prompt 테이블을 바꾼 뒤 호출하면 요청을 받은 워커가 프롬프트를 바로 다시 읽음 (다른 워커는 PROMPT_CACHE_TTL 안에 반영)
+@router.post("/prompts/reload", include_in_schema=False)
+async def reload_prompts(x_admin_token: str | None = Header(None)):
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token.encode(), ADMIN_TOKEN.encode()):
+        raise HTTPException(status_code=403, detail="관리자 토큰이 올바르지 않습니다.")
+    prompt_cache.invalidate()
+    template = await prompt_cache.get()
+    return {"status": 200, "message": "프롬프트 다시 읽기 완료", "length": len(template)}
+
+
+# /images/{digest}
+@router.get("/{digest}")
+async def get_image(digest: str, request: Request):
+    if not is_digest(digest):
+        raise HTTPException(status_code=404, detail="이미지가 존재하지 않습니다.")
+    return await file_response(request, image_store.path(digest), f'"{digest}"')
+
 
-@router.get("/images")
-async def get_images():
-    return {"message": "Images route"}
+# /images/{digest}/thumb
+@router.get("/{digest}/thumb")
+async def get_thumbnail(digest: str, request: Request):
+    if not is_digest(digest):
+        raise HTTPException(status_code=404, detail="이미지가 존재하지 않습니다.")
+    return await file_response(request, image_store.thumb_path(digest), f'"{digest}-thumb"', "image/jpeg")
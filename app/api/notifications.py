@@ -0,0 +1,116 @@
+import asyncio
+
+import orjson
+from fastapi import APIRouter, Depends, Header, Query
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import SessionLocal, get_db
+from app.models import Notification
+from app.notifications import NOTIFICATION_COLUMNS, NOTIFY_BACKLOG, NOTIFY_BATCH, NOTIFY_HEARTBEAT, hub, notification_item
+from app.pagination import PAGE_MAX_SIZE, PAGE_SIZE, InvalidCursor, page, paginate
+from .auth import current_user
+
+# 모든 알림 라우트는 로그인한 사용자만 접근 가능
+router = APIRouter(prefix="/notifications", dependencies=[Depends(current_user)])
+
+# 알림 목록 커서 정렬 키 : 최신순 (user_id, is_read, created_at) 인덱스 사용
+NOTIFICATION_KEYS = [Notification.created_at, Notification.notification_id]
+NOTIFICATION_KEY_NAMES = ["created_at", "notification_id"]
+
+
+class ReadNotifications(BaseModel):
+    ids: list[int] = []
+    all: bool = False  # true 이면 읽지 않은 알림 전체를 읽음 처리
+
+
+# /notifications?unread=true&cursor=&size=20
+@router.get("/")
+async def get_notifications(unread: bool = Query(False, description="읽지 않은 알림만 조회"),
+                            cursor: str | None = Query(None, description="다음 페이지 커서"),
+                            size: int = Query(PAGE_SIZE, ge=1, le=PAGE_MAX_SIZE, description="페이지 크기"),
+                            user_id: int = Depends(current_user),
+                            db: AsyncSession = Depends(get_db)):
+    query = select(*NOTIFICATION_COLUMNS).where(Notification.user_id == user_id)
+    if unread:
+        query = query.where(Notification.is_read == False)
+    scope = f"notification:{user_id}:{unread}"
+    try:
+        rows = (await db.execute(paginate(query, NOTIFICATION_KEYS, scope, cursor, size))).all()
+    except InvalidCursor:
+        return ORJSONResponse({"status": 400, "message": "잘못된 커서입니다."})
+    rows, next_cursor = page(rows, NOTIFICATION_KEY_NAMES, scope, size)
+
+    return ORJSONResponse({
+        "status": 200,
+        "message": "알림 조회 완료",
+        "data": [notification_item(row) for row in rows],
+        "next_cursor": next_cursor,
+    })
+
+
+# /notifications/read
+@router.put("/read")
+async def read_notifications(body: ReadNotifications, user_id: int = Depends(current_user), db: AsyncSession = Depends(get_db)):
+    # 한 번의 UPDATE 로 여러 알림을 읽음 처리 (id 가 많으면 NOTIFY_BATCH 개씩 나눔)
+    base = update(Notification).where(Notification.user_id == user_id, Notification.is_read == False).values(is_read=True)
+    count = 0
+    if body.all:
+        count = (await db.execute(base)).rowcount
+    else:
+        ids = sorted(set(body.ids))
+        for offset in range(0, len(ids), NOTIFY_BATCH):
+            result = await db.execute(base.where(Notification.notification_id.in_(ids[offset:offset + NOTIFY_BATCH])))
+            count += result.rowcount
+    await db.commit()
+    return {"status": 200, "message": "알림 읽음 처리 완료", "count": count}
+
+
+def sse(event: dict) -> bytes:
+    return b"id: %d\nevent: notification\ndata: %s\n\n" % (event["id"], orjson.dumps(event))
+
+
+async def notification_stream(user_id: int, last_event_id: int | None):
+    # 연결 전에 구독하여 backlog 조회와 새 알림 사이에 빠지는 알림이 없도록 함
+    queue = hub.subscribe(user_id)
+    try:
+        # 놓친 읽지 않은 알림 먼저 전송 (재접속 시 Last-Event-ID 이후만)
+        query = select(*NOTIFICATION_COLUMNS).where(Notification.user_id == user_id, Notification.is_read == False)
+        if last_event_id is not None:
+            query = query.where(Notification.notification_id > last_event_id)
+        async with SessionLocal() as db:
+            rows = (await db.execute(query.order_by(Notification.notification_id.desc()).limit(NOTIFY_BACKLOG))).all()
+        sent = last_event_id or 0
+        for row in reversed(rows):
+            sent = max(sent, row.notification_id)
+            yield sse(notification_item(row))
+
+        while True:
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=NOTIFY_HEARTBEAT)
+            except asyncio.TimeoutError:
+                # 프록시/로드밸런서가 유휴 연결을 끊지 않도록 주석 전송
+                yield b": ping\n\n"
+                continue
+            if event is None:
+                break  # 워커 종료 (클라이언트는 Last-Event-ID 로 다시 연결)
+            # backlog 로 이미 보낸 알림이 허브에서 다시 전달될 수 있으므로 이미 보낸 id 는 건너뜀
+            if event["id"] > sent:
+                sent = event["id"]
+                yield sse(event)
+    finally:
+        hub.unsubscribe(user_id, queue)
+
+
+# /notifications/stream (Server-Sent Events)
+@router.get("/stream")
+async def stream_notifications(user_id: int = Depends(current_user),
+                               last_event_id: int | None = Header(None, description="마지막으로 받은 알림 id")):
+    # 스트림이 열려 있는 동안 DB 커넥션을 잡고 있지 않도록 backlog 조회에만 짧게 세션을 사용
+    return StreamingResponse(
+        notification_stream(user_id, last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
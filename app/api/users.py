@@ -1,8 +1,19 @@
-from fastapi import APIRouter, Request
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, Query, Request
 from pydantic import BaseModel
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import get_db
+from app.models import User
+from app.nicknames import NICKNAME_CHECK_MAX, NICKNAME_MAX_LENGTH, nicknames, valid_nickname
+from app.user_settings import get_settings, save_settings
+from .auth import current_user
 
 
-router = APIRouter(prefix="/users")
+# 모든 사용자 라우트는 로그인한 사용자만 접근 가능
+router = APIRouter(prefix="/users", dependencies=[Depends(current_user)])
 
 
 # /users/settings
@@ -11,13 +22,36 @@ class Settings(BaseModel):
     darkmode: bool | None = False
 
 
+def settings_item(values: dict) -> dict:
+    # 클라이언트 필드 이름(alram, darkmode)으로 변환
+    return {"alram": values["notification"], "darkmode": values["dark_mode"]}
+
+
+@router.get("/settings")
+async def get_user_settings(user_id: int = Depends(current_user)):
+    # 캐시에 있으면 DB 를 조회하지 않음
+    return {"status": 200, "message": "설정 조회 완료", "settings": settings_item(await get_settings(user_id))}
+
+
 @router.patch("/settings")
-async def settings(settings: Settings):
-    return {"settings": settings}
+async def settings(settings: Settings, user_id: int = Depends(current_user), db: AsyncSession = Depends(get_db)):
+    # 요청에 포함된 항목만 변경
+    fields = settings.model_dump(exclude_unset=True, exclude_none=True)
+    changes = {}
+    if "alram" in fields:
+        changes["notification"] = fields["alram"]
+    if "darkmode" in fields:
+        changes["dark_mode"] = fields["darkmode"]
+    values = await save_settings(db, user_id, changes)
+    return {"status": 200, "message": "설정 변경 완료", "settings": settings_item(values)}
+
+class NicknameCheck(BaseModel):
+    nicknames: list[str] = []
+
 
 # /users/nickname
 @router.put("/nickname")
-async def nickname(request: Request):
+async def nickname(request: Request, user_id: int = Depends(current_user), db: AsyncSession = Depends(get_db)):
     json = await request.json()
     # request body(json)가 업는 경우
     if not json:
@@ -27,9 +61,40 @@ async def nickname(request: Request):
     if not nickname:
         # json에 nickname 데이터가 없는 경우
         return {"status": 409, "message": "닉네임 데이터 없음", "request": json}
+    if not valid_nickname(nickname):
+        return {"status": 400, "message": f"닉네임은 {NICKNAME_MAX_LENGTH}자 이하의 문자열이어야 합니다."}
+    nickname = nickname.strip()
 
-    # 닉네임 중복을 테스트 하기 위해 'admin', 'test' 인 경우 중복으로 판정
-    if nickname in ["admin", "test"]:
+    # 미리 조회하지 않고 바로 변경 : 동시에 같은 닉네임을 요청해도 고유 인덱스가 하나만 통과시킴
+    try:
+        await db.execute(update(User).where(User.user_id == user_id).values(nickname=nickname, updated_at=datetime.now()))
+        await db.commit()
+    except IntegrityError:
+        await db.rollback()
         return {"status": 409, "message": "닉네임 중복"}
-    # 그 외에는 닉네임 변경 성공 return
+    nicknames.add(nickname)
     return {"status": 200, "message": "닉네임 변경 성공"}
+
+
+# /users/nickname/check?nickname=
+@router.get("/nickname/check")
+async def check_nickname(nickname: str = Query(..., description="확인할 닉네임"),
+                         db: AsyncSession = Depends(get_db)):
+    if not valid_nickname(nickname):
+        return {"status": 400, "message": f"닉네임은 {NICKNAME_MAX_LENGTH}자 이하의 문자열이어야 합니다."}
+    # 필터에 없으면 DB 를 조회하지 않고 바로 사용 가능으로 응답
+    nickname = nickname.strip()
+    available = (await nicknames.available(db, [nickname]))[nickname]
+    return {"status": 200, "message": "닉네임 확인 완료", "available": available}
+
+
+# /users/nickname/check (여러 닉네임 한 번에 확인)
+@router.post("/nickname/check")
+async def check_nicknames(body: NicknameCheck, db: AsyncSession = Depends(get_db)):
+    if not 0 < len(body.nicknames) <= NICKNAME_CHECK_MAX:
+        return {"status": 400, "message": f"닉네임은 1~{NICKNAME_CHECK_MAX}개까지 확인할 수 있습니다."}
+    if not all(valid_nickname(nickname) for nickname in body.nicknames):
+        return {"status": 400, "message": f"닉네임은 {NICKNAME_MAX_LENGTH}자 이하의 문자열이어야 합니다."}
+    # 필터를 통과한(있을 수도 있는) 닉네임만 IN 조회 한 번으로 확인
+    available = await nicknames.available(db, [nickname.strip() for nickname in body.nicknames])
+    return {"status": 200, "message": "닉네임 확인 완료", "nicknames": available}
@@ -0,0 +1,212 @@
+# 삭제/방치된 행 보관(archive)
+# diary, image, temp_diary 는 is_deleted 로 소프트 삭제하므로 계정이 오래될수록 삭제된 행이 쌓여
+# 모든 조회가 건너뛰어야 하는 테이블/인덱스가 커짐
+# 하루 한 번 기본 키 구간을 차례로 훑으며 작은 트랜잭션 단위로 보관 테이블(*_archive)로 옮김
+# - 삭제 후 ARCHIVE_DELAY_HOURS 가 지난 일기 (이미지와 임시 저장본도 함께)
+# - 삭제된 이미지 (교체된 생성 이미지 후보 등)
+# - 삭제되었거나 TEMP_DRAFT_STALE_DAYS 동안 수정하지 않았거나 이미 일기에 반영된 임시 저장본
+# 삭제된 일기는 ARCHIVE_RETENTION_DAYS 안에 복구할 수 있고, 그 뒤에는 보관 테이블에서도 정리함
+#
+# 직접 실행 (트래픽이 적은 시간에):
+#   python -m app.archive run
+#   python -m app.archive restore --user-id 1 --diary-id 10
+import argparse
+import asyncio
+import os
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, delete, exists, func, insert, literal, or_, select, update
+
+from .database import SessionLocal, engine
+from .models import Diary, DiaryArchive, Image, ImageArchive, TempDiary, TempDiaryArchive
+from .stats import stat_keys, update_stats
+from .temp_buffer import temp_buffer
+
+ARCHIVE_TIME = os.getenv("ARCHIVE_TIME", "04:00")  # 매일 보관 작업 시각 (비어 있으면 실행하지 않음)
+ARCHIVE_BATCH = int(os.getenv("ARCHIVE_BATCH", 1000))  # 한 트랜잭션에서 훑는 기본 키 구간 크기
+ARCHIVE_DELAY_HOURS = float(os.getenv("ARCHIVE_DELAY_HOURS", 24))  # 삭제 후 원래 테이블에 남겨 둘 시간
+ARCHIVE_RETENTION_DAYS = int(os.getenv("ARCHIVE_RETENTION_DAYS", 30))  # 삭제 후 복구할 수 있는 기간
+TEMP_DRAFT_STALE_DAYS = int(os.getenv("TEMP_DRAFT_STALE_DAYS", 30))  # 수정하지 않은 임시 저장본을 보관할 때까지의 기간
+# 일기에 반영된 임시 저장본도 write-behind 버퍼가 기록할 시간을 두고 보관
+TEMP_DRAFT_PUBLISHED_GRACE = timedelta(hours=1)
+
+
+def column_names(model) -> list[str]:
+    return [column.name for column in model.__table__.columns]
+
+
+async def move(db, source, target, condition, now: datetime) -> int:
+    # source 에서 condition 에 맞는 행을 같은 id 로 target 에 복사한 뒤 삭제 (INSERT ... SELECT + DELETE)
+    names = column_names(source)
+    await db.execute(
+        insert(target).from_select([*names, "archived_at"], select(*source.__table__.columns, literal(now)).where(condition))
+    )
+    return (await db.execute(delete(source).where(condition))).rowcount
+
+
+async def move_back(db, source, target, condition) -> int:
+    # 보관 테이블(source)에서 원래 테이블(target)로 되돌림
+    names = column_names(target)
+    await db.execute(insert(target).from_select(names, select(*[source.__table__.c[name] for name in names]).where(condition)))
+    return (await db.execute(delete(source).where(condition))).rowcount
+
+
+async def scan(pk, batch: int = ARCHIVE_BATCH):
+    # 기본 키 [lo, hi) 구간을 차례로 돌려줌 (is_deleted 등 조건 컬럼에 인덱스가 없어도 구간 스캔만 함)
+    async with SessionLocal() as db:
+        low, high = (await db.execute(select(func.min(pk), func.max(pk)))).one()
+    if low is None:
+        return
+    for lo in range(low, high + 1, batch):
+        yield lo, lo + batch
+        await asyncio.sleep(0)  # 다른 요청에 이벤트 루프를 양보
+
+
+async def archive_diaries(now: datetime) -> int:
+    cutoff = now - timedelta(hours=ARCHIVE_DELAY_HOURS)
+    total = 0
+    async for lo, hi in scan(Diary.diary_id):
+        async with SessionLocal() as db:
+            # 옮기는 동안 복구되지 않도록 잠금
+            ids = (await db.execute(
+                select(Diary.diary_id)
+                .where(Diary.diary_id >= lo, Diary.diary_id < hi, Diary.is_deleted == True, Diary.updated_at < cutoff)
+                .with_for_update()
+            )).scalars().all()
+            if not ids:
+                continue
+            # 외래 키가 일기를 참조하므로 이미지/임시 저장본을 먼저 옮김
+            temps = (await db.execute(select(TempDiary.user_id, TempDiary.temp_diary_id).where(TempDiary.diary_id.in_(ids)))).all()
+            await move(db, TempDiary, TempDiaryArchive, TempDiary.diary_id.in_(ids), now)
+            await move(db, Image, ImageArchive, Image.diary_id.in_(ids), now)
+            total += await move(db, Diary, DiaryArchive, Diary.diary_id.in_(ids), now)
+            await db.commit()
+        # 이 워커의 버퍼만 정리됨 (다른 워커는 flush 에서 반영되지 않은 행을 보고 소유자 캐시에서 제거)
+        for user_id, temp_id in temps:
+            temp_buffer.forget(user_id, temp_id)
+    return total
+
+
+async def archive_images(now: datetime) -> int:
+    total = 0
+    async for lo, hi in scan(Image.image_id):
+        async with SessionLocal() as db:
+            ids = (await db.execute(
+                select(Image.image_id).where(Image.image_id >= lo, Image.image_id < hi, Image.is_deleted == True)
+            )).scalars().all()
+            if ids:
+                total += await move(db, Image, ImageArchive, Image.image_id.in_(ids), now)
+                await db.commit()
+    return total
+
+
+async def archive_temp_diaries(now: datetime) -> int:
+    published = exists().where(
+        Diary.diary_id == TempDiary.diary_id,
+        Diary.updated_at >= TempDiary.updated_at,
+    )
+    condition = or_(
+        TempDiary.is_deleted == True,
+        TempDiary.updated_at < now - timedelta(days=TEMP_DRAFT_STALE_DAYS),
+        and_(TempDiary.diary_id.is_not(None), TempDiary.updated_at < now - TEMP_DRAFT_PUBLISHED_GRACE, published),
+    )
+    total = 0
+    async for lo, hi in scan(TempDiary.temp_diary_id):
+        async with SessionLocal() as db:
+            rows = (await db.execute(
+                select(TempDiary.user_id, TempDiary.temp_diary_id)
+                .where(TempDiary.temp_diary_id >= lo, TempDiary.temp_diary_id < hi, condition)
+            )).all()
+            if not rows:
+                continue
+            total += await move(db, TempDiary, TempDiaryArchive, TempDiary.temp_diary_id.in_([row.temp_diary_id for row in rows]), now)
+            await db.commit()
+        # 다른 워커의 버퍼는 flush 때 반영되지 않은 행으로 감지함
+        for user_id, temp_id in rows:
+            temp_buffer.forget(user_id, temp_id)
+    return total
+
+
+async def purge_archive(now: datetime) -> int:
+    # 복구 기간이 지난 보관 행 삭제 (일기와 함께 옮긴 이미지/임시 저장본은 같은 archived_at 을 가지므로 함께 정리됨)
+    cutoff = now - timedelta(days=ARCHIVE_RETENTION_DAYS)
+    total = 0
+    for model, pk in ((DiaryArchive, DiaryArchive.diary_id), (ImageArchive, ImageArchive.image_id), (TempDiaryArchive, TempDiaryArchive.temp_diary_id)):
+        while True:
+            async with SessionLocal() as db:
+                ids = (await db.execute(select(pk).where(model.archived_at < cutoff).limit(ARCHIVE_BATCH))).scalars().all()
+                if not ids:
+                    break
+                total += (await db.execute(delete(model).where(pk.in_(ids)))).rowcount
+                await db.commit()
+            await asyncio.sleep(0)
+    return total
+
+
+async def run_archive() -> int:
+    now = datetime.now()
+    return (
+        await archive_diaries(now)
+        + await archive_images(now)
+        + await archive_temp_diaries(now)
+        + await purge_archive(now)
+    )
+
+
+async def restore_diary(db, user_id: int, diary_id: int) -> bool:
+    # 삭제 후 ARCHIVE_RETENTION_DAYS 안의 일기를 되살리고 통계 집계에 다시 더함 (커밋은 호출한 쪽에서)
+    now = datetime.now()
+    cutoff = now - timedelta(days=ARCHIVE_RETENTION_DAYS)
+
+    # 아직 보관 테이블로 옮기기 전인 경우 (행을 잠가 보관 작업이 그 사이에 옮기지 못하게 함)
+    entry = (await db.execute(
+        select(Diary.diary_date, Diary.emotion, Diary.weather)
+        .where(Diary.diary_id == diary_id, Diary.user_id == user_id, Diary.is_deleted == True, Diary.updated_at >= cutoff)
+        .with_for_update()
+    )).first()
+    if entry is None:
+        # 보관 테이블의 행도 잠가 같은 일기를 동시에 두 번 되돌리지 않게 함
+        entry = (await db.execute(
+            select(DiaryArchive.diary_date, DiaryArchive.emotion, DiaryArchive.weather)
+            .where(DiaryArchive.diary_id == diary_id, DiaryArchive.user_id == user_id, DiaryArchive.updated_at >= cutoff)
+            .with_for_update()
+        )).first()
+        if entry is None:
+            return False
+        # 일기를 먼저 되돌린 뒤 일기를 참조하는 이미지/임시 저장본을 되돌림
+        await move_back(db, DiaryArchive, Diary, DiaryArchive.diary_id == diary_id)
+        await move_back(db, ImageArchive, Image, ImageArchive.diary_id == diary_id)
+        await move_back(db, TempDiaryArchive, TempDiary, TempDiaryArchive.diary_id == diary_id)
+
+    # 행 잠금이 없는 DB(SQLite)에서는 그 사이에 옮겨지거나 복구되었을 수 있으므로 실제로 되살린 경우에만 통계에 더함
+    result = await db.execute(
+        update(Diary)
+        .where(Diary.diary_id == diary_id, Diary.user_id == user_id, Diary.is_deleted == True)
+        .values(is_deleted=False, updated_at=now)
+    )
+    if not result.rowcount:
+        return False
+    await update_stats(db, added=stat_keys(user_id, entry.diary_date, entry.emotion, entry.weather))
+    return True
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["run", "restore"])
+    parser.add_argument("--user-id", type=int)
+    parser.add_argument("--diary-id", type=int)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        print(f"archived/purged: {await run_archive()} rows")
+    else:
+        async with SessionLocal() as db:
+            restored = await restore_diary(db, args.user_id, args.diary_id)
+            if restored:
+                await db.commit()
+        print("restored" if restored else "not found or retention expired")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,252 @@
+# 다이어리 전체 내보내기/가져오기
+# 내보내기 : 서버 측 커서(yield_per)로 EXPORT_BATCH 행씩 읽어 NDJSON(한 줄에 일기 하나) 또는
+#            zip(diaries.ndjson + images/<해시>)으로 바로 흘려보내므로 기록이 많아도 메모리 사용량이 일정함
+# 가져오기 : 요청 본문을 줄 단위로 읽어 검증한 뒤 IMPORT_BATCH 개씩 한 트랜잭션으로 저장
+#            (같은 날짜/작성 시각의 일기가 이미 있으면 건너뛰므로 같은 파일을 다시 가져와도 중복되지 않음)
+import os
+import tempfile
+import zipfile
+from datetime import datetime
+
+import anyio
+import orjson
+from sqlalchemy import insert, select
+
+from .database import SessionLocal
+from .image_store import IMAGE_MAX_BYTES, ImageTooLarge, InvalidImage, digest_from_url, image_store, image_url, is_digest
+from .models import Diary, Image
+from .stats import stat_keys, update_stats
+
+EXPORT_BATCH = int(os.getenv("EXPORT_BATCH", 500))  # 서버 측 커서에서 한 번에 가져올 행 수
+IMPORT_BATCH = int(os.getenv("IMPORT_BATCH", 500))  # 한 트랜잭션에 저장할 일기 수
+IMPORT_MAX_BYTES = int(os.getenv("IMPORT_MAX_BYTES", 500 * 1024 * 1024))  # 가져오기 요청 최대 크기
+IMPORT_MAX_LINE = IMAGE_MAX_BYTES * 2  # 한 줄 최대 크기 (base64 이미지 포함)
+IMPORT_MAX_ERRORS = 100  # 응답에 포함할 오류 수
+NDJSON_NAME = "diaries.ndjson"
+
+
+class ImportTooLarge(Exception):
+    pass
+
+
+class InvalidItem(Exception):
+    pass
+
+
+def export_item(row) -> dict:
+    return {
+        "id": row.diary_id,
+        "date": row.diary_date,
+        "mood": row.emotion,
+        "weather": row.weather,
+        "title": row.title,
+        "story": row.content,
+        "bookmark": bool(row.like),
+        "image": row.image_url,
+        "created_at": row.created_at,
+        "updated_at": row.updated_at,
+    }
+
+
+async def export_rows(user_id: int):
+    # 스트리밍 응답은 요청 의존성(get_db)이 끝난 뒤 전송되므로 별도 세션을 사용
+    async with SessionLocal() as db:
+        db.info["read_only"] = True
+        db.info["user_id"] = user_id  # 최근에 쓰기를 했으면 기본 DB 에서 읽음
+        result = await db.stream(
+            select(Diary.diary_id, Diary.diary_date, Diary.emotion, Diary.weather, Diary.title, Diary.content,
+                   Diary.like, Diary.created_at, Diary.updated_at, Image.image_url)
+            .outerjoin(Image, (Image.diary_id == Diary.diary_id) & (Image.is_active == True))
+            .where(Diary.user_id == user_id, Diary.is_deleted == False)
+            .order_by(Diary.diary_date, Diary.diary_id)
+            .execution_options(yield_per=EXPORT_BATCH)
+        )
+        async for rows in result.partitions():
+            yield rows
+
+
+def ndjson(rows) -> bytes:
+    return b"".join(orjson.dumps(export_item(row), option=orjson.OPT_APPEND_NEWLINE) for row in rows)
+
+
+async def export_ndjson(user_id: int):
+    async for rows in export_rows(user_id):
+        yield ndjson(rows)
+
+
+class ZipStream:
+    # zipfile 이 쓴 내용을 모아 두었다가 응답으로 흘려보냄 (tell/seek 가 없으므로 zipfile 은 스트리밍 모드로 기록)
+    def __init__(self):
+        self.chunks: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        data, self.chunks = b"".join(self.chunks), []
+        return data
+
+
+async def export_zip(user_id: int):
+    # diaries.ndjson 을 먼저 쓰고, 일기에서 참조한 저장소 이미지를 images/<해시> 로 이어서 씀
+    stream = ZipStream()
+    digests = {}
+    with zipfile.ZipFile(stream, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        with zf.open(NDJSON_NAME, "w", force_zip64=True) as entry:
+            async for rows in export_rows(user_id):
+                entry.write(ndjson(rows))
+                for row in rows:
+                    digest = digest_from_url(row.image_url)
+                    if digest:
+                        digests[digest] = None
+                yield stream.take()
+        for digest in digests:
+            path = image_store.path(digest)
+            if os.path.exists(path):
+                # 이미지는 이미 압축된 형식이므로 다시 압축하지 않음
+                zf.writestr(f"images/{digest}", await anyio.Path(path).read_bytes(), compress_type=zipfile.ZIP_STORED)
+                yield stream.take()
+    yield stream.take()
+
+
+async def ndjson_lines(chunks):
+    # 바이트 조각을 줄 단위로 나눔 (한 줄이 IMPORT_MAX_LINE 을 넘으면 거절)
+    size = 0
+    buffer = b""
+    async for chunk in chunks:
+        size += len(chunk)
+        if size > IMPORT_MAX_BYTES:
+            raise ImportTooLarge()
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        if len(buffer) > IMPORT_MAX_LINE:
+            raise ImportTooLarge()
+        for line in lines:
+            yield line
+    if buffer:
+        yield buffer
+
+
+async def zip_lines(chunks):
+    # zip 은 끝에 목록이 있으므로 요청 본문을 임시 파일에 받은 뒤 이미지를 저장소에 넣고 diaries.ndjson 을 줄 단위로 읽음
+    with tempfile.TemporaryFile() as f:
+        size = 0
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > IMPORT_MAX_BYTES:
+                raise ImportTooLarge()
+            await anyio.to_thread.run_sync(f.write, chunk)
+        with zipfile.ZipFile(f) as zf:
+            if NDJSON_NAME not in zf.namelist():
+                raise zipfile.BadZipFile(f"{NDJSON_NAME} 이 없습니다.")
+            for info in zf.infolist():
+                name = info.filename.removeprefix("images/")
+                if not (info.filename.startswith("images/") and is_digest(name)) or info.file_size > IMAGE_MAX_BYTES:
+                    continue
+                if not os.path.exists(image_store.path(name)):
+                    try:
+                        await image_store.save_bytes(await anyio.to_thread.run_sync(zf.read, info))
+                    except (InvalidImage, ImageTooLarge):
+                        pass  # 이 이미지를 참조하는 일기는 이미지 없이 저장됨
+            with zf.open(NDJSON_NAME) as entry:
+                async def read_chunks():
+                    while chunk := await anyio.to_thread.run_sync(entry.read, 64 * 1024):
+                        yield chunk
+
+                async for line in ndjson_lines(read_chunks()):
+                    yield line
+
+
+def parse_timestamp(value) -> datetime | None:
+    # TIMESTAMP 컬럼은 초 단위로 저장될 수 있으므로 중복 비교를 위해 초 단위로 맞춤
+    if value is None:
+        return None
+    try:
+        return datetime.fromisoformat(value).replace(microsecond=0, tzinfo=None)
+    except (TypeError, ValueError):
+        raise InvalidItem("created_at/updated_at 형식이 올바르지 않습니다.")
+
+
+async def save_batch(db, user_id: int, batch: list[dict]) -> tuple[int, int]:
+    # 이미 있는 (날짜, 작성 시각)의 일기는 건너뛰고 나머지를 한 트랜잭션으로 저장
+    # (ORM 으로 한 행씩 넣으면 diary_id 를 받느라 행마다 INSERT 가 나가므로 executemany 로 넣은 뒤 id 를 한 번에 조회)
+    dates = {values["diary_date"] for values in batch}
+    result = await db.execute(
+        select(Diary.diary_date, Diary.created_at).where(
+            Diary.user_id == user_id,
+            Diary.is_deleted == False,
+            Diary.diary_date.in_(dates),
+        )
+    )
+    seen = {(diary_date, created_at and created_at.replace(microsecond=0)) for diary_date, created_at in result}
+    entries = []
+    for values in batch:
+        key = (values["diary_date"], values["created_at"])
+        if key not in seen:
+            seen.add(key)
+            entries.append(values)
+    if not entries:
+        return 0, len(batch)
+
+    images = {(values["diary_date"], values["created_at"]): values.pop("image") for values in entries}
+    await db.execute(insert(Diary), [{"user_id": user_id, "is_deleted": False, **values} for values in entries])
+    if any(images.values()):
+        result = await db.execute(
+            select(Diary.diary_id, Diary.diary_date, Diary.created_at).where(
+                Diary.user_id == user_id,
+                Diary.is_deleted == False,
+                Diary.diary_date.in_(dates),
+                Diary.created_at.in_({values["created_at"] for values in entries}),
+            )
+        )
+        now = datetime.now()
+        await db.execute(insert(Image), [
+            {"diary_id": diary_id, "image_url": images[(diary_date, created_at)], "created_at": now,
+             "is_temp": False, "is_active": True, "is_deleted": False}
+            for diary_id, diary_date, created_at in result if images.get((diary_date, created_at))
+        ])
+    await update_stats(db, added=[key for values in entries for key in stat_keys(user_id, values["diary_date"], values["emotion"], values["weather"])])
+    await db.commit()
+    return len(entries), len(batch) - len(entries)
+
+
+async def import_diaries(db, user_id: int, lines, convert) -> dict:
+    # convert(item) -> Diary 컬럼 값 + "image" (검증 실패 시 InvalidItem)
+    imported = skipped = failed = 0
+    errors = []
+    batch = []
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not line.strip():
+            continue
+        try:
+            item = orjson.loads(line)
+            if not isinstance(item, dict):
+                raise InvalidItem("일기 객체가 아닙니다.")
+            values = await convert(item)
+        except (orjson.JSONDecodeError, InvalidItem) as e:
+            failed += 1
+            if len(errors) < IMPORT_MAX_ERRORS:
+                errors.append({"line": line_no, "message": str(e) if isinstance(e, InvalidItem) else "JSON 형식이 올바르지 않습니다."})
+            continue
+        batch.append(values)
+        if len(batch) >= IMPORT_BATCH:
+            saved, duplicates = await save_batch(db, user_id, batch)
+            imported, skipped, batch = imported + saved, skipped + duplicates, []
+    if batch:
+        saved, duplicates = await save_batch(db, user_id, batch)
+        imported, skipped = imported + saved, skipped + duplicates
+    return {"imported": imported, "skipped": skipped, "failed": failed, "errors": errors}
+
+
+def stored_image_url(url: str | None) -> str | None:
+    # 저장소에 없는 이미지 해시 주소는 버림 (다른 서버에서 내보낸 NDJSON 은 zip 으로 이미지와 함께 가져와야 함)
+    digest = digest_from_url(url)
+    if digest is None:
+        return url
+    return image_url(digest) if os.path.exists(image_store.path(digest)) else None
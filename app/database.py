@@ -1,38 +1,263 @@
-# 데이터베이스 연결 엔진을 생성하는 함수
-from sqlalchemy import create_engine 
+import asyncio
+import logging
+import math
+import time
+from contextvars import ContextVar
 
-# 테이블과 모델을 정의하기 위한 기본 클래스를 생성
-from sqlalchemy.ext.declarative import declarative_base
+from fastapi import Request
+from starlette.requests import cookie_parser
+from sqlalchemy import event, text
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.dml import UpdateBase
+
+# 비동기 데이터베이스 연결 엔진을 생성하는 함수
+# AsyncSession : 이벤트 루프를 막지 않고 데이터베이스 트랜잭션을 관리
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
-# 데이터베이스 세션을 생성하기 위한 팩토리 함수를 생성
-# Sesstion : 데이터베이스 트랜잭션을 관리
-from sqlalchemy.orm import sessionmaker, Session
+# 테이블과 모델을 정의하기 위한 기본 클래스를 생성
+from sqlalchemy.orm import declarative_base
 
-#  제너레이터 함수의 반환 타입을 정의하는 타입 힌트
-from typing import Generator
+#  비동기 제너레이터 함수의 반환 타입을 정의하는 타입 힌트
+from typing import AsyncGenerator
 
-# 의존성 주입 도구
-from fastapi import Depends
-from dotenv import load_dotenv
 import os
 
-load_dotenv()
+from .metrics import metrics
+
+logger = logging.getLogger(__name__)
 
 SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL")
+# 읽기 전용 복제본 (설정하지 않으면 모든 요청이 기본 DB 를 사용)
+SQLALCHEMY_REPLICA_URL = os.getenv("DATABASE_REPLICA_URL")
+
+# 커넥션 풀 설정 (환경 변수로 조정 가능)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))  # 항상 유지할 커넥션 수
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))  # 풀이 부족할 때 추가로 허용할 커넥션 수
+DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 10))  # 커넥션을 기다리는 최대 시간(초)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))  # MySQL wait_timeout 보다 먼저 커넥션 재생성(초)
+
+READ_YOUR_WRITES_WINDOW = float(os.getenv("READ_YOUR_WRITES_WINDOW", 5.0))  # 쓰기 후 기본 DB 에서 읽는 시간(초)
+PRIMARY_PIN_COOKIE = "db_primary_until"  # 쓰기 후 기본 DB 에서 읽을 시각(epoch 초)을 담는 쿠키
+REPLICA_CHECK_INTERVAL = float(os.getenv("REPLICA_CHECK_INTERVAL", 5.0))  # 복제본 상태 확인 주기(초)
+READ_METHODS = {"GET", "HEAD"}
+
+
+def to_async_url(url: str) -> str:
+    # 기존 .env 의 동기 드라이버 URL(mysql+pymysql://...)을 비동기 드라이버 URL 로 변환
+    if url.startswith("mysql+pymysql://"):
+        return "mysql+aiomysql://" + url[len("mysql+pymysql://"):]
+    if url.startswith("mysql://"):
+        return "mysql+aiomysql://" + url[len("mysql://"):]
+    if url.startswith("sqlite:///"):
+        return "sqlite+aiosqlite:///" + url[len("sqlite:///"):]
+    return url
+
+
+def engine_options(url: str) -> dict:
+    # SQLite 는 QueuePool 설정을 쓰지 않으므로 MySQL 에서만 풀 크기를 지정
+    if url.startswith("sqlite"):
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": True,  # 끊어진 커넥션을 사용하기 전에 확인
+    }
+
+
+def make_engine(url: str):
+    engine = create_async_engine(url, **engine_options(url))
+    # 쿼리 수/실행 시간 계측 (요청별 DB 시간, N+1 감지)
+    event.listen(engine.sync_engine, "before_cursor_execute", metrics.before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", metrics.after_cursor_execute)
+    return engine
+
+
+ASYNC_DATABASE_URL = to_async_url(SQLALCHEMY_DATABASE_URL)
+
+# 엔진 생성 (기본 DB 와 읽기 전용 복제본)
+engine = make_engine(ASYNC_DATABASE_URL)
+replica_engine = make_engine(to_async_url(SQLALCHEMY_REPLICA_URL)) if SQLALCHEMY_REPLICA_URL else None
+replica_healthy = replica_engine is not None
+
+# 최근에 쓰기를 한 사용자 → 마지막 쓰기 시각
+# 복제 지연 때문에 방금 쓴 내용이 보이지 않는 일이 없도록 이 시간 동안은 기본 DB 에서 읽음
+# (워커 프로세스별로 관리되므로, 다음 요청이 다른 워커/인스턴스로 가는 경우는 PrimaryPinMiddleware 의 쿠키로 처리)
+recent_writes: dict[int, float] = {}
+
+# 요청별 {"until": 기본 DB 에서 읽을 시각, "wrote": 이번 요청에서 쓰기를 커밋했는지}
+request_pin: ContextVar[dict | None] = ContextVar("request_pin", default=None)
+
+
+def mark_write(user_id: int) -> None:
+    now = time.monotonic()
+    recent_writes[user_id] = now
+    if len(recent_writes) > 10000:
+        for key in [k for k, at in recent_writes.items() if now - at > READ_YOUR_WRITES_WINDOW]:
+            del recent_writes[key]
+
+
+def recently_wrote(user_id: int) -> bool:
+    at = recent_writes.get(user_id)
+    return at is not None and time.monotonic() - at < READ_YOUR_WRITES_WINDOW
+
+
+def pinned_by_request() -> bool:
+    # 쿠키는 클라이언트가 바꿀 수 있으므로 READ_YOUR_WRITES_WINDOW 보다 먼 시각은 무시
+    pin = request_pin.get()
+    now = time.time()
+    return pin is not None and now < pin["until"] <= now + READ_YOUR_WRITES_WINDOW
+
+
+class RoutingSession(Session):
+    # 쓰기(flush, INSERT/UPDATE/DELETE)는 기본 DB 로,
+    # 읽기 전용 요청(GET)의 조회는 복제본으로 보냄
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if self._flushing or isinstance(clause, UpdateBase):
+            self.info["wrote"] = True
+            return engine.sync_engine
+        if (
+            replica_healthy
+            and self.info.get("read_only")
+            and not self.info.get("wrote")  # 같은 요청 안에서 쓴 내용은 기본 DB 에서 읽음
+            and not recently_wrote(self.info.get("user_id"))
+            and not pinned_by_request()
+        ):
+            return replica_engine.sync_engine
+        return engine.sync_engine
+
 
+@event.listens_for(RoutingSession, "after_commit")
+def pin_to_primary(session):
+    # 쓰기를 커밋한 사용자는 잠시 동안 기본 DB 에서 읽도록 고정
+    if not session.info.get("wrote"):
+        return
+    user_id = session.info.get("user_id")
+    if user_id is not None:
+        mark_write(user_id)
+    pin = request_pin.get()
+    if pin is not None:
+        pin["wrote"] = True
+        pin["until"] = time.time() + READ_YOUR_WRITES_WINDOW
+
+
+class PrimaryPinMiddleware:
+    # 쓰기를 커밋한 응답에 기본 DB 에서 읽을 시각을 쿠키로 붙이고, 요청에 담긴 쿠키를 읽어
+    # 다음 요청이 다른 워커/인스턴스로 가더라도 그 시각까지는 기본 DB 에서 읽도록 함
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        until = 0.0
+        for name, value in scope["headers"]:
+            if name == b"cookie":
+                try:
+                    until = float(cookie_parser(value.decode("latin-1")).get(PRIMARY_PIN_COOKIE, 0))
+                except ValueError:
+                    pass
+        pin = {"until": until, "wrote": False}
+        token = request_pin.set(pin)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and pin["wrote"]:
+                cookie = (
+                    f"{PRIMARY_PIN_COOKIE}={pin['until']:.3f}; Max-Age={math.ceil(READ_YOUR_WRITES_WINDOW)}; "
+                    "Path=/; HttpOnly; SameSite=Lax"
+                )
+                message = {**message, "headers": [*message.get("headers", []), (b"set-cookie", cookie.encode())]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_pin.reset(token)
 
-# 엔진 생성
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
 
 # 세션 생성
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# expire_on_commit=False : commit 후 속성 접근 시 추가 쿼리(지연 로딩)가 발생하지 않도록 함
+SessionLocal = async_sessionmaker(sync_session_class=RoutingSession, autoflush=False, expire_on_commit=False)
 
 # 데이터베이스 베이스 클래스 생성
 Base = declarative_base()
 
-def get_db() -> Generator[Session, None, None]:
-    db = SessionLocal()
-    try:
+
+def upsert(model, rows: list[dict], keys: list[str], on_conflict):
+    # 없으면 INSERT, 고유 키(keys)가 겹치면 on_conflict(새로 넣으려던 값) 이 돌려준 컬럼으로 갱신
+    # (MySQL : ON DUPLICATE KEY UPDATE, SQLite : ON CONFLICT DO UPDATE)
+    if engine.dialect.name == "mysql":
+        stmt = mysql_insert(model).values(rows)
+        return stmt.on_duplicate_key_update(**on_conflict(stmt.inserted))
+    stmt = sqlite_insert(model).values(rows)
+    return stmt.on_conflict_do_update(index_elements=keys, set_=on_conflict(stmt.excluded))
+
+
+async def get_db(request: Request) -> AsyncGenerator[AsyncSession, None]:
+    async with SessionLocal() as db:
+        # GET 요청은 읽기 전용으로 표시하여 복제본에서 조회할 수 있도록 함
+        # (인증 후 current_user 가 db.info["user_id"] 를 채움)
+        db.info["read_only"] = request.method in READ_METHODS
         yield db
+
+
+async def ping(conn) -> None:
+    await conn.execute(text("SELECT 1"))
+
+
+async def fill_pool(engine) -> None:
+    size = DB_POOL_SIZE if engine.dialect.name != "sqlite" else 1
+    conns = await asyncio.gather(*(engine.connect().start() for _ in range(size)))
+    try:
+        await asyncio.gather(*(ping(conn) for conn in conns))
     finally:
-        db.close()
+        for conn in conns:
+            await conn.close()  # 풀로 반환 (연결은 유지됨)
+
+
+async def warm_up() -> None:
+    # 워커 시작 시 풀을 미리 채워 첫 요청들이 커넥션 생성 비용을 내지 않도록 함
+    # 기본 DB 에 연결할 수 없으면 예외가 발생하여 워커가 준비되지 않은 상태로 시작하지 않음
+    await fill_pool(engine)
+    if replica_engine is not None:
+        try:
+            await fill_pool(replica_engine)
+        except Exception:
+            # 복제본은 없어도 기본 DB 로 동작하므로 시작을 막지 않음
+            await check_replica()
+
+
+async def dispose_engines() -> None:
+    # 워커 종료 시 풀의 커넥션을 모두 닫음 (DB 서버에 끊긴 커넥션이 남지 않도록)
+    await engine.dispose()
+    if replica_engine is not None:
+        await replica_engine.dispose()
+
+
+async def is_db_ready() -> bool:
+    try:
+        async with engine.connect() as conn:
+            await ping(conn)
+        return True
+    except Exception:
+        return False
+
+
+async def check_replica() -> None:
+    # 복제본에 연결할 수 없으면 모든 조회를 기본 DB 로 보내고, 복구되면 다시 복제본 사용
+    global replica_healthy
+    if replica_engine is None:
+        return
+    try:
+        async with replica_engine.connect() as conn:
+            await asyncio.wait_for(ping(conn), timeout=DB_POOL_TIMEOUT)
+        healthy = True
+    except Exception:
+        healthy = False
+    if healthy != replica_healthy:
+        logger.warning("read replica is %s", "healthy" if healthy else "unavailable, reading from primary")
+    replica_healthy = healthy
@@ -0,0 +1,313 @@
+# 그림일기 이미지 생성 작업 큐
+# 이미지 생성은 수 초가 걸리므로 요청 안에서 하지 않고 작업 id 를 바로 돌려준 뒤,
+# 정해진 수의 워커가 큐에서 작업을 꺼내 생성하고 결과를 이미지 저장소와 Image 테이블에 기록함
+# 작업 상태와 요청한 사용자는 image_job / image_job_user 테이블에 기록하여 어느 워커 프로세스로 들어온
+# 상태 조회/중복 요청도 처리하고, 생성 자체는 요청을 받은 워커 프로세스의 큐에서 실행함
+import asyncio
+import hashlib
+import importlib
+import logging
+import os
+import time
+import uuid
+from datetime import datetime, timedelta
+from io import BytesIO
+
+import anyio
+from PIL import Image as PILImage, ImageDraw
+from sqlalchemy import delete, or_, select, update
+
+from .database import SessionLocal
+from .image_store import image_store, image_url, thumbnail_url
+from .models import Image, ImageJob as ImageJobRow, ImageJobUser, Prompt
+from .notifications import notify
+
+logger = logging.getLogger(__name__)
+
+IMAGE_GENERATOR = os.getenv("IMAGE_GENERATOR", "app.image_jobs:FakeGenerator")  # "모듈:클래스" 형식
+IMAGE_JOB_WORKERS = int(os.getenv("IMAGE_JOB_WORKERS", 4))  # 동시에 생성하는 작업 수
+IMAGE_JOB_QUEUE_SIZE = int(os.getenv("IMAGE_JOB_QUEUE_SIZE", 100))  # 대기할 수 있는 작업 수 (넘으면 거절)
+IMAGE_JOB_RETENTION_HOURS = int(os.getenv("IMAGE_JOB_RETENTION_HOURS", 24))  # 상태 조회/중복 제거를 위해 작업을 보관할 시간
+IMAGE_JOB_PURGE_INTERVAL = int(os.getenv("IMAGE_JOB_PURGE_INTERVAL", 3600))  # 보관 시간이 지난 작업 정리 주기(초)
+IMAGE_JOB_TIMEOUT = float(os.getenv("IMAGE_JOB_TIMEOUT", 120.0))  # 작업 하나의 최대 생성 시간(초)
+IMAGE_JOB_STALE = float(os.getenv("IMAGE_JOB_STALE", 3600))  # 이 시간(초) 동안 상태가 바뀌지 않은 대기/진행 작업에는 합류하지 않음 (워커가 죽은 경우)
+IMAGE_JOB_POLL_INTERVAL = float(os.getenv("IMAGE_JOB_POLL_INTERVAL", 1.0))  # 다른 워커의 작업 상태를 다시 읽는 주기(초)
+FAKE_GENERATOR_DELAY = float(os.getenv("FAKE_GENERATOR_DELAY", 0.5))  # 가짜 생성기의 응답 지연(초)
+PROMPT_CACHE_TTL = float(os.getenv("PROMPT_CACHE_TTL", 300))  # 프롬프트를 다시 읽을 때까지의 시간(초)
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+
+class QueueFull(Exception):
+    pass
+
+
+class FakeGenerator:
+    # 로컬/테스트용 생성기 : 프롬프트 해시로 색을 정한 PNG 를 만듦
+    async def generate(self, prompt: str) -> bytes:
+        await asyncio.sleep(FAKE_GENERATOR_DELAY)
+        return await anyio.to_thread.run_sync(self.draw, prompt)
+
+    def draw(self, prompt: str) -> bytes:
+        seed = hashlib.sha256(prompt.encode()).digest()
+        img = PILImage.new("RGB", (512, 512), tuple(seed[:3]))
+        ImageDraw.Draw(img).ellipse((128, 128, 384, 384), fill=tuple(seed[3:6]))
+        buffer = BytesIO()
+        img.save(buffer, "PNG")
+        return buffer.getvalue()
+
+
+def load_generator(path: str = IMAGE_GENERATOR):
+    # 실제 생성기는 generate(prompt) -> 이미지 bytes 코루틴을 가진 클래스로 구현하여 IMAGE_GENERATOR 로 지정
+    module, _, name = path.partition(":")
+    return getattr(importlib.import_module(module), name)()
+
+
+class PromptCache:
+    # 사용 중인(is_use) 프롬프트를 읽어 PROMPT_CACHE_TTL 초 동안 보관
+    # 프롬프트를 바꾼 뒤 POST /images/prompts/reload 로 invalidate() 하면 그 워커는 바로 다시 읽고,
+    # 다른 워커는 TTL 이 지나면 다시 읽음 (app.serve 에 SIGHUP 을 보내면 모든 워커가 새로 읽음)
+    def __init__(self, ttl: float = PROMPT_CACHE_TTL):
+        self.ttl = ttl
+        self.template: str | None = None
+        self.expires = 0.0
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return self.template is not None and self.expires > time.monotonic()
+
+    async def get(self) -> str:
+        if not self._fresh():
+            async with self._lock:
+                if not self._fresh():
+                    async with SessionLocal() as db:
+                        result = await db.execute(
+                            select(Prompt.prompt).where(Prompt.is_use == True).order_by(Prompt.prompt_id)
+                        )
+                        self.template = "\n".join(p for p in result.scalars() if p)
+                    self.expires = time.monotonic() + self.ttl
+        return self.template
+
+    def invalidate(self):
+        self.template = None
+
+
+prompt_cache = PromptCache()
+
+
+def build_prompt(template: str, story: str) -> str:
+    # 프롬프트에 {story} 가 있으면 그 자리에, 없으면 뒤에 일기 내용을 붙임
+    if "{story}" in template:
+        return template.replace("{story}", story)
+    return f"{template}\n{story}" if template else story
+
+
+def job_dict(row: ImageJobRow) -> dict:
+    done = row.status == DONE
+    return {
+        "job_id": row.job_id,
+        "status": row.status,
+        "image": image_url(row.digest) if done else None,
+        "thumbnail": thumbnail_url(row.digest) if done else None,
+        "error": row.error,
+    }
+
+
+class ImageJob:
+    # 이 워커 프로세스의 큐에서 생성할 작업 (상태는 DB 에 기록하고 여기서는 대기 중인 SSE 만 깨움)
+    def __init__(self, job_id: str, prompt: str):
+        self.id = job_id
+        self.prompt = prompt
+        self._changed = asyncio.Event()
+
+    def changed(self):
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+class ImageJobQueue:
+    def __init__(self, workers: int = IMAGE_JOB_WORKERS, max_queue: int = IMAGE_JOB_QUEUE_SIZE, generator=None):
+        self.workers = workers
+        self.queue: asyncio.Queue[ImageJob] = asyncio.Queue(maxsize=max_queue)
+        self.generator = generator
+        self.jobs: dict[str, ImageJob] = {}  # 이 워커에서 대기/진행 중인 작업
+        self.running = 0
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self):
+        if self.generator is None:
+            self.generator = load_generator()
+        self._tasks = [asyncio.create_task(self.work()) for _ in range(self.workers)]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # 끝내지 못한 작업은 실패로 기록하여 다른 워커가 합류하지 않고 새로 만들도록 함
+        if self.jobs:
+            try:
+                await self.set_status(list(self.jobs), FAILED, error="Shutdown")
+            except Exception:
+                logger.exception("failed to mark %d unfinished image jobs", len(self.jobs))
+            self.jobs.clear()
+
+    async def find(self, db, key: str) -> ImageJobRow | None:
+        # 같은 프롬프트 + 일기 내용으로 보관 기간 안에 완료되었거나 아직 살아 있는 작업
+        now = datetime.now()
+        result = await db.execute(
+            select(ImageJobRow)
+            .where(
+                ImageJobRow.job_key == key,
+                ImageJobRow.created_at >= now - timedelta(hours=IMAGE_JOB_RETENTION_HOURS),
+                or_(
+                    ImageJobRow.status == DONE,
+                    ImageJobRow.status.in_((QUEUED, RUNNING)) & (ImageJobRow.updated_at >= now - timedelta(seconds=IMAGE_JOB_STALE)),
+                ),
+            )
+            .order_by(ImageJobRow.created_at.desc())
+            .limit(1)
+        )
+        return result.scalars().first()
+
+    async def submit(self, user_id: int, story: str, diary_id: int | None = None) -> dict:
+        prompt = build_prompt(await prompt_cache.get(), story)
+        key = hashlib.sha256(prompt.encode()).hexdigest()
+
+        # 같은 프롬프트 + 일기 내용의 작업이 대기/진행/완료 상태면 (다른 워커의 작업이라도) 새로 생성하지 않고 합류
+        job = None
+        async with SessionLocal() as db:
+            row = await self.find(db, key)
+            if row is None:
+                if self.queue.full():
+                    raise QueueFull()
+                now = datetime.now()
+                row = ImageJobRow(job_id=uuid.uuid4().hex, job_key=key, status=QUEUED, created_at=now, updated_at=now)
+                db.add(row)
+                job = ImageJob(row.job_id, prompt)
+            db.add(ImageJobUser(job_id=row.job_id, user_id=user_id, diary_id=diary_id))
+            await db.commit()
+
+        if job is not None:
+            self.jobs[job.id] = job
+            self.queue.put_nowait(job)
+            return job_dict(row)
+
+        if diary_id is not None and row.status != DONE:
+            # 합류를 기록하기 전에 작업이 끝났다면 생성한 워커가 이 다이어리를 보지 못했으므로 여기서 기록
+            async with SessionLocal() as db:
+                row = await db.get(ImageJobRow, row.job_id)
+        if diary_id is not None and row.status == DONE:
+            await self.save_results(row.digest, [diary_id])
+        return job_dict(row)
+
+    async def get(self, job_id: str, user_id: int) -> dict | None:
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(ImageJobRow).where(
+                    ImageJobRow.job_id == job_id,
+                    select(ImageJobUser.image_job_user_id)
+                    .where(ImageJobUser.job_id == job_id, ImageJobUser.user_id == user_id)
+                    .exists(),
+                )
+            )
+            row = result.scalars().first()
+        return job_dict(row) if row else None
+
+    async def wait_change(self, job_id: str, timeout: float):
+        # 이 워커의 작업이면 상태가 바뀔 때 바로, 아니면 timeout 뒤에 돌아옴 (호출한 쪽에서 DB 를 다시 읽음)
+        job = self.jobs.get(job_id)
+        if job is None:
+            await asyncio.sleep(timeout)
+            return
+        try:
+            await asyncio.wait_for(job._changed.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    async def set_status(self, job_ids: list[str], status: str, **values):
+        async with SessionLocal() as db:
+            await db.execute(
+                update(ImageJobRow)
+                .where(ImageJobRow.job_id.in_(job_ids))
+                .values(status=status, updated_at=datetime.now(), **values)
+            )
+            await db.commit()
+        for job_id in job_ids:
+            if job_id in self.jobs:
+                self.jobs[job_id].changed()
+
+    async def members(self, job_id: str) -> tuple[set[int], set[int]]:
+        # 작업을 요청한 사용자와 결과를 기록할 다이어리
+        async with SessionLocal() as db:
+            rows = (await db.execute(
+                select(ImageJobUser.user_id, ImageJobUser.diary_id).where(ImageJobUser.job_id == job_id)
+            )).all()
+        return {row.user_id for row in rows}, {row.diary_id for row in rows if row.diary_id is not None}
+
+    async def work(self):
+        while True:
+            job = await self.queue.get()
+            self.running += 1
+            try:
+                await self.set_status([job.id], RUNNING)
+                data = await asyncio.wait_for(self.generator.generate(job.prompt), timeout=IMAGE_JOB_TIMEOUT)
+                digest = await image_store.save_bytes(data)
+                _, diaries = await self.members(job.id)
+                await self.save_results(digest, sorted(diaries))
+                await self.set_status([job.id], DONE, digest=digest)
+                # 완료를 기록하기 전에 합류한 다이어리 (이후에 합류한 요청은 submit 에서 직접 기록)
+                users, joined = await self.members(job.id)
+                await self.save_results(digest, sorted(joined - diaries))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.exception("image job %s failed", job.id)
+                try:
+                    await self.set_status([job.id], FAILED, error=type(e).__name__)
+                except Exception:
+                    logger.exception("failed to mark image job %s as failed", job.id)
+            else:
+                # 알림을 보내지 못해도 이미 저장된 결과는 완료 상태로 유지
+                try:
+                    await notify(sorted(users), "image", "그림이 완성되었어요!")
+                except Exception:
+                    logger.exception("image job %s notification failed", job.id)
+            finally:
+                self.running -= 1
+                self.jobs.pop(job.id, None)
+                job.changed()
+                self.queue.task_done()
+
+    async def save_results(self, digest: str, diary_ids: list[int]):
+        # 생성된 이미지는 사용자가 고르기 전까지 임시(is_temp) 후보로 기록
+        # (일기를 이 이미지 주소로 저장하면 set_image 가 대표 이미지로 기록함)
+        if not diary_ids:
+            return
+        now = datetime.now()
+        async with SessionLocal() as db:
+            await db.execute(
+                update(Image).where(Image.diary_id.in_(diary_ids), Image.is_temp == True, Image.is_deleted == False).values(is_deleted=True)
+            )
+            db.add_all(
+                Image(diary_id=diary_id, image_url=image_url(digest), created_at=now, is_temp=True, is_active=False, is_deleted=False)
+                for diary_id in diary_ids
+            )
+            await db.commit()
+
+    def stats(self) -> dict:
+        return {"queued": self.queue.qsize(), "running": self.running, "jobs": len(self.jobs)}
+
+
+async def purge_image_jobs() -> int:
+    # 보관 시간이 지난 작업 정리 (토큰 정리와 같이 락을 잡은 워커에서 주기적으로 실행)
+    cutoff = datetime.now() - timedelta(hours=IMAGE_JOB_RETENTION_HOURS)
+    async with SessionLocal() as db:
+        job_ids = select(ImageJobRow.job_id).where(ImageJobRow.created_at < cutoff).scalar_subquery()
+        await db.execute(delete(ImageJobUser).where(ImageJobUser.job_id.in_(job_ids)))
+        result = await db.execute(delete(ImageJobRow).where(ImageJobRow.created_at < cutoff))
+        await db.commit()
+    return result.rowcount
+
+
+image_jobs = ImageJobQueue()
@@ -0,0 +1,141 @@
+# 콘텐츠 주소 기반 이미지 저장소
+# 파일을 내용의 sha256 해시 이름으로 저장하여 같은 이미지는 한 번만 저장(중복 제거)하고,
+# 목록/캘린더용 썸네일은 업로드 시점에 미리 만들어 둠
+import base64
+import hashlib
+import os
+import uuid
+from io import BytesIO
+
+import anyio
+from PIL import Image as PILImage
+
+IMAGE_STORE_DIR = os.getenv("IMAGE_STORE_DIR", "data/images")
+IMAGE_MAX_BYTES = int(os.getenv("IMAGE_MAX_BYTES", 10 * 1024 * 1024))  # 업로드 최대 크기
+IMAGE_THUMB_SIZE = int(os.getenv("IMAGE_THUMB_SIZE", 320))  # 썸네일 최대 가로/세로(px)
+IMAGE_URL_PREFIX = "/api/v1/images"
+
+# 파일 앞부분(매직 넘버)으로 판별하는 이미지 형식
+MAGIC_TYPES = (
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+)
+
+
+class ImageTooLarge(Exception):
+    pass
+
+
+class InvalidImage(Exception):
+    pass
+
+
+def detect_type(head: bytes) -> str | None:
+    for magic, content_type in MAGIC_TYPES:
+        if head.startswith(magic):
+            return content_type
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    return None
+
+
+def is_digest(value: str) -> bool:
+    return len(value) == 64 and all(c in "0123456789abcdef" for c in value)
+
+
+def image_url(digest: str) -> str:
+    return f"{IMAGE_URL_PREFIX}/{digest}"
+
+
+def thumbnail_url(digest: str) -> str:
+    return f"{IMAGE_URL_PREFIX}/{digest}/thumb"
+
+
+def digest_from_url(url: str | None) -> str | None:
+    # 저장소 주소("/api/v1/images/<hash>", ".../thumb")에서 해시를 추출
+    if not url or not url.startswith(IMAGE_URL_PREFIX + "/"):
+        return None
+    digest = url[len(IMAGE_URL_PREFIX) + 1:].split("/")[0]
+    return digest if is_digest(digest) else None
+
+
+class ImageStore:
+    def __init__(self, root: str = IMAGE_STORE_DIR):
+        self.root = root
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], digest)
+
+    def thumb_path(self, digest: str) -> str:
+        return os.path.join(self.root, digest[:2], f"{digest}.thumb.jpg")
+
+    async def save_stream(self, chunks) -> str:
+        # 업로드를 임시 파일로 스트리밍하면서 해시를 계산한 뒤 해시 이름으로 옮김
+        os.makedirs(self.root, exist_ok=True)
+        tmp_path = os.path.join(self.root, f".upload-{uuid.uuid4().hex}")
+        sha = hashlib.sha256()
+        size = 0
+        head = b""
+        try:
+            async with await anyio.open_file(tmp_path, "wb") as f:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    if size > IMAGE_MAX_BYTES:
+                        raise ImageTooLarge()
+                    if len(head) < 12:
+                        head += chunk[:12]
+                    sha.update(chunk)
+                    await f.write(chunk)
+
+            if not detect_type(head):
+                raise InvalidImage()
+
+            digest = sha.hexdigest()
+            path = self.path(digest)
+            if os.path.exists(path):
+                return digest  # 이미 저장된 이미지 (중복 제거)
+
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # 썸네일을 먼저 만들어 디코딩할 수 없는 파일은 저장소에 들어가지 않도록 함
+            await anyio.to_thread.run_sync(self.make_thumbnail, tmp_path, digest)
+            os.replace(tmp_path, path)
+            return digest
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    async def save_bytes(self, data: bytes) -> str:
+        async def chunks():
+            yield data
+
+        return await self.save_stream(chunks())
+
+    async def save_data_url(self, data_url: str) -> str:
+        # 기존 클라이언트가 보내는 "data:image/jpeg;base64,..." 형식 지원
+        try:
+            data = base64.b64decode(data_url.split(",", 1)[1], validate=True)
+        except (IndexError, ValueError):
+            raise InvalidImage()
+        return await self.save_bytes(data)
+
+    def make_thumbnail(self, source: str, digest: str):
+        # CPU 를 사용하는 작업이므로 스레드에서 실행
+        thumb_path = self.thumb_path(digest)
+        if os.path.exists(thumb_path):
+            return
+        try:
+            with PILImage.open(source) as img:
+                img.thumbnail((IMAGE_THUMB_SIZE, IMAGE_THUMB_SIZE))
+                buffer = BytesIO()
+                img.convert("RGB").save(buffer, "JPEG", quality=80, optimize=True)
+        except (OSError, PILImage.DecompressionBombError):
+            raise InvalidImage()
+        tmp_path = f"{thumb_path}.{uuid.uuid4().hex}"
+        with open(tmp_path, "wb") as f:
+            f.write(buffer.getvalue())
+        os.replace(tmp_path, thumb_path)
+
+
+image_store = ImageStore()
@@ -0,0 +1,158 @@
+# 카카오 API 게이트웨이
+# 앱이 살아있는 동안 하나의 httpx.AsyncClient 를 재사용하여
+# 로그인/로그아웃마다 TCP+TLS 연결을 새로 맺지 않도록 함
+import asyncio
+import os
+import random
+import time
+
+import httpx
+from fastapi import HTTPException
+
+from .metrics import metrics
+
+# 로컬 스텁 서버로 교체할 수 있도록 호스트를 환경 변수로 설정
+KAKAO_AUTH_HOST = os.getenv("KAKAO_AUTH_HOST", "https://kauth.kakao.com")
+KAKAO_API_HOST = os.getenv("KAKAO_API_HOST", "https://kapi.kakao.com")
+
+KAKAO_TIMEOUT = float(os.getenv("KAKAO_TIMEOUT", 3.0))  # 요청별 전체 타임아웃(초)
+KAKAO_CONNECT_TIMEOUT = float(os.getenv("KAKAO_CONNECT_TIMEOUT", 1.0))  # 연결 타임아웃(초)
+KAKAO_MAX_CONNECTIONS = int(os.getenv("KAKAO_MAX_CONNECTIONS", 100))
+KAKAO_MAX_KEEPALIVE = int(os.getenv("KAKAO_MAX_KEEPALIVE", 20))
+KAKAO_RETRIES = int(os.getenv("KAKAO_RETRIES", 2))  # 첫 요청 이후 재시도 횟수
+KAKAO_BACKOFF = float(os.getenv("KAKAO_BACKOFF", 0.1))  # 재시도 기본 대기 시간(초)
+KAKAO_BREAKER_THRESHOLD = int(os.getenv("KAKAO_BREAKER_THRESHOLD", 5))  # 연속 실패 허용 횟수
+KAKAO_BREAKER_COOLDOWN = float(os.getenv("KAKAO_BREAKER_COOLDOWN", 30.0))  # 차단 유지 시간(초)
+
+
+class CircuitBreaker:
+    # 연속 실패가 threshold 에 도달하면 cooldown 동안 요청을 바로 거절하고,
+    # cooldown 이 지나면 한 번의 시험 요청(half-open)만 허용 (결과가 나올 때까지 다른 요청은 계속 거절)
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+        self.probe_at: float | None = None  # 시험 요청을 보낸 시각
+
+    @property
+    def is_open(self) -> bool:
+        return self.opened_at is not None
+
+    def allow(self) -> bool:
+        if self.opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self.opened_at < self.cooldown:
+            return False
+        # 시험 요청이 취소되어 결과가 기록되지 않은 경우에 대비해 cooldown 이 지나면 다시 시험 요청을 허용
+        if self.probe_at is not None and now - self.probe_at < self.cooldown:
+            return False
+        self.probe_at = now
+        return True
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.probe_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        if self.probe_at is not None or self.failures >= self.threshold:
+            # 시험 요청이 실패하면 바로 다시 열림
+            self.opened_at = time.monotonic()
+            self.probe_at = None
+
+
+class KakaoGateway:
+    def __init__(self, client: httpx.AsyncClient | None = None):
+        self.client = client
+        self.breaker = CircuitBreaker(KAKAO_BREAKER_THRESHOLD, KAKAO_BREAKER_COOLDOWN)
+
+    async def start(self):
+        if self.client is None:
+            self.client = httpx.AsyncClient(
+                timeout=httpx.Timeout(KAKAO_TIMEOUT, connect=KAKAO_CONNECT_TIMEOUT),
+                limits=httpx.Limits(
+                    max_connections=KAKAO_MAX_CONNECTIONS,
+                    max_keepalive_connections=KAKAO_MAX_KEEPALIVE,
+                ),
+            )
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+            self.client = None
+
+    async def _request(self, method: str, url: str, idempotent: bool, **kwargs) -> httpx.Response:
+        if self.client is None:
+            await self.start()
+        # 호출마다 한 번만 확인 (재시도는 이 호출이 차단기를 열면 멈춤)
+        if not self.breaker.allow():
+            raise HTTPException(status_code=503, detail="카카오 서버 응답이 없어 잠시 요청을 중단했습니다.")
+
+        endpoint = httpx.URL(url).path
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = await self.client.request(method, url, **kwargs)
+            except httpx.TransportError as e:
+                metrics.observe_kakao(endpoint, "error", time.perf_counter() - start)
+                # 연결 자체가 실패한 경우는 요청이 전송되지 않았으므로 POST 도 재시도 가능
+                retryable = idempotent or isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout))
+                self.breaker.record_failure()
+                if not retryable or attempt >= KAKAO_RETRIES or self.breaker.is_open:
+                    raise HTTPException(status_code=503, detail="카카오 서버에 연결할 수 없습니다.")
+            else:
+                metrics.observe_kakao(endpoint, str(response.status_code), time.perf_counter() - start)
+                if response.status_code < 500:
+                    self.breaker.record_success()
+                    return response
+                self.breaker.record_failure()
+                if not idempotent or attempt >= KAKAO_RETRIES or self.breaker.is_open:
+                    return response
+
+            # 지수 백오프 + full jitter
+            await asyncio.sleep(random.uniform(0, KAKAO_BACKOFF * (2 ** attempt)))
+            attempt += 1
+
+    async def get_token(self, code: str, client_id: str, redirect_uri: str) -> httpx.Response:
+        # 인가 코드는 한 번만 사용할 수 있으므로 응답을 받은 뒤에는 재시도하지 않음
+        return await self._request(
+            "POST",
+            f"{KAKAO_AUTH_HOST}/oauth/token",
+            idempotent=False,
+            headers={"Content-Type": "application/x-www-form-urlencoded"},
+            data={
+                "grant_type": "authorization_code",
+                "client_id": client_id,
+                "redirect_uri": redirect_uri,
+                "code": code,
+            },
+        )
+
+    async def get_user_info(self, access_token: str) -> httpx.Response:
+        return await self._request(
+            "GET",
+            f"{KAKAO_API_HOST}/v2/user/me",
+            idempotent=True,
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+
+    async def unlink(self, access_token: str) -> httpx.Response:
+        # 연결 끊기는 여러 번 호출해도 결과가 같으므로 재시도 가능
+        return await self._request(
+            "POST",
+            f"{KAKAO_API_HOST}/v1/user/unlink",
+            idempotent=True,
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+
+
+# 앱 전체에서 공유하는 게이트웨이 (lifespan 에서 start/close)
+kakao = KakaoGateway()
+
+
+def get_kakao() -> KakaoGateway:
+    return kakao
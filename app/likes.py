@@ -0,0 +1,117 @@
+# 좋아요(bookmark) 상태
+# 목록 화면에서 하트를 연달아 누르면 한 건씩 조회 + UPDATE 가 반복되므로
+# 사용자별로 좋아요한 diary_id 집합을 처음 필요할 때 (user_id, like, is_deleted, created_at) 인덱스만 읽어 보관하고,
+# 토글할 때는 행을 읽지 않고 이 집합으로 현재 상태를 판단해 조건부 UPDATE 한 번으로 바꿈
+# (캐시는 워커 프로세스별이므로 다른 워커에서 바뀐 상태는 조건부 UPDATE 가 실패하면 행을 다시 읽어 바로잡고,
+#  그 밖에는 최대 LIKE_CACHE_TTL 초 뒤에 반영됨)
+import os
+import time
+from collections import OrderedDict
+
+from sqlalchemy import select, update
+
+from .models import Diary
+
+LIKE_CACHE_SIZE = int(os.getenv("LIKE_CACHE_SIZE", 10000))  # 보관할 사용자 수
+LIKE_CACHE_TTL = float(os.getenv("LIKE_CACHE_TTL", 300))  # 캐시 유지 시간(초)
+LIKE_BATCH_MAX = int(os.getenv("LIKE_BATCH_MAX", 100))  # 한 번에 바꿀 수 있는 일기 수
+
+
+class LikedIds:
+    def __init__(self, maxsize: int = LIKE_CACHE_SIZE, ttl: float = LIKE_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[int, tuple[set[int], float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, db, user_id: int) -> set[int]:
+        entry = self._entries.get(user_id)
+        if entry is not None and entry[1] > time.monotonic():
+            self._entries.move_to_end(user_id)
+            self.hits += 1
+            return entry[0]
+        self.misses += 1
+        # 인덱스에 diary_id(기본 키)가 함께 들어 있으므로 테이블 행을 읽지 않음
+        result = await db.execute(
+            select(Diary.diary_id).where(Diary.user_id == user_id, Diary.like == True, Diary.is_deleted == False)
+        )
+        ids = set(result.scalars())
+        self._entries[user_id] = (ids, time.monotonic() + self.ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return ids
+
+    def apply(self, user_id: int, changes: dict[int, bool]):
+        # 커밋한 변경을 보관 중인 집합에 반영 (보관하지 않은 사용자는 다음 조회 때 읽음)
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return
+        for diary_id, bookmark in changes.items():
+            if bookmark:
+                entry[0].add(diary_id)
+            else:
+                entry[0].discard(diary_id)
+
+    def discard(self, user_id: int):
+        self._entries.pop(user_id, None)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+liked_ids = LikedIds()
+
+
+async def set_likes(db, user_id: int, changes: dict[int, bool]) -> tuple[dict[int, bool], list[int], int]:
+    # {diary_id: 바꿀 상태} 를 한 트랜잭션으로 반영 (커밋은 호출한 쪽에서)
+    # 상태가 이미 같은 일기는 쓰지 않고, 바꿀 일기는 상태별로 UPDATE 한 번씩만 실행
+    # -> (있는 일기의 최종 상태, 없거나 삭제된 diary_id, 실제로 바뀐 일기 수)
+    result = await db.execute(
+        select(Diary.diary_id, Diary.like).where(
+            Diary.user_id == user_id, Diary.is_deleted == False, Diary.diary_id.in_(changes)
+        )
+    )
+    current = {diary_id: bool(like) for diary_id, like in result}
+    changed = 0
+    for bookmark in (True, False):
+        ids = [diary_id for diary_id, value in changes.items() if value == bookmark and current.get(diary_id, bookmark) != bookmark]
+        if ids:
+            changed += len(ids)
+            await db.execute(
+                update(Diary)
+                .where(Diary.user_id == user_id, Diary.is_deleted == False, Diary.diary_id.in_(ids))
+                .values(like=bookmark)
+            )
+    states = {diary_id: changes[diary_id] for diary_id in current}
+    return states, [diary_id for diary_id in changes if diary_id not in current], changed
+
+
+async def toggle_like(db, user_id: int, diary_id: int) -> bool | None:
+    # 좋아요 한 건 토글 (커밋은 호출한 쪽에서) -> 바뀐 상태, 없는 일기면 None
+    bookmark = diary_id not in await liked_ids.get(db, user_id)
+    result = await db.execute(
+        update(Diary)
+        .where(Diary.diary_id == diary_id, Diary.user_id == user_id, Diary.is_deleted == False, Diary.like == (not bookmark))
+        .values(like=bookmark)
+    )
+    if result.rowcount:
+        return bookmark
+
+    # 없는 일기이거나 다른 워커에서 이미 바뀌어 집합이 오래된 경우 : 행을 읽어 판단
+    liked_ids.discard(user_id)
+    like = (await db.execute(
+        select(Diary.like).where(Diary.diary_id == diary_id, Diary.user_id == user_id, Diary.is_deleted == False)
+    )).first()
+    if like is None:
+        return None
+    bookmark = not like[0]
+    await db.execute(update(Diary).where(Diary.diary_id == diary_id).values(like=bookmark))
+    return bookmark
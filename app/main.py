@@ -1,15 +1,77 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import time
 from fastapi import FastAPI, Request
-from .database import engine, Base
-from .models import *  # 모델을 임포트하여 테이블을 생성하도록 함
+from fastapi.responses import JSONResponse, ORJSONResponse, PlainTextResponse
+from .archive import ARCHIVE_TIME, run_archive
+from .database import REPLICA_CHECK_INTERVAL, PrimaryPinMiddleware, check_replica, dispose_engines, engine, is_db_ready, warm_up
+from .image_jobs import IMAGE_JOB_PURGE_INTERVAL, image_jobs, purge_image_jobs
+from .kakao import kakao
+from .likes import liked_ids
+from .metrics import MetricsMiddleware, metrics
+from .nicknames import NICKNAME_FILTER_REFRESH, nicknames
+from .notifications import REMINDER_TIME, hub, send_reminders
+from .rate_limit import RateLimitMiddleware, limiter
+from .response_cache import response_cache
+from .tasks import TOKEN_PURGE_INTERVAL, job_lock, purge_expired_tokens, run_daily, run_periodically, run_with_lock
+from .temp_buffer import temp_buffer
+from .user_settings import settings_cache
 from fastapi.middleware.cors import CORSMiddleware
 
+from .api.auth import token_cache
+from .api.v1 import V1
 
-# DB 테이블을 생성
-Base.metadata.create_all(bind=engine) 
 
-from .api.v1 import V1
+def start_singleton_jobs() -> list[asyncio.Task]:
+    # 만료된 토큰 정리 작업
+    tasks = [asyncio.create_task(run_periodically(purge_expired_tokens, TOKEN_PURGE_INTERVAL))]
+    # 보관 시간이 지난 이미지 생성 작업 정리
+    tasks.append(asyncio.create_task(run_periodically(purge_image_jobs, IMAGE_JOB_PURGE_INTERVAL)))
+    # 매일 일기 작성 알림 (REMINDER_TIME 을 설정한 경우)
+    if REMINDER_TIME:
+        tasks.append(asyncio.create_task(run_daily(send_reminders, time.fromisoformat(REMINDER_TIME))))
+    # 매일 삭제/방치된 행을 보관 테이블로 이동 (ARCHIVE_TIME 을 비우면 실행하지 않음)
+    if ARCHIVE_TIME:
+        tasks.append(asyncio.create_task(run_daily(run_archive, time.fromisoformat(ARCHIVE_TIME))))
+    return tasks
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # 스키마는 alembic 마이그레이션으로 관리 (alembic upgrade head)
+    # 워커 시작 시에는 커넥션 풀만 미리 채움
+    await warm_up()
+    # 카카오 API 클라이언트는 앱이 살아있는 동안 하나만 사용
+    await kakao.start()
+    # 토큰 정리/알림/보관 작업은 락을 잡은 워커 하나에서만 실행
+    jobs_task = asyncio.create_task(run_with_lock(job_lock, start_singleton_jobs))
+    # 임시 저장 write-behind 버퍼
+    temp_task = asyncio.create_task(temp_buffer.run())
+    # 읽기 전용 복제본 상태 확인 (장애 시 기본 DB 로 전환)
+    replica_task = asyncio.create_task(run_periodically(check_replica, REPLICA_CHECK_INTERVAL))
+    # 닉네임 필터 (처음 만들어지기 전까지는 모든 확인을 DB 로 보내므로 시작을 기다리지 않음)
+    nickname_task = asyncio.create_task(run_periodically(nicknames.refresh, NICKNAME_FILTER_REFRESH))
+    # 다른 워커에서 발송한 알림도 이 워커의 SSE 스트림에 전달
+    notify_task = asyncio.create_task(hub.run())
+    # 이미지 생성 워커
+    image_jobs.start()
+    app.state.ready = True
+    yield
+    app.state.ready = False
+    tasks = [jobs_task, temp_task, replica_task, nickname_task, notify_task]
+    for task in tasks:
+        task.cancel()
+    # 취소가 끝날 때까지 기다림 (진행 중이던 flush 가 버퍼를 되돌린 뒤에 마지막 flush 를 실행해야 함)
+    await asyncio.gather(*tasks, return_exceptions=True)
+    await image_jobs.stop()
+    await temp_buffer.flush()  # 종료 전에 남은 임시 저장 내용 기록
+    await kakao.close()
+    await dispose_engines()  # 처리 중인 요청이 끝난 뒤이므로 커넥션 풀을 닫음
 
-app = FastAPI()
+
+# dict 를 반환하는 라우트도 orjson 으로 직렬화
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
+app.state.ready = False
 app.include_router(V1)
 
 # CORS 설정
@@ -21,6 +83,60 @@ app.add_middleware(
     allow_headers=["*"],  # 허용할 헤더
 )
 
+# 쓰기 직후의 조회는 다른 워커에서 처리되더라도 기본 DB 에서 읽도록 쿠키로 고정
+app.add_middleware(PrimaryPinMiddleware)
+
+# 사용자/IP 별 속도 제한과 동시 요청 수 제한 (DB 커넥션 풀에 요청이 쌓이기 전에 거절)
+app.add_middleware(RateLimitMiddleware)
+
+# 요청별 지연 시간/쿼리 수 계측 (가장 바깥에서 전체 처리 시간을 측정)
+app.add_middleware(MetricsMiddleware)
+
+# /metrics 에 함께 노출할 캐시/버퍼/커넥션 풀 상태
+metrics.extra.update({
+    "token_cache_size": lambda: token_cache.stats()["size"],
+    "token_cache_hits_total": lambda: token_cache.hits,
+    "token_cache_misses_total": lambda: token_cache.misses,
+    "settings_cache_size": lambda: settings_cache.stats()["size"],
+    "settings_cache_hits_total": lambda: settings_cache.hits,
+    "settings_cache_misses_total": lambda: settings_cache.misses,
+    "liked_ids_cache_size": lambda: liked_ids.stats()["size"],
+    "liked_ids_cache_hits_total": lambda: liked_ids.hits,
+    "liked_ids_cache_misses_total": lambda: liked_ids.misses,
+    "response_cache_size": lambda: response_cache.stats()["size"],
+    "response_cache_hits_total": lambda: response_cache.hits,
+    "response_cache_misses_total": lambda: response_cache.misses,
+    "temp_buffer_pending": lambda: len(temp_buffer.pending),
+    "temp_buffer_writes_total": lambda: temp_buffer.writes,
+    "temp_buffer_flushed_total": lambda: temp_buffer.flushed,
+    "temp_buffer_dropped_total": lambda: temp_buffer.dropped,
+    "notification_stream_connections": lambda: hub.stats()["connections"],
+    "image_job_queue_depth": lambda: image_jobs.queue.qsize(),
+    "image_jobs_running": lambda: image_jobs.running,
+    "nickname_filter_items": lambda: nicknames.stats()["items"],
+    "nickname_checks_total": lambda: nicknames.checks,
+    "nickname_db_checks_total": lambda: nicknames.db_checks,
+    "rate_limited_total": lambda: limiter.limited,
+    "load_shed_total": lambda: limiter.shed,
+    "requests_waiting_for_slot": lambda: limiter.waiting,
+    "background_jobs_leader": lambda: int(job_lock.held),
+    "db_pool_checked_out": lambda: getattr(engine.pool, "checkedout", lambda: 0)(),
+})
+
 @app.get("/")
 def read_root():
     return {"DDRAWRY": "This is ddrawry's API server"}
+
+
+# 로드밸런서/오케스트레이터용 준비 상태 확인
+@app.get("/ready")
+async def readiness():
+    if not app.state.ready or not await is_db_ready():
+        return JSONResponse(status_code=503, content={"status": 503, "message": "not ready"})
+    return {"status": 200, "message": "ready"}
+
+
+# Prometheus 수집용 지표
+@app.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
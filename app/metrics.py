@@ -0,0 +1,185 @@
+# 요청별 성능 계측
+# 라우트 템플릿별 지연 시간 히스토그램, 처리 중 요청 수, 상태 코드별 카운트와
+# 요청마다 실행된 쿼리 수/DB 시간, 카카오 API 호출 시간을 모아 Prometheus 텍스트 형식으로 노출
+# (프로세스 단위 집계이므로 워커가 여러 개면 워커별로 따로 수집됨)
+import logging
+import os
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+
+logger = logging.getLogger(__name__)
+
+METRICS_SERVER_TIMING = os.getenv("METRICS_SERVER_TIMING", "false").lower() == "true"  # Server-Timing 헤더 추가 여부
+N_PLUS_ONE_THRESHOLD = int(os.getenv("N_PLUS_ONE_THRESHOLD", 5))  # 한 요청에서 같은 쿼리가 이 횟수 이상이면 N+1 로 판단
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts: dict[tuple, list[int]] = defaultdict(lambda: [0] * len(buckets))
+        self.sums: dict[tuple, float] = defaultdict(float)
+        self.totals: dict[tuple, int] = defaultdict(int)
+
+    def observe(self, labels: tuple, value: float):
+        counts = self.counts[labels]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                counts[i] += 1
+        self.sums[labels] += value
+        self.totals[labels] += 1
+
+    def render(self, name: str, label_names: tuple) -> list[str]:
+        lines = []
+        for labels, counts in sorted(self.counts.items()):
+            base = format_labels(label_names, labels)
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f'{name}_bucket{{{base}{"," if base else ""}le="{bound}"}} {count}')
+            lines.append(f'{name}_bucket{{{base}{"," if base else ""}le="+Inf"}} {self.totals[labels]}')
+            lines.append(f"{name}_sum{{{base}}} {self.sums[labels]}")
+            lines.append(f"{name}_count{{{base}}} {self.totals[labels]}")
+        return lines
+
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def format_labels(names: tuple, values: tuple) -> str:
+    return ",".join(f'{name}="{escape(value)}"' for name, value in zip(names, values))
+
+
+class RequestStats:
+    # 요청 하나 동안 쌓이는 DB/외부 호출 통계
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.kakao_time = 0.0
+        self.statements: Counter[str] = Counter()
+
+
+# 현재 처리 중인 요청의 통계 (백그라운드 작업에서는 None)
+current_request: ContextVar[RequestStats | None] = ContextVar("current_request", default=None)
+
+
+class Metrics:
+    def __init__(self):
+        self.request_latency = Histogram(LATENCY_BUCKETS)  # (method, route)
+        self.request_queries = Histogram(QUERY_COUNT_BUCKETS)  # (method, route)
+        self.request_db_time = Histogram(LATENCY_BUCKETS)  # (method, route)
+        self.kakao_latency = Histogram(LATENCY_BUCKETS)  # (endpoint, status)
+        self.responses: Counter[tuple] = Counter()  # (method, route, status)
+        self.n_plus_one: Counter[tuple] = Counter()  # (method, route)
+        self.in_flight = 0
+        self.queries = 0
+        self.db_time = 0.0
+        # /metrics 에 함께 노출할 추가 지표 (이름 → 값을 돌려주는 함수, _total 로 끝나면 counter)
+        self.extra: dict[str, callable] = {}
+
+    # SQLAlchemy 엔진 이벤트 (database.py 에서 등록)
+    # 시작 시각은 실행 컨텍스트에 기록 (오류로 after 가 호출되지 않아도 다음 쿼리의 시간이 어긋나지 않음)
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context._query_start = time.perf_counter()
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        start = getattr(context, "_query_start", None)
+        if start is None:
+            return
+        elapsed = time.perf_counter() - start
+        self.queries += 1
+        self.db_time += elapsed
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_time += elapsed
+            stats.statements[statement] += 1
+
+    def observe_kakao(self, endpoint: str, status: str, elapsed: float):
+        self.kakao_latency.observe((endpoint, status), elapsed)
+        stats = current_request.get()
+        if stats is not None:
+            stats.kakao_time += elapsed
+
+    def observe_request(self, method: str, route: str, status: int, elapsed: float, stats: RequestStats):
+        self.request_latency.observe((method, route), elapsed)
+        self.request_queries.observe((method, route), stats.queries)
+        self.request_db_time.observe((method, route), stats.db_time)
+        self.responses[(method, route, status)] += 1
+
+        # 같은 SQL 이 반복 실행되면 N+1 패턴으로 기록
+        if stats.statements:
+            statement, count = stats.statements.most_common(1)[0]
+            if count >= N_PLUS_ONE_THRESHOLD:
+                self.n_plus_one[(method, route)] += 1
+                logger.warning("possible N+1 in %s %s: %d x %s", method, route, count, " ".join(statement.split())[:200])
+
+    def render(self) -> str:
+        lines = [
+            "# TYPE http_request_duration_seconds histogram",
+            *self.request_latency.render("http_request_duration_seconds", ("method", "route")),
+            "# TYPE http_requests_total counter",
+            *(f"http_requests_total{{{format_labels(('method', 'route', 'status'), key)}}} {value}" for key, value in sorted(self.responses.items())),
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {self.in_flight}",
+            "# TYPE db_queries_per_request histogram",
+            *self.request_queries.render("db_queries_per_request", ("method", "route")),
+            "# TYPE db_time_per_request_seconds histogram",
+            *self.request_db_time.render("db_time_per_request_seconds", ("method", "route")),
+            "# TYPE db_n_plus_one_total counter",
+            *(f"db_n_plus_one_total{{{format_labels(('method', 'route'), key)}}} {value}" for key, value in sorted(self.n_plus_one.items())),
+            "# TYPE db_queries_total counter",
+            f"db_queries_total {self.queries}",
+            "# TYPE db_query_seconds_total counter",
+            f"db_query_seconds_total {self.db_time}",
+            "# TYPE kakao_request_duration_seconds histogram",
+            *self.kakao_latency.render("kakao_request_duration_seconds", ("endpoint", "status")),
+        ]
+        for name, read in self.extra.items():
+            lines.append(f"# TYPE {name} {'counter' if name.endswith('_total') else 'gauge'}")
+            lines.append(f"{name} {read()}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+
+
+class MetricsMiddleware:
+    # BaseHTTPMiddleware 대신 순수 ASGI 미들웨어로 구현하여 스트리밍 응답(이미지)도 그대로 통과시킴
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats()
+        token = current_request.set(stats)
+        start = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if METRICS_SERVER_TIMING:
+                    total = (time.perf_counter() - start) * 1000
+                    timing = f'app;dur={total:.1f}, db;dur={stats.db_time * 1000:.1f};desc="{stats.queries} queries"'
+                    if stats.kakao_time:
+                        timing += f", kakao;dur={stats.kakao_time * 1000:.1f}"
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", timing.encode())]}
+            await send(message)
+
+        metrics.in_flight += 1
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.in_flight -= 1
+            current_request.reset(token)
+            # 실제 경로 대신 라우트 템플릿(/api/v1/diaries/{id})으로 집계하여 라벨 수가 늘어나지 않도록 함
+            route = scope.get("route")
+            route = route.path if route is not None else "unmatched"
+            metrics.observe_request(scope["method"], route, status, time.perf_counter() - start, stats)
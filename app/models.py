@@ -1,7 +1,5 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, TIMESTAMP, Text, Boolean
-from sqlalchemy.ext.declarative import declarative_base
-
-Base = declarative_base()
+from sqlalchemy import Column, Integer, String, ForeignKey, TIMESTAMP, Text, Boolean, Index, Date
+from .database import Base  # 모든 모델이 하나의 메타데이터를 공유하도록 database.py 의 Base 사용
 
 class User(Base):
     __tablename__ = 'user'
@@ -13,6 +11,13 @@ class User(Base):
     updated_at = Column(TIMESTAMP, nullable=True)
     last_login = Column(TIMESTAMP, nullable=True)
 
+    __table_args__ = (
+        # 닉네임 중복을 DB 에서 막고, 사용 가능 여부를 인덱스로만 확인
+        Index('ux_user_nickname', 'nickname', unique=True),
+        # 다른 워커에서 바뀐 닉네임을 닉네임 필터에 반영할 때 사용
+        Index('ix_user_updated_at', 'updated_at'),
+    )
+
 class Token(Base):
     __tablename__ = 'token'
     
@@ -22,6 +27,13 @@ class Token(Base):
     created_at = Column(TIMESTAMP, nullable=True)
     expires_at = Column(TIMESTAMP, nullable=True)
 
+    __table_args__ = (
+        # 로그아웃 시 사용자의 유효한(expires_at IS NULL) 최신 토큰 조회용
+        Index('ix_token_user_expires_created', 'user_id', 'expires_at', 'created_at'),
+        # 만료 토큰 정리 작업용
+        Index('ix_token_expires_at', 'expires_at'),
+    )
+
 class Diary(Base):
     __tablename__ = 'diary'
     
@@ -31,10 +43,40 @@ class Diary(Base):
     content = Column(Text, nullable=True)
     weather = Column(Integer, nullable=True)
     emotion = Column(Integer, nullable=True)
+    diary_date = Column(Date, nullable=True)  # 일기의 날짜 (작성 시각과 다를 수 있음)
+    thumbnail_url = Column(String(255), nullable=True)  # 목록/캘린더용 대표 이미지 주소
     created_at = Column(TIMESTAMP, nullable=True)
     updated_at = Column(TIMESTAMP, nullable=True)
-    is_deleted = Column(Boolean, nullable=True)
-    like = Column(Boolean, nullable=True)
+    is_deleted = Column(Boolean, nullable=True, default=False)
+    like = Column(Boolean, nullable=True, default=False)
+
+    __table_args__ = (
+        # 월별 캘린더/목록 조회용 : 삭제되지 않은 행(is_deleted = false)의 날짜 구간을 연속으로 읽음
+        # MySQL 은 부분 인덱스를 지원하지 않으므로 is_deleted 를 날짜 앞에 둠
+        Index('ix_diary_user_deleted_date', 'user_id', 'is_deleted', 'diary_date'),
+        # 목록 커서 페이지네이션용 : (created_at, diary_id) 순서로 사용자의 구간을 읽음
+        Index('ix_diary_user_deleted_created', 'user_id', 'is_deleted', 'created_at'),
+        # 좋아요 목록/좋아요한 id 집합용 : 좋아요한 행만 (created_at, diary_id) 순서로 읽음
+        Index('ix_diary_user_like_created', 'user_id', 'like', 'is_deleted', 'created_at'),
+        # 한국어 전문 검색용 ngram FULLTEXT 인덱스 (MySQL 전용)
+        Index('ft_diary_title_content', 'title', 'content', mysql_prefix='FULLTEXT', mysql_with_parser='ngram').ddl_if(dialect='mysql'),
+    )
+
+class DiaryStat(Base):
+    __tablename__ = 'diary_stat'
+
+    # 사용자/월별 기분·날씨 개수 (일기 작성/수정/삭제 시 증감하여 유지하는 집계 테이블)
+    stat_id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, ForeignKey('user.user_id'), nullable=False)
+    month = Column(Date, nullable=False)  # 해당 월의 1일
+    kind = Column(String(20), nullable=False)  # 'mood' 또는 'weather'
+    value = Column(Integer, nullable=False)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        # 증감 upsert 대상 키이자 연간 통계 조회 구간 (한 해 최대 12개월 x 12개 값)
+        Index('ux_diary_stat_user_month_kind_value', 'user_id', 'month', 'kind', 'value', unique=True),
+    )
 
 class Image(Base):
     __tablename__ = 'image'
@@ -47,6 +89,38 @@ class Image(Base):
     is_active = Column(Boolean, nullable=True)
     is_deleted = Column(Boolean, nullable=True)
 
+# 이미지 생성 작업 : 어느 워커가 받은 요청이든 상태 조회/중복 제거가 되도록 DB 에 기록 (app/image_jobs.py 참고)
+class ImageJob(Base):
+    __tablename__ = 'image_job'
+
+    job_id = Column(String(32), primary_key=True)
+    job_key = Column(String(64), nullable=False)  # (프롬프트, 일기 내용) 해시
+    status = Column(String(10), nullable=False)
+    digest = Column(String(64), nullable=True)  # 생성된 이미지의 저장소 해시
+    error = Column(String(100), nullable=True)
+    created_at = Column(TIMESTAMP, nullable=True)
+    updated_at = Column(TIMESTAMP, nullable=True)
+
+    __table_args__ = (
+        # 같은 프롬프트 + 일기 내용의 최근 작업 조회용
+        Index('ix_image_job_key_created', 'job_key', 'created_at'),
+        # 보관 기간이 지난 작업 정리용
+        Index('ix_image_job_created_at', 'created_at'),
+    )
+
+class ImageJobUser(Base):
+    __tablename__ = 'image_job_user'
+
+    image_job_user_id = Column(Integer, primary_key=True)
+    job_id = Column(String(32), ForeignKey('image_job.job_id'), nullable=False)
+    user_id = Column(Integer, ForeignKey('user.user_id'), nullable=False)
+    diary_id = Column(Integer, nullable=True)  # 결과를 Image 로 기록할 다이어리 (일기를 보관 테이블로 옮길 수 있도록 외래 키 없음)
+
+    __table_args__ = (
+        # 작업을 요청한 사용자 확인 / 결과를 기록할 다이어리 조회용
+        Index('ix_image_job_user_job_user', 'job_id', 'user_id'),
+    )
+
 class Notification(Base):
     __tablename__ = 'notification'
     
@@ -57,6 +131,11 @@ class Notification(Base):
     is_read = Column(Boolean, nullable=True)
     created_at = Column(TIMESTAMP, nullable=True)
 
+    __table_args__ = (
+        # 사용자의 읽지 않은 알림을 최신순으로 조회 / 일괄 읽음 처리용
+        Index('ix_notification_user_read_created', 'user_id', 'is_read', 'created_at'),
+    )
+
 class Setting(Base):
     __tablename__ = 'setting'
     
@@ -67,16 +146,23 @@ class Setting(Base):
     created_at = Column(TIMESTAMP, nullable=True)
     updated_at = Column(TIMESTAMP, nullable=True)
 
+    __table_args__ = (
+        # 사용자당 설정은 한 행 (upsert 대상 키)
+        Index('ux_setting_user_id', 'user_id', unique=True),
+    )
+
 class TempDiary(Base):
     __tablename__ = 'temp_diary'
     
     temp_diary_id = Column(Integer, primary_key=True)
-    diary_id = Column(Integer, ForeignKey('diary.diary_id'), nullable=False)
+    diary_id = Column(Integer, ForeignKey('diary.diary_id'), nullable=True)  # 새 일기의 임시 저장본은 NULL
     user_id = Column(Integer, ForeignKey('user.user_id'), nullable=False)
     title = Column(String(255), nullable=True)
     content = Column(Text, nullable=True)
     weather = Column(String(50), nullable=True)
     emotion = Column(String(50), nullable=True)
+    diary_date = Column(Date, nullable=True)
+    image_url = Column(String(255), nullable=True)
     created_at = Column(TIMESTAMP, nullable=True)
     updated_at = Column(TIMESTAMP, nullable=True)
     is_deleted = Column(Boolean, nullable=True)
@@ -88,3 +174,70 @@ class Prompt(Base):
     prompt = Column(Text, nullable=True)
     description = Column(Text, nullable=True)
     is_use = Column(Boolean, nullable=True)
+
+# 보관(archive) 테이블 : 삭제된 일기와 그 이미지, 오래되었거나 이미 발행된 임시 저장본을 원래 테이블에서 옮겨 둠
+# (원래 id 를 그대로 유지하여 복구 시 같은 id 로 되돌림, app/archive.py 참고)
+class DiaryArchive(Base):
+    __tablename__ = 'diary_archive'
+
+    diary_id = Column(Integer, primary_key=True, autoincrement=False)
+    user_id = Column(Integer, nullable=False)
+    title = Column(String(255), nullable=True)
+    content = Column(Text, nullable=True)
+    weather = Column(Integer, nullable=True)
+    emotion = Column(Integer, nullable=True)
+    diary_date = Column(Date, nullable=True)
+    thumbnail_url = Column(String(255), nullable=True)
+    created_at = Column(TIMESTAMP, nullable=True)
+    updated_at = Column(TIMESTAMP, nullable=True)  # 삭제 시각 (복구 가능 기간의 기준)
+    is_deleted = Column(Boolean, nullable=True)
+    like = Column(Boolean, nullable=True)
+    archived_at = Column(TIMESTAMP, nullable=False)
+
+    __table_args__ = (
+        # 보관 기간이 지난 행 정리용
+        Index('ix_diary_archive_archived_at', 'archived_at'),
+    )
+
+class ImageArchive(Base):
+    __tablename__ = 'image_archive'
+
+    image_id = Column(Integer, primary_key=True, autoincrement=False)
+    diary_id = Column(Integer, nullable=False)
+    image_url = Column(String(255), nullable=True)
+    created_at = Column(TIMESTAMP, nullable=True)
+    is_temp = Column(Boolean, nullable=True)
+    is_active = Column(Boolean, nullable=True)
+    is_deleted = Column(Boolean, nullable=True)
+    archived_at = Column(TIMESTAMP, nullable=False)
+
+    __table_args__ = (
+        # 일기 복구 시 함께 옮길 이미지 조회용
+        Index('ix_image_archive_diary_id', 'diary_id'),
+        # 보관 기간이 지난 행 정리용
+        Index('ix_image_archive_archived_at', 'archived_at'),
+    )
+
+class TempDiaryArchive(Base):
+    __tablename__ = 'temp_diary_archive'
+
+    temp_diary_id = Column(Integer, primary_key=True, autoincrement=False)
+    diary_id = Column(Integer, nullable=True)
+    user_id = Column(Integer, nullable=False)
+    title = Column(String(255), nullable=True)
+    content = Column(Text, nullable=True)
+    weather = Column(String(50), nullable=True)
+    emotion = Column(String(50), nullable=True)
+    diary_date = Column(Date, nullable=True)
+    image_url = Column(String(255), nullable=True)
+    created_at = Column(TIMESTAMP, nullable=True)
+    updated_at = Column(TIMESTAMP, nullable=True)
+    is_deleted = Column(Boolean, nullable=True)
+    archived_at = Column(TIMESTAMP, nullable=False)
+
+    __table_args__ = (
+        # 일기 복구 시 함께 옮길 임시 저장본 조회용
+        Index('ix_temp_diary_archive_diary_id', 'diary_id'),
+        # 보관 기간이 지난 행 정리용
+        Index('ix_temp_diary_archive_archived_at', 'archived_at'),
+    )
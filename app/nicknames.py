@@ -0,0 +1,130 @@
+# 닉네임 사용 가능 여부 확인
+# 모든 닉네임을 Bloom 필터에 넣어 두고 필터에 없으면 "확실히 사용 가능"으로 바로 응답,
+# 필터에 있을 수도 있는 닉네임만 DB(user.nickname 고유 인덱스)에서 확인함
+# 실제 변경은 고유 제약으로 보장되므로 필터가 오래되어도 중복 닉네임이 저장되지는 않음
+import hashlib
+import math
+import os
+import unicodedata
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from .database import SessionLocal
+from .models import User
+
+NICKNAME_MAX_LENGTH = 100  # user.nickname 컬럼 길이
+NICKNAME_FILTER_ERROR_RATE = float(os.getenv("NICKNAME_FILTER_ERROR_RATE", 0.01))  # 목표 오탐률
+NICKNAME_FILTER_REFRESH = float(os.getenv("NICKNAME_FILTER_REFRESH", 5.0))  # 다른 워커의 변경을 반영하는 주기(초)
+NICKNAME_CHECK_MAX = int(os.getenv("NICKNAME_CHECK_MAX", 100))  # 한 번에 확인할 수 있는 닉네임 수
+
+
+def normalize(nickname: str) -> str:
+    # 필터 키 : MySQL 기본 콜레이션은 대소문자를 구분하지 않으므로 더 넓은 기준(casefold)으로 맞춤
+    # (필터는 "있을 수도 있음"만 넓어지고, 실제 중복 여부는 DB 가 판단)
+    return unicodedata.normalize("NFC", nickname).strip().casefold()
+
+
+class BloomFilter:
+    def __init__(self, capacity: int, error_rate: float = NICKNAME_FILTER_ERROR_RATE):
+        self.capacity = max(capacity, 1)
+        self.size = math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)  # 비트 수
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))  # 해시 함수 수
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key: str):
+        # 128비트 해시 하나를 둘로 나누어 k 개의 위치를 만듦 (double hashing)
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key: str):
+        added = False
+        for pos in self._positions(key):
+            if not self.bits[pos >> 3] & (1 << (pos & 7)):
+                self.bits[pos >> 3] |= 1 << (pos & 7)
+                added = True
+        self.count += added
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+class NicknameRegistry:
+    def __init__(self):
+        self.filter: BloomFilter | None = None  # 만들어지기 전에는 모든 확인을 DB 로 보냄
+        self.since: datetime | None = None
+        self.checks = 0  # 확인한 닉네임 수
+        self.db_checks = 0  # 그중 DB 에서 확인한 수
+
+    async def rebuild(self) -> int:
+        # 전체 닉네임을 스트리밍으로 읽어 새 필터를 만든 뒤 교체
+        started = datetime.now()
+        async with SessionLocal() as db:
+            total = (await db.execute(select(func.count()).select_from(User).where(User.nickname.is_not(None)))).scalar()
+            # 사용자가 늘어나도 오탐률이 유지되도록 여유를 두고 만듦
+            bloom = BloomFilter(max(total * 2, 100_000))
+            result = await db.stream(select(User.nickname).where(User.nickname.is_not(None)).execution_options(yield_per=10_000))
+            async for partition in result.scalars().partitions():
+                for nickname in partition:
+                    bloom.add(normalize(nickname))
+        self.filter = bloom
+        self.since = started
+        return total
+
+    async def refresh(self) -> int:
+        # 처음에는 전체를 만들고, 이후에는 마지막 확인 이후 바뀐 닉네임만 추가 (user.updated_at 인덱스)
+        # 필터 용량을 넘으면 오탐률이 올라가므로 다시 만듦
+        if self.filter is None or self.filter.count > self.filter.capacity:
+            return await self.rebuild()
+        started = datetime.now()
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(User.nickname).where(
+                    User.updated_at >= self.since - timedelta(seconds=2),  # TIMESTAMP 는 초 단위이므로 겹치게 조회
+                    User.nickname.is_not(None),
+                )
+            )
+            nicknames = result.scalars().all()
+        for nickname in nicknames:
+            self.filter.add(normalize(nickname))
+        self.since = started
+        return 0  # 주기 작업 로그를 남기지 않음
+
+    def add(self, nickname: str | None):
+        if nickname and self.filter is not None:
+            self.filter.add(normalize(nickname))
+
+    async def taken(self, db, nicknames: list[str]) -> set[str]:
+        # 사용 중인 닉네임 집합 : 필터에 없는 닉네임은 DB 를 조회하지 않음
+        self.checks += len(nicknames)
+        maybe = [nickname for nickname in nicknames if self.filter is None or normalize(nickname) in self.filter]
+        if not maybe:
+            return set()
+        self.db_checks += len(maybe)
+        # DB 비교는 컬럼 콜레이션을 따르도록 입력 그대로 조회하고, 결과는 정규화한 값으로 맞춤
+        result = await db.execute(select(User.nickname).where(User.nickname.in_(maybe)))
+        found = {normalize(nickname) for nickname in result.scalars()}
+        return {nickname for nickname in maybe if normalize(nickname) in found}
+
+    async def available(self, db, nicknames: list[str]) -> dict[str, bool]:
+        nicknames = list(dict.fromkeys(nicknames))
+        taken = await self.taken(db, nicknames)
+        return {nickname: nickname not in taken for nickname in nicknames}
+
+    def stats(self) -> dict:
+        return {
+            "items": self.filter.count if self.filter else 0,
+            "bytes": len(self.filter.bits) if self.filter else 0,
+            "checks": self.checks,
+            "db_checks": self.db_checks,
+        }
+
+
+nicknames = NicknameRegistry()
+
+
+def valid_nickname(nickname) -> bool:
+    return isinstance(nickname, str) and 0 < len(nickname.strip()) <= NICKNAME_MAX_LENGTH
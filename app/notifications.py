@@ -0,0 +1,180 @@
+# 알림 발송
+# 알림은 notification 테이블에 일괄 INSERT 하고, 접속 중인 사용자에게는
+# 프로세스 내 pub/sub(NotificationHub)으로 SSE 스트림에 전달하여 연결마다 테이블을 폴링하지 않도록 함
+# 알림을 INSERT 한 워커와 사용자가 접속한 워커가 다를 수 있으므로 각 워커의 허브가
+# NOTIFY_POLL_INTERVAL 마다 마지막으로 본 notification_id 이후의 행 중 접속 중인 사용자의 것만 읽어 전달
+import asyncio
+import logging
+import os
+from collections import defaultdict
+from datetime import date, datetime, time
+
+from sqlalchemy import false, func, insert, literal, select
+
+from .database import SessionLocal
+from .models import Diary, Notification, Setting
+
+logger = logging.getLogger(__name__)
+
+NOTIFY_BATCH = int(os.getenv("NOTIFY_BATCH", 1000))  # 한 번에 INSERT / 조회할 최대 행 수
+NOTIFY_QUEUE_SIZE = int(os.getenv("NOTIFY_QUEUE_SIZE", 100))  # 연결별 전달 대기 알림 수
+NOTIFY_HEARTBEAT = float(os.getenv("NOTIFY_HEARTBEAT", 15.0))  # 유휴 SSE 연결 유지용 주석 전송 간격(초)
+NOTIFY_BACKLOG = int(os.getenv("NOTIFY_BACKLOG", 100))  # 스트림 연결 시 먼저 보내는 읽지 않은 알림 수
+NOTIFY_POLL_INTERVAL = float(os.getenv("NOTIFY_POLL_INTERVAL", 1.0))  # 워커별 새 알림 확인 주기(초)
+REMINDER_TIME = os.getenv("REMINDER_TIME", "")  # 일기 작성 알림 시각 (예: "21:00", 비어 있으면 보내지 않음)
+REMINDER_TYPE = "reminder"
+REMINDER_MESSAGE = os.getenv("REMINDER_MESSAGE", "오늘의 그림일기를 아직 쓰지 않았어요!")
+
+
+class NotificationHub:
+    # 사용자별 SSE 연결의 큐 목록
+    # 유휴 연결은 큐 하나와 대기 중인 코루틴 하나만 차지하므로 워커당 수천 개를 유지할 수 있음
+    def __init__(self, queue_size: int = NOTIFY_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self.subscribers: dict[int, set[asyncio.Queue]] = defaultdict(set)
+        self.published = 0
+        self.dropped = 0
+        self.last_id: int | None = None  # 이 워커가 마지막으로 확인한 notification_id
+
+    def subscribe(self, user_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self.subscribers[user_id].add(queue)
+        return queue
+
+    def unsubscribe(self, user_id: int, queue: asyncio.Queue):
+        queues = self.subscribers.get(user_id)
+        if queues is None:
+            return
+        queues.discard(queue)
+        if not queues:
+            del self.subscribers[user_id]
+
+    def publish(self, user_id: int, event: dict):
+        for queue in self.subscribers.get(user_id, ()):
+            if queue.full():
+                # 읽지 못하는 느린 연결은 가장 오래된 알림을 버림 (재접속 시 DB 에서 다시 받음)
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(event)
+            self.published += 1
+
+    def close(self):
+        # 워커 종료 시 모든 스트림에 끝을 알림 (None 을 받은 스트림은 응답을 마침)
+        for queues in self.subscribers.values():
+            for queue in queues:
+                if queue.full():
+                    queue.get_nowait()
+                queue.put_nowait(None)
+
+    def connected_users(self) -> list[int]:
+        return list(self.subscribers)
+
+    async def poll(self) -> int:
+        # 마지막으로 확인한 id 이후에 (어느 워커에서든) 발송된 알림 중 접속 중인 사용자의 것만 전달
+        # (접속한 사용자가 없어도 기본 키의 최댓값으로 위치는 계속 갱신하여 새로 연결한 스트림이 놓치지 않도록 함)
+        async with SessionLocal() as db:
+            high = (await db.execute(select(func.max(Notification.notification_id)))).scalar() or 0
+            if self.last_id is None:
+                self.last_id = high
+            users = self.connected_users()
+            count = 0
+            if high > self.last_id:
+                for offset in range(0, len(users), NOTIFY_BATCH):
+                    result = await db.execute(
+                        select(*NOTIFICATION_COLUMNS)
+                        .where(
+                            Notification.notification_id > self.last_id,
+                            Notification.notification_id <= high,
+                            Notification.user_id.in_(users[offset:offset + NOTIFY_BATCH]),
+                        )
+                        .order_by(Notification.notification_id)
+                    )
+                    for row in result:
+                        self.publish(row.user_id, notification_item(row))
+                        count += 1
+        self.last_id = max(high, self.last_id)
+        return count
+
+    async def run(self, interval: float = NOTIFY_POLL_INTERVAL):
+        while True:
+            try:
+                await self.poll()
+            except Exception:
+                logger.exception("notification poll failed")
+            await asyncio.sleep(interval)
+
+    def stats(self) -> dict:
+        return {
+            "users": len(self.subscribers),
+            "connections": sum(len(queues) for queues in self.subscribers.values()),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+hub = NotificationHub()
+
+NOTIFICATION_COLUMNS = (
+    Notification.notification_id,
+    Notification.user_id,
+    Notification.type,
+    Notification.message,
+    Notification.is_read,
+    Notification.created_at,
+)
+
+
+def notification_item(row) -> dict:
+    return {
+        "id": row.notification_id,
+        "type": row.type,
+        "message": row.message,
+        "is_read": bool(row.is_read),
+        "created_at": row.created_at,
+    }
+
+
+def now() -> datetime:
+    # TIMESTAMP 컬럼은 초 단위로 저장되므로 발송 시각도 초 단위로 맞춤
+    return datetime.now().replace(microsecond=0)
+
+
+async def notify(user_ids: list[int], type: str, message: str) -> int:
+    # 여러 사용자에게 같은 알림을 배치 단위 executemany INSERT 로 발송
+    created_at = now()
+    async with SessionLocal() as db:
+        for offset in range(0, len(user_ids), NOTIFY_BATCH):
+            rows = [
+                {"user_id": user_id, "type": type, "message": message, "is_read": False, "created_at": created_at}
+                for user_id in user_ids[offset:offset + NOTIFY_BATCH]
+            ]
+            await db.execute(insert(Notification), rows)
+        await db.commit()
+    return len(user_ids)
+
+
+async def send_reminders(today: date | None = None) -> int:
+    # 알림을 켠 사용자 중 오늘 일기를 쓰지 않았고 오늘 알림을 받지 않은 사용자에게
+    # INSERT ... SELECT 한 문장으로 발송 (사용자 목록을 애플리케이션으로 가져오지 않음)
+    today = today or date.today()
+    created_at = now()
+    wrote_today = select(Diary.diary_id).where(
+        Diary.user_id == Setting.user_id,
+        Diary.is_deleted == False,
+        Diary.diary_date == today,
+    ).exists()
+    reminded_today = select(Notification.notification_id).where(
+        Notification.user_id == Setting.user_id,
+        Notification.type == REMINDER_TYPE,
+        Notification.created_at >= datetime.combine(today, time.min),
+    ).exists()
+    targets = select(
+        Setting.user_id, literal(REMINDER_TYPE), literal(REMINDER_MESSAGE), false(), literal(created_at)
+    ).where(Setting.notification == True, ~wrote_today, ~reminded_today).distinct()
+
+    async with SessionLocal() as db:
+        result = await db.execute(
+            insert(Notification).from_select(["user_id", "type", "message", "is_read", "created_at"], targets)
+        )
+        await db.commit()
+    return result.rowcount
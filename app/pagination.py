@@ -0,0 +1,93 @@
+# 커서(keyset) 페이지네이션
+# OFFSET 대신 "마지막으로 본 행의 정렬 키보다 뒤" 조건으로 다음 페이지를 읽어
+# 몇 번째 페이지든 첫 페이지와 같은 비용(인덱스 구간 스캔)으로 조회
+#
+# 커서는 정렬 키 값을 base64 로 인코딩하고 HMAC 서명을 붙인 불투명 문자열이며,
+# 다른 조회(scope)에서 만든 커서나 변조된 커서는 거부됨
+import base64
+import hashlib
+import hmac
+import json
+import os
+from datetime import date, datetime
+
+from sqlalchemy import Select, and_, or_
+
+CURSOR_SECRET = (os.getenv("CURSOR_SECRET") or os.getenv("JWT_SECRET") or "").encode()
+if not CURSOR_SECRET:
+    # 비밀키가 비어 있으면 누구나 커서를 만들 수 있으므로 시작하지 않음
+    raise RuntimeError("CURSOR_SECRET 또는 JWT_SECRET 환경 변수를 설정해야 합니다.")
+PAGE_SIZE = int(os.getenv("PAGE_SIZE", 20))  # 기본 페이지 크기
+PAGE_MAX_SIZE = int(os.getenv("PAGE_MAX_SIZE", 100))  # 최대 페이지 크기
+
+
+class InvalidCursor(Exception):
+    pass
+
+
+def _dump(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _load(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+    return value
+
+
+def _sign(scope: str, payload: bytes) -> str:
+    digest = hmac.new(CURSOR_SECRET, scope.encode() + b"\0" + payload, hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:16]).decode().rstrip("=")
+
+
+def encode_cursor(scope: str, values: tuple) -> str:
+    payload = json.dumps([_dump(v) for v in values], separators=(",", ":")).encode()
+    body = base64.urlsafe_b64encode(payload).decode().rstrip("=")
+    return f"{body}.{_sign(scope, payload)}"
+
+
+def decode_cursor(scope: str, cursor: str) -> list:
+    try:
+        body, signature = cursor.split(".")
+        payload = base64.urlsafe_b64decode(body + "=" * (-len(body) % 4))
+    except ValueError:
+        raise InvalidCursor()
+    # 문자열 compare_digest 는 ASCII 가 아닌 문자가 있으면 TypeError 이므로 바이트로 비교
+    if not hmac.compare_digest(signature.encode(), _sign(scope, payload).encode()):
+        raise InvalidCursor()
+    return [_load(v) for v in json.loads(payload)]
+
+
+def after(keys: list, values: list, descending: bool):
+    # (k1, k2, k3) < (v1, v2, v3) 를 인덱스를 탈 수 있는 형태로 펼침
+    # k1 < v1 OR (k1 = v1 AND k2 < v2) OR (k1 = v1 AND k2 = v2 AND k3 < v3)
+    conditions = []
+    for i, (key, value) in enumerate(zip(keys, values)):
+        beyond = key < value if descending else key > value
+        conditions.append(and_(*(k == v for k, v in zip(keys[:i], values[:i])), beyond))
+    return or_(*conditions)
+
+
+def paginate(query: Select, keys: list, scope: str, cursor: str | None, size: int, descending: bool = True) -> Select:
+    # keys : 정렬 키 (마지막 키는 유일해야 함, 예: diary_id)
+    # 다음 페이지가 있는지 알기 위해 size + 1 개를 조회
+    if cursor:
+        query = query.where(after(keys, decode_cursor(scope, cursor), descending))
+    order = [key.desc() if descending else key.asc() for key in keys]
+    return query.order_by(None).order_by(*order).limit(size + 1)
+
+
+def page(rows: list, key_names: list[str], scope: str, size: int) -> tuple[list, str | None]:
+    # 조회 결과를 현재 페이지와 다음 페이지 커서로 나눔
+    if len(rows) <= size:
+        return rows, None
+    rows = rows[:size]
+    last = rows[-1]
+    return rows, encode_cursor(scope, tuple(getattr(last, name) for name in key_names))
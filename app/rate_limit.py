@@ -0,0 +1,235 @@
+# 요청 속도 제한 / 부하 차단
+# - 사용자(JWT 의 user_id, 없으면 IP)별 토큰 버킷 : 라우트별 예산(ROUTE_BUDGETS)을 넘으면 429 + Retry-After
+# - 동시 처리 요청 수 제한 : 커넥션 풀에서 기다리기 전에 초과 요청을 503 + Retry-After 로 바로 거절
+# 버킷 상태는 기본적으로 워커 메모리에 두고, RATE_LIMIT_BACKEND 로 여러 워커가 공유하는 저장소로 바꿀 수 있음
+#   RATE_LIMIT_BACKEND=app.rate_limit:SqliteBackend  (같은 서버의 워커끼리 RATE_LIMIT_SQLITE_PATH 파일을 공유)
+import asyncio
+import importlib
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+import anyio
+import jwt
+import orjson
+from starlette.requests import cookie_parser
+from starlette.routing import Match
+
+from .api.auth import JWT_ALGORITHM, JWT_SECRET, token_cache
+from .database import DB_MAX_OVERFLOW, DB_POOL_SIZE
+
+RATE_LIMIT_ENABLED = os.getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "app.rate_limit:MemoryBackend")  # "모듈:클래스" 형식
+RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", 10))  # 예산이 없는 라우트의 초당 허용 요청 수
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", 40))  # 예산이 없는 라우트의 순간 허용 요청 수
+RATE_LIMIT_MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", 100000))  # 메모리 저장소에 보관할 버킷 수
+RATE_LIMIT_SQLITE_PATH = os.getenv("RATE_LIMIT_SQLITE_PATH", "data/rate_limit.db")
+# 동시에 처리할 요청 수 (기본값 : 커넥션 풀 크기) 와 자리가 나기를 기다릴 수 있는 요청 수/시간
+MAX_CONCURRENT_REQUESTS = int(os.getenv("MAX_CONCURRENT_REQUESTS", DB_POOL_SIZE + DB_MAX_OVERFLOW))
+MAX_QUEUED_REQUESTS = int(os.getenv("MAX_QUEUED_REQUESTS", MAX_CONCURRENT_REQUESTS))
+QUEUE_TIMEOUT = float(os.getenv("QUEUE_TIMEOUT", 0.5))  # 초
+
+# 라우트별 (초당 요청 수, 순간 허용 요청 수) : DB 쓰기/외부 호출이 많은 라우트는 더 작게
+ROUTE_BUDGETS = {
+    ("GET", "/api/v1/auth/kakao/callback"): (0.2, 5),
+    ("POST", "/api/v1/auth/refresh"): (0.5, 10),
+    ("POST", "/api/v1/diaries/"): (0.5, 10),
+    ("PUT", "/api/v1/diaries/{id}"): (1, 10),
+    ("PUT", "/api/v1/diaries/temp/{id}"): (2, 20),
+    ("GET", "/api/v1/diaries/search/{keyword}"): (2, 10),
+    ("PUT", "/api/v1/diaries/like"): (1, 10),
+    ("GET", "/api/v1/diaries/export"): (0.01, 3),
+    ("POST", "/api/v1/diaries/import"): (0.01, 3),
+    ("POST", "/api/v1/images/"): (0.5, 10),
+    ("POST", "/api/v1/images/jobs"): (0.2, 5),
+    ("GET", "/api/v1/users/nickname/check"): (5, 20),
+    ("POST", "/api/v1/users/nickname/check"): (1, 10),
+}
+
+# 속도 제한과 동시 요청 수 제한을 모두 받지 않는 라우트 (상태 확인/지표)
+EXEMPT_ROUTES = {"/", "/ready", "/metrics"}
+# 연결을 오래 유지하지만 DB 커넥션을 잡지 않는 스트림은 동시 요청 수에서 제외
+STREAM_ROUTES = {"/api/v1/notifications/stream", "/api/v1/images/jobs/{job_id}/events"}
+
+
+class MemoryBackend:
+    # 워커 프로세스 안에서만 공유되는 버킷 (가장 오래 쓰지 않은 버킷부터 제거)
+    def __init__(self, maxsize: int = RATE_LIMIT_MAX_KEYS):
+        self.maxsize = maxsize
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        # 토큰 하나를 쓰고 0 을, 토큰이 없으면 다음 토큰까지 기다릴 시간(초)을 반환
+        now = time.monotonic()
+        tokens, updated = self._buckets.get(key, (burst, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self._buckets[key] = (tokens, now)
+        self._buckets.move_to_end(key)
+        while len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return wait
+
+
+class SqliteBackend:
+    # 같은 서버의 여러 워커가 하나의 SQLite 파일로 버킷을 공유 (Redis 등 공유 저장소의 로컬 대용)
+    # BEGIN IMMEDIATE 로 파일 잠금을 잡아 읽고-계산하고-쓰기를 워커 사이에서 원자적으로 처리
+    def __init__(self, path: str = RATE_LIMIT_SQLITE_PATH):
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, timeout=1.0, isolation_level=None, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=OFF")  # 재시작 시 버킷이 초기화되어도 무방
+        self._conn.execute("CREATE TABLE IF NOT EXISTS bucket (key TEXT PRIMARY KEY, tokens REAL, updated REAL)")
+        self._lock = threading.Lock()
+        self._takes = 0
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        return await anyio.to_thread.run_sync(self._take, key, rate, burst)
+
+    def _take(self, key: str, rate: float, burst: float) -> float:
+        now = time.time()  # 프로세스 사이에서 비교할 수 있는 시계
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT tokens, updated FROM bucket WHERE key = ?", (key,)).fetchone()
+                tokens, updated = row or (burst, now)
+                tokens = min(burst, tokens + max(0.0, now - updated) * rate)
+                wait = 0.0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / rate
+                self._conn.execute("INSERT OR REPLACE INTO bucket (key, tokens, updated) VALUES (?, ?, ?)", (key, tokens, now))
+                # 가끔 한 시간 넘게 쓰지 않은(이미 가득 찬) 버킷 정리
+                self._takes += 1
+                if self._takes % 10000 == 0:
+                    self._conn.execute("DELETE FROM bucket WHERE updated < ?", (now - 3600,))
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return wait
+
+
+def load_backend(path: str = RATE_LIMIT_BACKEND):
+    # 다른 저장소는 take(key, rate, burst) -> 기다릴 시간(초) 코루틴을 가진 클래스로 구현하여 지정
+    module, _, name = path.partition(":")
+    return getattr(importlib.import_module(module), name)()
+
+
+def client_key(scope) -> str:
+    # 로그인한 사용자는 user_id, 아니면 클라이언트 IP 로 구분
+    # (프록시 뒤에서는 uvicorn --proxy-headers / --forwarded-allow-ips 로 실제 IP 가 client 에 들어옴)
+    for name, value in scope["headers"]:
+        if name == b"cookie":
+            token = cookie_parser(value.decode("latin-1")).get("access_token")
+            if token and JWT_SECRET:
+                # 이미 검증한 토큰은 캐시에서, 처음 보는 토큰은 DB 를 조회하지 않고 서명만 확인
+                user_id = token_cache.get(token)
+                if user_id is not None:
+                    return f"user:{user_id}"
+                try:
+                    return f"user:{jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM])['user_id']}"
+                except (jwt.PyJWTError, KeyError):
+                    pass
+            break
+    client = scope.get("client")
+    return f"ip:{client[0] if client else 'unknown'}"
+
+
+class Limiter:
+    def __init__(self):
+        self.backend = None  # 첫 요청 때 RATE_LIMIT_BACKEND 로 만듦
+        self.concurrency = asyncio.Semaphore(MAX_CONCURRENT_REQUESTS)
+        self.waiting = 0
+        self.limited = 0  # 429 로 거절한 요청 수
+        self.shed = 0  # 503 으로 거절한 요청 수
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        if self.backend is None:
+            self.backend = load_backend()
+        return await self.backend.take(key, rate, burst)
+
+    async def acquire(self) -> bool:
+        # 자리가 없으면 QUEUE_TIMEOUT 까지만 기다리고, 기다리는 요청도 많으면 바로 거절
+        if not self.concurrency.locked():
+            await self.concurrency.acquire()
+            return True
+        if self.waiting >= MAX_QUEUED_REQUESTS:
+            return False
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self.concurrency.acquire(), timeout=QUEUE_TIMEOUT)
+            return True
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            self.waiting -= 1
+
+    def release(self):
+        self.concurrency.release()
+
+
+limiter = Limiter()
+
+
+def match_route(scope):
+    # 라우트 템플릿을 알아야 예산을 고를 수 있으므로 라우터와 같은 방식으로 먼저 매칭
+    for route in scope["app"].router.routes:
+        matched, child_scope = route.matches(scope)
+        if matched == Match.FULL:
+            return route.path, child_scope
+    return None, {}
+
+
+async def send_error(send, status: int, message: str, retry_after: float):
+    body = orjson.dumps({"status": status, "message": message})
+    headers = [
+        (b"content-type", b"application/json"),
+        (b"content-length", str(len(body)).encode()),
+        (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+    ]
+    await send({"type": "http.response.start", "status": status, "headers": headers})
+    await send({"type": "http.response.body", "body": body})
+
+
+class RateLimitMiddleware:
+    # MetricsMiddleware 와 같이 순수 ASGI 미들웨어로 구현 (거절한 요청도 지표에 집계되도록 그 안쪽에 둠)
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not RATE_LIMIT_ENABLED:
+            return await self.app(scope, receive, send)
+
+        path, child_scope = match_route(scope)
+        if path in EXEMPT_ROUTES:
+            return await self.app(scope, receive, send)
+        # 거절하더라도 지표가 라우트 템플릿으로 집계되도록 매칭 결과를 기록 (라우터가 다시 덮어씀)
+        scope.update(child_scope)
+
+        budget = ROUTE_BUDGETS.get((scope["method"], path))
+        rate, burst = budget or (RATE_LIMIT_RATE, RATE_LIMIT_BURST)
+        bucket = f"{scope['method']} {path}" if budget else "*"
+        wait = await limiter.take(f"{bucket}|{client_key(scope)}", rate, burst)
+        if wait:
+            limiter.limited += 1
+            return await send_error(send, 429, "요청이 너무 많습니다. 잠시 후 다시 시도해 주세요.", wait)
+
+        if path in STREAM_ROUTES:
+            return await self.app(scope, receive, send)
+        if not await limiter.acquire():
+            limiter.shed += 1
+            return await send_error(send, 503, "서버가 혼잡합니다. 잠시 후 다시 시도해 주세요.", 1)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
@@ -0,0 +1,129 @@
+# 다이어리 조회 응답 캐시 / 조건부 요청(ETag, Last-Modified)
+# 앱이 화면을 다시 열 때마다 같은 캘린더/좋아요 목록을 조회하므로 사용자별로 직렬화된 응답 본문을 보관하고,
+# 일기 작성/수정/삭제/좋아요 시 해당 사용자의 캐시를 비움 (세대 번호를 올려 한 번에 무효화)
+# If-None-Match 가 현재 ETag 와 같으면 본문 없이 304 로 응답
+# 캐시는 워커 프로세스별이므로 다른 워커에서 쓴 직후(기본 DB 고정 쿠키가 있는 동안)의 요청은 캐시를 쓰지 않고,
+# 항목은 고정 시간(READ_YOUR_WRITES_WINDOW)보다 오래 유지하지 않아 고정이 끝난 뒤에도 쓰기 전 응답이 남지 않도록 함
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import Request, Response
+from fastapi.responses import ORJSONResponse
+
+from .database import READ_YOUR_WRITES_WINDOW, pinned_by_request
+
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", 10000))  # 보관할 응답 수
+RESPONSE_CACHE_TTL = min(float(os.getenv("RESPONSE_CACHE_TTL", 5)), READ_YOUR_WRITES_WINDOW)  # 캐시 유지 시간(초)
+# 브라우저/앱은 응답을 보관하되 쓰기 전에 항상 ETag 로 다시 확인
+CACHE_CONTROL = "private, no-cache"
+
+
+class ResponseCache:
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[tuple, tuple[bytes, str, int, float]] = OrderedDict()
+        self._generations: dict[int, int] = {}  # 사용자별 세대 번호 (무효화 시 증가)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int, key: tuple) -> tuple[bytes, str] | None:
+        entry = self._entries.get((user_id, *key))
+        if entry is None or entry[2] != self._generations.get(user_id, 0) or entry[3] <= time.monotonic():
+            self.misses += 1
+            return None
+        self._entries.move_to_end((user_id, *key))
+        self.hits += 1
+        return entry[0], entry[1]
+
+    def generation(self, user_id: int) -> int:
+        return self._generations.get(user_id, 0)
+
+    def set(self, user_id: int, key: tuple, body: bytes, etag: str, generation: int):
+        # generation 은 조회를 시작하기 전의 값 : 조회 중에 무효화되었으면 이미 지난 세대로 저장되어 쓰이지 않음
+        self._entries[(user_id, *key)] = (body, etag, generation, time.monotonic() + self.ttl)
+        self._entries.move_to_end((user_id, *key))
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, user_id: int):
+        # 이전 세대 항목은 조회되지 않고 LRU 로 밀려나 제거됨
+        self._generations[user_id] = self._generations.get(user_id, 0) + 1
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+response_cache = ResponseCache()
+
+
+def body_etag(body: bytes) -> str:
+    return '"%s"' % hashlib.blake2b(body, digest_size=12).hexdigest()
+
+
+def http_date(value: datetime) -> str:
+    # DB 의 TIMESTAMP 는 서버 로컬 시간이므로 로컬 시간대로 해석하여 GMT 로 표시 (HTTP 날짜는 초 단위)
+    return format_datetime(value.replace(microsecond=0).astimezone(timezone.utc), usegmt=True)
+
+
+def not_modified(request: Request, etag: str, last_modified: datetime | None = None) -> bool:
+    # If-None-Match 가 있으면 그것만 비교하고, 없을 때만 If-Modified-Since 를 비교
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match:
+        return if_none_match.strip() == "*" or etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+        return last_modified.replace(microsecond=0).astimezone(timezone.utc) <= since
+    return False
+
+
+def row_validators(*timestamps: datetime | None) -> tuple[str, datetime] | None:
+    # 행의 수정 시각으로 만든 (ETag, Last-Modified)
+    # TIMESTAMP 는 초 단위로 저장될 수 있어 같은 초에 다시 수정되면 구분할 수 없으므로 1초가 지난 뒤부터 사용
+    timestamps = [t for t in timestamps if t is not None]
+    if not timestamps or (datetime.now() - max(timestamps)).total_seconds() < 1:
+        return None
+    return '"%s"' % hashlib.blake2b(repr(timestamps).encode(), digest_size=12).hexdigest(), max(timestamps)
+
+
+def conditional_response(request: Request, body: bytes, etag: str, last_modified: datetime | None = None) -> Response:
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    if not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type=ORJSONResponse.media_type, headers=headers)
+
+
+async def cached_response(request: Request, user_id: int, key: tuple, build) -> Response:
+    # 캐시에 있으면 DB 조회와 직렬화 없이 응답하고, 없으면 build() 로 만든 응답 본문(dict)을 직렬화하여 보관
+    # (다이어리 라우트는 오류도 {"status": 400, ...} 로 응답하므로 status 가 200 인 것만 보관)
+    # 다른 워커에서 방금 쓴 내용이 이 워커의 캐시에는 반영되지 않았을 수 있으므로 기본 DB 고정 중에는 캐시를 거치지 않음
+    pinned = pinned_by_request()
+    entry = None if pinned else response_cache.get(user_id, key)
+    if entry is None:
+        generation = response_cache.generation(user_id)
+        content = await build()
+        response = ORJSONResponse(content)
+        if content.get("status") != 200:
+            return response
+        entry = response.body, body_etag(response.body)
+        if not pinned:
+            response_cache.set(user_id, key, *entry, generation)
+    return conditional_response(request, *entry)
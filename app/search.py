@@ -0,0 +1,29 @@
+# 다이어리 전문 검색
+# MySQL 의 ngram FULLTEXT 인덱스(title, content)를 사용하여 형태소 분석기 없이 한국어를 검색
+# (ngram_token_size 기본값 2 : "산책했다" → "산책", "책했", "했다")
+from sqlalchemy import Select, or_, select
+from sqlalchemy.dialects.mysql import match
+
+from .models import Diary
+
+NGRAM_TOKEN_SIZE = 2
+
+
+def boolean_query(keyword: str) -> str:
+    # 공백으로 나눈 각 단어를 필수(+) 구문으로 검색, 불리언 연산자 문자는 제거
+    words = [w.strip('"+-<>()~*@') for w in keyword.split()]
+    return " ".join(f'+"{w}"' for w in words if w)
+
+
+def search_query(user_id: int, keyword: str, dialect: str, columns) -> Select:
+    # 사용자 범위로 제한한 검색 쿼리 (정렬/페이지는 pagination.paginate 에서 적용)
+    live = (Diary.user_id == user_id, Diary.is_deleted == False)
+    words = [w for w in keyword.split() if w]
+
+    # ngram 토큰보다 짧은 단어(한 글자)는 FULLTEXT 로 찾을 수 없으므로
+    # 사용자 범위 안에서만 LIKE 로 검색 (MySQL 외 개발용 DB 도 동일)
+    if dialect != "mysql" or any(len(w) < NGRAM_TOKEN_SIZE for w in words):
+        conditions = [or_(Diary.title.contains(w, autoescape=True), Diary.content.contains(w, autoescape=True)) for w in words]
+        return select(*columns).where(*live, *conditions)
+
+    return select(*columns).where(*live, match(Diary.title, Diary.content, against=boolean_query(keyword)).in_boolean_mode())
@@ -0,0 +1,226 @@
+# 운영 실행 진입점
+#   python -m app.serve --host 0.0.0.0 --port 8000 --workers 4
+#
+# - 마스터 프로세스가 앱을 한 번 임포트(preload)하고 소켓을 연 뒤 워커를 fork
+#   임포트한 모듈은 copy-on-write 로 공유되므로 워커별 메모리가 작고 일정하며,
+#   설정/임포트 오류는 워커를 띄우기 전에 마스터에서 바로 드러남
+#   (DB 커넥션/HTTP 클라이언트는 각 워커의 lifespan 에서 열고 닫음)
+# - SIGTERM : 워커가 DRAIN_DELAY 초 동안 /ready 에 503 을 돌려주며 요청을 계속 처리하여
+#   로드밸런서가 인스턴스를 빼도록 한 뒤, 새 연결을 받지 않고 처리 중인 요청을 마치고
+#   lifespan 종료(임시 저장 버퍼 기록, 커넥션 풀 정리)까지 기다림 (GRACEFUL_TIMEOUT 초가 지나면 남은 요청 취소)
+# - SIGINT : DRAIN_DELAY 없이 바로 위와 같이 종료
+# - SIGHUP : 워커를 하나씩 새로 띄워 준비되면 이전 워커를 종료 (같은 소켓을 공유하므로 요청이 끊기지 않음)
+# - 워커가 비정상 종료하거나 --max-requests 만큼 처리하면 새 워커로 교체
+# - 토큰 정리/알림/보관 작업은 tasks.JobLock 을 잡은 워커 하나만 실행 (그 워커가 종료되면 다른 워커가 이어받음)
+# 코드를 배포할 때는 마스터를 다시 시작해야 하므로 인스턴스 단위로 SIGTERM → 새 인스턴스 순서로 교체
+import argparse
+import gc
+import logging
+import os
+import random
+import select
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+from .main import app
+from .notifications import hub
+
+WORKERS = int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+DRAIN_DELAY = float(os.getenv("DRAIN_DELAY", 5))  # SIGTERM 후 /ready 를 503 으로 두고 기다릴 시간(초)
+GRACEFUL_TIMEOUT = float(os.getenv("GRACEFUL_TIMEOUT", 30))  # 처리 중인 요청을 기다릴 최대 시간(초)
+STARTUP_TIMEOUT = float(os.getenv("STARTUP_TIMEOUT", 60))  # 워커 lifespan 시작을 기다릴 최대 시간(초)
+
+logger = logging.getLogger("app.serve")
+
+
+class WorkerServer(uvicorn.Server):
+    def __init__(self, config: uvicorn.Config, ready_fd: int):
+        super().__init__(config)
+        self.ready_fd = ready_fd
+        self.drain_until = None
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        if self.started:
+            # lifespan 시작(커넥션 풀 준비)까지 끝났음을 마스터에 알림
+            os.write(self.ready_fd, b"1")
+            os.close(self.ready_fd)
+
+    def handle_exit(self, sig, frame):
+        if sig == signal.SIGTERM and DRAIN_DELAY > 0 and self.drain_until is None:
+            app.state.ready = False
+            self.drain_until = time.monotonic() + DRAIN_DELAY
+            return
+        super().handle_exit(sig, frame)
+
+    async def on_tick(self, counter: int) -> bool:
+        if self.drain_until is not None and time.monotonic() >= self.drain_until:
+            self.should_exit = True
+        return await super().on_tick(counter)
+
+    async def shutdown(self, sockets=None):
+        # 알림 스트림은 끝나지 않으므로 먼저 닫음 (클라이언트는 Last-Event-ID 로 다른 워커에 다시 연결)
+        hub.close()
+        await super().shutdown(sockets=sockets)
+
+
+def bind(host: str, port: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+
+class Master:
+    def __init__(self, args, sock: socket.socket):
+        self.args = args
+        self.sock = sock
+        self.workers: dict[int, int] = {}  # pid → 준비 알림 파이프
+        self.stopping = None  # 종료 시 워커에 보낼 신호
+        self.reloading = False
+
+    def spawn(self) -> int:
+        read_fd, write_fd = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            for sig in (signal.SIGHUP, signal.SIGCHLD):
+                signal.signal(sig, signal.SIG_DFL)
+            code = 0
+            try:
+                # 모든 워커가 한꺼번에 교체되지 않도록 최대 요청 수를 워커마다 조금씩 다르게 함
+                max_requests = self.args.max_requests and self.args.max_requests + random.randint(0, self.args.max_requests // 10)
+                config = uvicorn.Config(
+                    app,
+                    log_level=self.args.log_level,
+                    proxy_headers=True,
+                    forwarded_allow_ips=self.args.forwarded_allow_ips,
+                    timeout_graceful_shutdown=GRACEFUL_TIMEOUT,
+                    limit_max_requests=max_requests or None,
+                )
+                WorkerServer(config, write_fd).run(sockets=[self.sock])
+            except SystemExit as e:
+                code = e.code if isinstance(e.code, int) else 1
+            except BaseException:
+                logger.exception("worker failed")
+                code = 1
+            finally:
+                os._exit(code)
+        os.close(write_fd)
+        self.workers[pid] = read_fd
+        return pid
+
+    def wait_ready(self, pid: int) -> bool:
+        # 워커가 준비되면 True, 시작하지 못하고 종료하면 False
+        read_fd = self.workers[pid]
+        readable, _, _ = select.select([read_fd], [], [], STARTUP_TIMEOUT)
+        ready = bool(readable) and os.read(read_fd, 1) == b"1"
+        os.close(read_fd)
+        self.workers[pid] = -1
+        return ready
+
+    def reap(self) -> list[tuple[int, int]]:
+        exited = []
+        while self.workers:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            read_fd = self.workers.pop(pid, None)
+            if read_fd is not None and read_fd >= 0:
+                os.close(read_fd)
+            exited.append((pid, status))
+        return exited
+
+    def stop(self, pid: int, sig: int) -> None:
+        try:
+            os.kill(pid, sig)
+        except ProcessLookupError:
+            pass
+
+    def wait_exit(self, pid: int) -> None:
+        try:
+            os.waitpid(pid, 0)
+        except ChildProcessError:
+            pass
+        self.workers.pop(pid, None)
+
+    def reload(self) -> None:
+        # 새 워커가 준비된 뒤에 이전 워커를 하나씩 종료
+        for old in list(self.workers):
+            if self.stopping:
+                return
+            new = self.spawn()
+            if not self.wait_ready(new):
+                logger.error("new worker %d failed to start, keeping worker %d", new, old)
+                return
+            self.stop(old, signal.SIGINT)
+            self.wait_exit(old)
+        logger.info("reloaded %d workers", len(self.workers))
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, lambda *_: setattr(self, "stopping", signal.SIGTERM))
+        signal.signal(signal.SIGINT, lambda *_: setattr(self, "stopping", signal.SIGINT))
+        signal.signal(signal.SIGHUP, lambda *_: setattr(self, "reloading", True))
+
+        started = time.perf_counter()
+        for _ in range(self.args.workers):
+            if self.stopping or not self.wait_ready(self.spawn()):
+                logger.error("workers failed to start")
+                self.shutdown(signal.SIGINT)
+                return 1
+        logger.info("%d workers ready in %.2fs (master %d)", self.args.workers, time.perf_counter() - started, os.getpid())
+
+        while not self.stopping:
+            if self.reloading:
+                self.reloading = False
+                self.reload()
+            for pid, status in self.reap():
+                # 0 : --max-requests 에 도달하여 정상 종료
+                code = os.waitstatus_to_exitcode(status)
+                (logger.info if code == 0 else logger.warning)("worker %d exited (code %d), starting a new one", pid, code)
+                if not self.stopping:
+                    time.sleep(1)  # 바로 다시 죽는 워커가 CPU 를 쓰지 않도록
+                    self.wait_ready(self.spawn())
+            time.sleep(0.5)
+        self.shutdown(self.stopping)
+        return 0
+
+    def shutdown(self, sig: int) -> None:
+        for pid in list(self.workers):
+            self.stop(pid, sig)
+        for pid in list(self.workers):
+            self.wait_exit(pid)
+        logger.info("stopped")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=WORKERS, help="워커 프로세스 수 (기본: WEB_CONCURRENCY 또는 CPU 수)")
+    parser.add_argument("--max-requests", type=int, default=0, help="이만큼 처리한 워커는 새 워커로 교체 (0: 교체하지 않음)")
+    parser.add_argument("--forwarded-allow-ips", default=os.getenv("FORWARDED_ALLOW_IPS", "127.0.0.1"))
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    logging.basicConfig(format="%(asctime)s [%(process)d] %(levelname)s %(message)s")
+    logger.setLevel(logging.INFO)
+
+    sock = bind(args.host, args.port)
+    # 임포트한 객체를 GC 대상에서 빼서 워커의 GC 가 공유 메모리 페이지를 건드려 복사되지 않도록 함
+    gc.collect()
+    gc.freeze()
+    return Master(args, sock).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
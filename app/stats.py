@@ -0,0 +1,99 @@
+# 사용자/월별 기분·날씨 통계 집계 테이블(diary_stat) 관리
+# 일기를 작성/수정/삭제할 때 같은 트랜잭션에서 개수를 증감하여
+# 통계 조회는 diary 를 GROUP BY 하지 않고 한 해 최대 144 행만 읽음
+#
+# 기존 데이터 채우기 / 다시 집계 (트래픽이 적은 시간에 실행):
+#   python -m app.stats rebuild
+#   python -m app.stats rebuild --user-id 1 --user-id 2
+import argparse
+import asyncio
+from collections import Counter
+from datetime import date
+
+from sqlalchemy import delete, func, insert, select
+
+from .database import SessionLocal, engine, upsert
+from .models import Diary, DiaryStat, User
+
+MOOD = "mood"
+WEATHER = "weather"
+STAT_KEY = ["user_id", "month", "kind", "value"]
+
+
+def stat_keys(user_id: int, diary_date: date | None, emotion: int | None, weather: int | None) -> list[tuple]:
+    # 일기 하나가 집계에 기여하는 (user_id, month, kind, value) 목록
+    if diary_date is None:
+        return []
+    month = diary_date.replace(day=1)
+    keys = []
+    if emotion is not None:
+        keys.append((user_id, month, MOOD, emotion))
+    if weather is not None:
+        keys.append((user_id, month, WEATHER, weather))
+    return keys
+
+
+async def update_stats(db, removed: list[tuple] = (), added: list[tuple] = ()):
+    # 수정 전 값은 빼고 수정 후 값은 더함 (바뀌지 않은 값은 상쇄되어 쿼리하지 않음)
+    deltas = Counter(added)
+    deltas.subtract(removed)
+    rows = [dict(zip(STAT_KEY, key), count=delta) for key, delta in sorted(deltas.items()) if delta]
+    if rows:
+        # 없으면 INSERT, 있으면 count 에 증감값을 더함 (키 순서로 정렬하여 동시 갱신 시 잠금 순서를 맞춤)
+        await db.execute(upsert(DiaryStat, rows, STAT_KEY, lambda new: {"count": DiaryStat.count + new["count"]}))
+
+
+async def read_stats(db, user_id: int, year: int) -> list:
+    # (user_id, month, kind, value) 인덱스의 한 구간만 읽음
+    result = await db.execute(
+        select(DiaryStat.month, DiaryStat.kind, DiaryStat.value, DiaryStat.count).where(
+            DiaryStat.user_id == user_id,
+            DiaryStat.month >= date(year, 1, 1),
+            DiaryStat.month < date(year + 1, 1, 1),
+            DiaryStat.count > 0,
+        )
+    )
+    return result.all()
+
+
+async def rebuild_stats(user_ids: list[int] | None = None, batch: int = 1000) -> int:
+    # diary 에서 다시 집계하여 사용자 묶음 단위로 교체
+    async with SessionLocal() as db:
+        if user_ids is None:
+            user_ids = (await db.execute(select(User.user_id).order_by(User.user_id))).scalars().all()
+
+    total = 0
+    for offset in range(0, len(user_ids), batch):
+        chunk = user_ids[offset:offset + batch]
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(Diary.user_id, Diary.diary_date, Diary.emotion, Diary.weather, func.count())
+                .where(Diary.user_id.in_(chunk), Diary.is_deleted == False)
+                .group_by(Diary.user_id, Diary.diary_date, Diary.emotion, Diary.weather)
+            )
+            counts = Counter()
+            for user_id, diary_date, emotion, weather, count in result:
+                for key in stat_keys(user_id, diary_date, emotion, weather):
+                    counts[key] += count
+
+            await db.execute(delete(DiaryStat).where(DiaryStat.user_id.in_(chunk)))
+            if counts:
+                await db.execute(insert(DiaryStat), [dict(zip(STAT_KEY, key), count=count) for key, count in counts.items()])
+            await db.commit()
+        total += len(counts)
+    return total
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--user-id", type=int, action="append", help="지정한 사용자만 다시 집계 (여러 번 지정 가능)")
+    args = parser.parse_args()
+
+    rows = await rebuild_stats(args.user_id)
+    print(f"diary_stat rebuilt: {rows} rows")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
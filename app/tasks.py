@@ -0,0 +1,167 @@
+# 백그라운드 주기 작업
+# lifespan 에서 asyncio 태스크로 실행되고, 종료 시 취소됨
+# 토큰 정리/알림/보관처럼 한 곳에서만 실행해야 하는 작업은 JobLock 을 잡은 워커 하나만 실행
+import asyncio
+import fcntl
+import hashlib
+import logging
+import os
+import tempfile
+from datetime import datetime, time, timedelta
+
+from sqlalchemy import delete, select, text
+
+from .database import ASYNC_DATABASE_URL, SessionLocal, engine
+from .models import Token
+
+logger = logging.getLogger(__name__)
+
+TOKEN_PURGE_INTERVAL = int(os.getenv("TOKEN_PURGE_INTERVAL", 3600))  # 정리 주기(초)
+TOKEN_PURGE_BATCH = int(os.getenv("TOKEN_PURGE_BATCH", 500))  # 한 트랜잭션에서 삭제할 최대 행 수
+TOKEN_RETENTION_DAYS = int(os.getenv("TOKEN_RETENTION_DAYS", 7))  # 만료 후 보관 기간(일)
+JOB_LOCK_NAME = os.getenv("JOB_LOCK_NAME", "ddrawry:jobs")  # 단일 실행 작업 락 이름
+JOB_LOCK_CHECK_INTERVAL = float(os.getenv("JOB_LOCK_CHECK_INTERVAL", 30))  # 락 획득/유지 확인 주기(초)
+
+
+async def purge_expired_tokens(batch_size: int = TOKEN_PURGE_BATCH) -> int:
+    # 만료된 토큰을 작은 배치로 나누어 삭제하여 테이블/행 잠금을 짧게 유지
+    cutoff = datetime.now() - timedelta(days=TOKEN_RETENTION_DAYS)
+    total = 0
+    while True:
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(Token.token_id).where(Token.expires_at.is_not(None), Token.expires_at < cutoff).limit(batch_size)
+            )
+            token_ids = result.scalars().all()
+            if not token_ids:
+                return total
+
+            await db.execute(delete(Token).where(Token.token_id.in_(token_ids)))
+            await db.commit()
+
+        total += len(token_ids)
+        if len(token_ids) < batch_size:
+            return total
+        await asyncio.sleep(0)  # 다른 요청에 이벤트 루프를 양보
+
+
+async def run_job(job):
+    try:
+        count = await job()
+        if count:
+            logger.info("%s: %d rows", job.__name__, count)
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        logger.exception("%s failed", job.__name__)
+
+
+async def run_periodically(job, interval: float):
+    while True:
+        await run_job(job)
+        await asyncio.sleep(interval)
+
+
+def seconds_until(at: time) -> float:
+    now = datetime.now()
+    target = datetime.combine(now.date(), at)
+    if target <= now:
+        target += timedelta(days=1)
+    return (target - now).total_seconds()
+
+
+async def run_daily(job, at: time):
+    # 매일 지정한 시각에 실행
+    while True:
+        await asyncio.sleep(seconds_until(at))
+        await run_job(job)
+
+
+class JobLock:
+    # 여러 워커 프로세스/인스턴스 중 하나만 잡을 수 있는 락 (잡은 워커가 살아 있는 동안 유지)
+    # MySQL : GET_LOCK (락을 잡은 커넥션이 끊기면 풀림)
+    # 그 밖(SQLite 등 한 서버) : DB 별 잠금 파일의 flock (프로세스가 끝나면 풀림)
+    def __init__(self, name: str = JOB_LOCK_NAME):
+        self.name = name
+        self.held = False
+        self._conn = None
+        self._file = None
+
+    async def acquire(self) -> bool:
+        if engine.dialect.name == "mysql":
+            conn = await engine.connect()
+            try:
+                got = (await conn.execute(text("SELECT GET_LOCK(:name, 0)"), {"name": self.name})).scalar()
+            except BaseException:
+                await conn.close()
+                raise
+            if got != 1:
+                await conn.close()
+                return False
+            self._conn = conn
+        else:
+            key = hashlib.sha256(f"{ASYNC_DATABASE_URL}:{self.name}".encode()).hexdigest()[:16]
+            f = open(os.path.join(tempfile.gettempdir(), f"ddrawry-{key}.lock"), "a")
+            try:
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                f.close()
+                return False
+            self._file = f
+        self.held = True
+        return True
+
+    async def check(self) -> bool:
+        # 락을 잡은 커넥션이 끊겼다면 다른 워커가 락을 가져갔을 수 있음
+        if self._conn is not None:
+            try:
+                mine = (await self._conn.execute(text("SELECT IS_USED_LOCK(:name) = CONNECTION_ID()"), {"name": self.name})).scalar()
+            except Exception:
+                mine = False
+            if not mine:
+                await self.release()
+        return self.held
+
+    async def release(self):
+        self.held = False
+        conn, self._conn = self._conn, None
+        if conn is not None:
+            try:
+                await conn.execute(text("SELECT RELEASE_LOCK(:name)"), {"name": self.name})
+            except Exception:
+                pass  # 커넥션이 끊겼으면 락도 이미 풀림
+            finally:
+                await conn.close()
+        f, self._file = self._file, None
+        if f is not None:
+            f.close()
+
+
+job_lock = JobLock()
+
+
+async def run_with_lock(lock: JobLock, start_jobs):
+    # 락을 잡으면 start_jobs() 가 만든 태스크들을 실행하고, 락을 잃으면 멈춘 뒤 다시 락을 기다림
+    tasks = []
+    try:
+        while True:
+            try:
+                if tasks and not await lock.check():
+                    logger.warning("lost %s, stopping background jobs", lock.name)
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                    tasks = []
+                if not tasks and await lock.acquire():
+                    logger.info("acquired %s, starting background jobs", lock.name)
+                    tasks = start_jobs()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("%s check failed", lock.name)
+            await asyncio.sleep(JOB_LOCK_CHECK_INTERVAL)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await lock.release()
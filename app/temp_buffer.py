@@ -0,0 +1,146 @@
+# 임시 저장(autosave) write-behind 버퍼
+# 사용자가 글을 쓰는 동안 반복되는 PUT /diaries/temp/{id} 를 메모리에 모아
+# (user_id, temp_diary_id) 별 최신 내용만 남긴 뒤 주기적으로 한 번에 UPDATE 함
+import asyncio
+import logging
+import os
+from collections import OrderedDict
+
+from sqlalchemy import bindparam, or_, select, update
+
+from .database import SessionLocal
+from .models import TempDiary
+
+logger = logging.getLogger(__name__)
+
+TEMP_FLUSH_INTERVAL = float(os.getenv("TEMP_FLUSH_INTERVAL", 2.0))  # 주기적 flush 간격(초)
+TEMP_FLUSH_SIZE = int(os.getenv("TEMP_FLUSH_SIZE", 200))  # 이 개수 이상 쌓이면 바로 flush
+TEMP_OWNER_CACHE_SIZE = int(os.getenv("TEMP_OWNER_CACHE_SIZE", 10000))  # 소유자 확인 결과 캐시 크기
+
+
+class TempDiaryBuffer:
+    def __init__(self, interval: float = TEMP_FLUSH_INTERVAL, max_size: int = TEMP_FLUSH_SIZE):
+        self.interval = interval
+        self.max_size = max_size
+        self.pending: dict[tuple[int, int], dict] = {}
+        # 한 번 소유자를 확인한 (user_id, temp_diary_id) 는 다시 조회하지 않음
+        self.owners: OrderedDict[tuple[int, int], bool] = OrderedDict()
+        self.writes = 0  # 버퍼에 들어온 저장 요청 수
+        self.flushed = 0  # 실제 DB 에 기록한 행 수
+        self.dropped = 0  # 삭제/보관되어 기록하지 못한 임시 저장본 수
+        self._wakeup = asyncio.Event()
+        self._lock = asyncio.Lock()
+
+    async def is_owner(self, user_id: int, temp_id: int) -> bool:
+        key = (user_id, temp_id)
+        if key in self.owners:
+            self.owners.move_to_end(key)
+            return True
+
+        async with SessionLocal() as db:
+            result = await db.execute(
+                select(TempDiary.temp_diary_id).where(
+                    TempDiary.temp_diary_id == temp_id,
+                    TempDiary.user_id == user_id,
+                    TempDiary.is_deleted == False,
+                )
+            )
+            if result.scalar() is None:
+                return False
+
+        self.owners[key] = True
+        while len(self.owners) > TEMP_OWNER_CACHE_SIZE:
+            self.owners.popitem(last=False)
+        return True
+
+    def put(self, user_id: int, temp_id: int, values: dict):
+        # 같은 임시 저장본의 이전 내용은 버리고 최신 내용만 유지
+        self.pending[(user_id, temp_id)] = {**self.pending.get((user_id, temp_id), {}), **values}
+        self.writes += 1
+        if len(self.pending) >= self.max_size:
+            self._wakeup.set()
+
+    def get(self, user_id: int, temp_id: int) -> dict | None:
+        # 아직 DB 에 기록되지 않은 최신 내용
+        return self.pending.get((user_id, temp_id))
+
+    def forget(self, user_id: int, temp_id: int):
+        # 임시 저장본이 삭제/발행된 경우 버퍼와 소유자 캐시에서 제거
+        # (보관 작업을 실행한 워커에서만 호출되므로 다른 워커는 flush 의 _drop_missing 에 의존)
+        self.pending.pop((user_id, temp_id), None)
+        self.owners.pop((user_id, temp_id), None)
+
+    async def flush(self) -> int:
+        async with self._lock:
+            if not self.pending:
+                return 0
+            batch, self.pending = self.pending, {}
+            # 저장 요청마다 포함된 필드가 다르므로 같은 컬럼 조합끼리 묶어 executemany
+            groups: dict[tuple[str, ...], list[dict]] = {}
+            for (user_id, temp_id), values in batch.items():
+                row = {"b_temp_diary_id": temp_id, "b_user_id": user_id}
+                row.update({f"b_{key}": value for key, value in values.items()})
+                groups.setdefault(tuple(sorted(values)), []).append(row)
+            try:
+                written = 0
+                async with SessionLocal() as db:
+                    for columns, rows in groups.items():
+                        # 다른 워커가 더 최근 내용을 이미 기록했다면 덮어쓰지 않음
+                        stmt = (
+                            update(TempDiary.__table__)
+                            .where(
+                                TempDiary.temp_diary_id == bindparam("b_temp_diary_id"),
+                                TempDiary.user_id == bindparam("b_user_id"),
+                                TempDiary.is_deleted == False,
+                                or_(TempDiary.updated_at.is_(None), TempDiary.updated_at <= bindparam("b_updated_at")),
+                            )
+                            .values({column: bindparam(f"b_{column}") for column in columns})
+                        )
+                        result = await db.execute(stmt, rows)
+                        written += result.rowcount
+                    await db.commit()
+            except BaseException:
+                # 실패하거나 취소된(종료 중) 내용은 더 새로운 내용이 들어오지 않았다면 다시 버퍼에 넣어 다음 flush 에서 재시도
+                for key, values in batch.items():
+                    self.pending[key] = {**values, **self.pending.get(key, {})}
+                raise
+            if written < len(batch):
+                await self._drop_missing(batch)
+            self.flushed += written
+            return written
+
+    async def _drop_missing(self, batch: dict[tuple[int, int], dict]):
+        # 반영되지 않은 행 중 더 최근 내용에 밀린 것이 아니라 삭제/보관된 임시 저장본은
+        # 소유자 캐시에서 빼서 이후 저장 요청이 404 를 받도록 함
+        async with SessionLocal() as db:
+            alive = set((await db.execute(
+                select(TempDiary.temp_diary_id).where(
+                    TempDiary.temp_diary_id.in_([temp_id for _, temp_id in batch]),
+                    TempDiary.is_deleted == False,
+                )
+            )).scalars().all())
+        missing = [key for key in batch if key[1] not in alive]
+        for key in missing:
+            self.owners.pop(key, None)
+        if missing:
+            self.dropped += len(missing)
+            logger.warning("dropped %d buffered temp diaries that were deleted or archived", len(missing))
+
+    async def run(self):
+        # 주기 또는 크기 임계값에 도달하면 flush
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                logger.exception("temp diary flush failed")
+
+    def stats(self) -> dict:
+        return {"pending": len(self.pending), "writes": self.writes, "flushed": self.flushed, "dropped": self.dropped}
+
+
+temp_buffer = TempDiaryBuffer()
@@ -0,0 +1,58 @@
+# 검증이 끝난 JWT 캐시
+# 같은 access_token 으로 반복 요청할 때 HMAC 검증과 User 조회를 다시 하지 않도록
+# 토큰 다이제스트를 키로 user_id 를 보관하는 LRU 캐시 (항목은 토큰의 exp 시점에 만료)
+import hashlib
+import time
+from collections import OrderedDict
+
+
+class TokenCache:
+    def __init__(self, maxsize: int = 10000):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[bytes, tuple[int, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        # 토큰 원문 대신 다이제스트를 보관하여 메모리에 토큰이 남지 않도록 함
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> int | None:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        user_id, exp = entry
+        if exp <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return user_id
+
+    def set(self, token: str, user_id: int, exp: float):
+        key = self._key(token)
+        self._entries[key] = (user_id, exp)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def discard(self, token: str):
+        self._entries.pop(self._key(token), None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
@@ -0,0 +1,116 @@
+# 사용자 설정 조회/저장
+# 설정은 거의 모든 화면에서 필요하므로 크기 제한이 있는 TTL 캐시에서 읽고,
+# PATCH 로 바꿀 때는 DB 에 upsert 한 뒤 캐시에도 바로 기록(write-through)
+# (캐시는 워커 프로세스별이므로 다른 워커에는 최대 SETTINGS_CACHE_TTL 초 뒤에 반영됨)
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+from sqlalchemy import select
+
+from .database import SessionLocal, upsert
+from .models import Setting
+
+SETTINGS_CACHE_SIZE = int(os.getenv("SETTINGS_CACHE_SIZE", 10000))
+SETTINGS_CACHE_TTL = float(os.getenv("SETTINGS_CACHE_TTL", 300))  # 캐시 유지 시간(초)
+SETTINGS_BATCH = int(os.getenv("SETTINGS_BATCH", 1000))  # 여러 사용자 조회 시 한 번에 읽을 최대 수
+
+# 설정 행이 없는 사용자의 기본값
+DEFAULT_SETTINGS = {"dark_mode": False, "notification": False}
+
+
+class SettingsCache:
+    def __init__(self, maxsize: int = SETTINGS_CACHE_SIZE, ttl: float = SETTINGS_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: OrderedDict[int, tuple[dict, float]] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, user_id: int) -> dict | None:
+        entry = self._entries.get(user_id)
+        if entry is None or entry[1] <= time.monotonic():
+            self.misses += 1
+            return None
+        self._entries.move_to_end(user_id)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, user_id: int, values: dict):
+        self._entries[user_id] = (values, time.monotonic() + self.ttl)
+        self._entries.move_to_end(user_id)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def discard(self, user_id: int):
+        self._entries.pop(user_id, None)
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / total if total else 0.0,
+        }
+
+
+settings_cache = SettingsCache()
+
+
+def setting_values(row) -> dict:
+    return {
+        "dark_mode": bool(row.dark_mode) if row.dark_mode is not None else DEFAULT_SETTINGS["dark_mode"],
+        "notification": bool(row.notification) if row.notification is not None else DEFAULT_SETTINGS["notification"],
+    }
+
+
+async def get_settings_many(user_ids: list[int], db=None) -> dict[int, dict]:
+    # 배치 작업용 : 캐시에 없는 사용자만 IN 조회로 한 번에 읽어 캐시에 채움
+    found = {}
+    missing = []
+    for user_id in dict.fromkeys(user_ids):
+        values = settings_cache.get(user_id)
+        if values is None:
+            missing.append(user_id)
+        else:
+            found[user_id] = values
+    if not missing:
+        return found
+
+    async def load(session):
+        for offset in range(0, len(missing), SETTINGS_BATCH):
+            chunk = missing[offset:offset + SETTINGS_BATCH]
+            result = await session.execute(
+                select(Setting.user_id, Setting.dark_mode, Setting.notification).where(Setting.user_id.in_(chunk))
+            )
+            rows = {row.user_id: setting_values(row) for row in result}
+            for user_id in chunk:
+                found[user_id] = rows.get(user_id, dict(DEFAULT_SETTINGS))
+                settings_cache.set(user_id, found[user_id])
+
+    if db is not None:
+        await load(db)
+    else:
+        async with SessionLocal() as session:
+            await load(session)
+    return found
+
+
+async def get_settings(user_id: int, db=None) -> dict:
+    return (await get_settings_many([user_id], db))[user_id]
+
+
+async def save_settings(db, user_id: int, changes: dict) -> dict:
+    # 바뀐 컬럼만 갱신하는 upsert 후 커밋하고 캐시에 바로 기록
+    values = {**await get_settings(user_id, db), **changes}
+    if changes:
+        now = datetime.now()
+        row = {"user_id": user_id, **values, "created_at": now, "updated_at": now}
+        await db.execute(
+            upsert(Setting, [row], ["user_id"], lambda new: {**{key: new[key] for key in changes}, "updated_at": new["updated_at"]})
+        )
+        await db.commit()
+    settings_cache.set(user_id, values)
+    return values
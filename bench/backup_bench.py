@@ -0,0 +1,174 @@
+# 다이어리 내보내기/가져오기 벤치마크
+# 하루 한 편씩 --years 년 동안 쓴 계정(기본 10년 = 3650편)을 DATABASE_URL 의 DB 에 채운 뒤
+# NDJSON/zip 내보내기와 NDJSON 가져오기의 처리량(rows/s, MB/s)과 파이썬 메모리 최대 사용량을 측정
+#
+# 실행 (alembic upgrade head 가 끝난 DB 에서):
+#   python -m bench.backup_bench --years 10 --images 300
+#   python -m bench.backup_bench --skip-seed
+import argparse
+import asyncio
+import io
+import json
+import random
+import time
+import tracemalloc
+from datetime import date, datetime, timedelta
+
+from PIL import Image as PILImage
+from sqlalchemy import delete, insert, select
+
+from app.backup import export_ndjson, export_zip, import_diaries, ndjson_lines
+from app.api.diaries import import_values
+from app.database import engine, SessionLocal
+from app.image_store import image_store, image_url, thumbnail_url
+from app.models import Diary, DiaryStat, Image, User
+from bench.search_bench import sentence
+
+EXPORT_USER = "bench-backup-export"
+IMPORT_USER = "bench-backup-import"
+
+
+async def bench_user(kakao_id: str) -> int:
+    async with SessionLocal() as db:
+        user_id = (await db.execute(select(User.user_id).where(User.kakao_id == kakao_id))).scalar()
+        if user_id is None:
+            await db.execute(insert(User), [{"kakao_id": kakao_id, "created_at": datetime.now()}])
+            await db.commit()
+            user_id = (await db.execute(select(User.user_id).where(User.kakao_id == kakao_id))).scalar()
+    return user_id
+
+
+async def seed(user_id: int, years: int, images: int, batch: int):
+    # 일기 하루 한 편 (10년 = 3650편), 그중 images 편에 서로 다른 저장소 이미지(약 30KB JPEG)
+    rng = random.Random(42)
+    first = date.today() - timedelta(days=365 * years)
+    days = 365 * years
+    with_image = set(rng.sample(range(days), min(images, days)))
+    digests = {}
+    for i in sorted(with_image):
+        buffer = io.BytesIO()
+        PILImage.effect_noise((160, 160), 64 + i % 64).convert("RGB").save(buffer, "JPEG", quality=90)
+        digests[i] = await image_store.save_bytes(buffer.getvalue())
+
+    for offset in range(0, days, batch):
+        rows = []
+        for i in range(offset, min(offset + batch, days)):
+            created = datetime.combine(first + timedelta(days=i), datetime.min.time()) + timedelta(hours=21)
+            rows.append({
+                "user_id": user_id,
+                "title": sentence(rng)[:40],
+                "content": " ".join(sentence(rng) for _ in range(rng.randint(3, 10))),
+                "weather": rng.randint(1, 6),
+                "emotion": rng.randint(1, 6),
+                "diary_date": first + timedelta(days=i),
+                "thumbnail_url": thumbnail_url(digests[i]) if i in digests else None,
+                "created_at": created,
+                "updated_at": created,
+                "is_deleted": False,
+                "like": rng.random() < 0.2,
+            })
+        async with SessionLocal() as db:
+            await db.execute(insert(Diary), rows)
+            result = await db.execute(
+                select(Diary.diary_id, Diary.diary_date)
+                .where(Diary.user_id == user_id, Diary.diary_date.in_([row["diary_date"] for row in rows]))
+            )
+            image_rows = [
+                {"diary_id": diary_id, "image_url": image_url(digests[(diary_date - first).days]), "created_at": datetime.now(),
+                 "is_temp": False, "is_active": True, "is_deleted": False}
+                for diary_id, diary_date in result if (diary_date - first).days in digests
+            ]
+            if image_rows:
+                await db.execute(insert(Image), image_rows)
+            await db.commit()
+    print(f"seeded {days} diaries, {len(digests)} images", flush=True)
+
+
+async def clear(user_id: int):
+    async with SessionLocal() as db:
+        ids = select(Diary.diary_id).where(Diary.user_id == user_id)
+        await db.execute(delete(Image).where(Image.diary_id.in_(ids)))
+        await db.execute(delete(Diary).where(Diary.user_id == user_id))
+        await db.execute(delete(DiaryStat).where(DiaryStat.user_id == user_id))
+        await db.commit()
+
+
+async def measure(name: str, work, reset=None) -> dict:
+    # tracemalloc 을 켜면 느려지므로 처리량과 메모리 최대 사용량은 따로 실행하여 측정
+    if reset:
+        await reset()
+    start = time.perf_counter()
+    rows, size = await work()
+    elapsed = time.perf_counter() - start
+    if reset:
+        await reset()
+    tracemalloc.start()
+    await work()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    result = {
+        "rows": rows,
+        "bytes": size,
+        "seconds": round(elapsed, 3),
+        "rows_per_s": round(rows / elapsed),
+        "mb_per_s": round(size / elapsed / 1024 / 1024, 1),
+        "peak_python_mb": round(peak / 1024 / 1024, 2),
+    }
+    print(name, json.dumps(result), flush=True)
+    return result
+
+
+async def run(export_user: int, import_user: int) -> dict:
+    results = {"dialect": engine.dialect.name}
+    # 가져오기 입력으로 다시 사용할 내보내기 결과
+    exported = [chunk async for chunk in export_ndjson(export_user)]
+    total = sum(chunk.count(b"\n") for chunk in exported)
+
+    async def ndjson():
+        size = rows = 0
+        async for chunk in export_ndjson(export_user):
+            size += len(chunk)
+            rows += chunk.count(b"\n")
+        return rows, size
+
+    async def zip():
+        size = 0
+        async for chunk in export_zip(export_user):
+            size += len(chunk)
+        return total, size
+
+    async def import_ndjson():
+        async def chunks():
+            for chunk in exported:
+                yield chunk
+
+        async with SessionLocal() as db:
+            result = await import_diaries(db, import_user, ndjson_lines(chunks()), import_values)
+        return result["imported"], sum(map(len, exported))
+
+    results["export_ndjson"] = await measure("export_ndjson", ndjson)
+    results["export_zip"] = await measure("export_zip", zip)
+    results["import_ndjson"] = await measure("import_ndjson", import_ndjson, lambda: clear(import_user))
+    return results
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--images", type=int, default=300)
+    parser.add_argument("--batch", type=int, default=1_000)
+    parser.add_argument("--skip-seed", action="store_true", help="이미 채워진 bench 데이터를 사용")
+    args = parser.parse_args()
+
+    export_user = await bench_user(EXPORT_USER)
+    import_user = await bench_user(IMPORT_USER)
+    if not args.skip_seed:
+        await clear(export_user)
+        await seed(export_user, args.years, args.images, args.batch)
+
+    print(json.dumps(await run(export_user, import_user), indent=2))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
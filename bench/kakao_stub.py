@@ -0,0 +1,44 @@
+# 로컬 카카오 OAuth 스텁 서버
+# 네트워크 없이 로그인/로그아웃 지연 시간을 측정하기 위해 사용
+#
+# 실행:
+#   uvicorn bench.kakao_stub:app --port 9000
+#   KAKAO_AUTH_HOST=http://127.0.0.1:9000 KAKAO_API_HOST=http://127.0.0.1:9000 uvicorn app.main:app
+import asyncio
+import os
+from urllib.parse import parse_qs
+
+from fastapi import FastAPI, Header, HTTPException, Request
+
+app = FastAPI()
+
+# 카카오 응답 지연을 흉내내기 위한 인위적인 대기 시간(초)
+STUB_DELAY = float(os.getenv("KAKAO_STUB_DELAY", 0))
+
+
+def _kakao_id(authorization: str | None) -> int:
+    if not authorization or not authorization.startswith("Bearer stub-"):
+        raise HTTPException(status_code=401, detail="invalid token")
+    return int(authorization.removeprefix("Bearer stub-"))
+
+
+# 인가 코드(code)를 그대로 카카오 사용자 id 로 사용
+@app.post("/oauth/token")
+async def token(request: Request):
+    await asyncio.sleep(STUB_DELAY)
+    form = parse_qs((await request.body()).decode())
+    code = form.get("code", ["0"])[0]
+    return {"access_token": f"stub-{int(code)}", "token_type": "bearer", "expires_in": 21599}
+
+
+@app.get("/v2/user/me")
+async def user_me(authorization: str | None = Header(None)):
+    await asyncio.sleep(STUB_DELAY)
+    kakao_id = _kakao_id(authorization)
+    return {"id": kakao_id, "properties": {"nickname": f"user{kakao_id}"}}
+
+
+@app.post("/v1/user/unlink")
+async def unlink(authorization: str | None = Header(None)):
+    await asyncio.sleep(STUB_DELAY)
+    return {"id": _kakao_id(authorization)}
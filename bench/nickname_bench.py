@@ -0,0 +1,123 @@
+# 닉네임 사용 가능 여부 확인 벤치마크
+# 사용자 N 명을 DATABASE_URL 의 DB 에 채운 뒤 닉네임 필터 생성 시간/메모리와
+# DB 만 조회할 때 / 필터를 먼저 확인할 때의 지연 시간, 오탐률, DB 조회 비율을 비교
+#
+# 실행 (alembic upgrade head 가 끝난 MySQL 에서):
+#   python -m bench.nickname_bench --users 2000000
+#   python -m bench.nickname_bench --skip-seed --queries 5000 --taken-ratio 0.3
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from datetime import datetime
+
+from sqlalchemy import func, insert, select
+
+from app.database import engine, SessionLocal
+from app.models import User
+from app.nicknames import NicknameRegistry, normalize
+
+PREFIX = "nickbench"
+
+
+async def seed(users: int, batch: int):
+    now = datetime.now()
+    start = time.perf_counter()
+    for offset in range(0, users, batch):
+        rows = [
+            {"kakao_id": f"{PREFIX}-{i}", "nickname": f"{PREFIX}{i}", "created_at": now, "updated_at": now}
+            for i in range(offset, min(offset + batch, users))
+        ]
+        async with SessionLocal() as db:
+            await db.execute(insert(User), rows)
+            await db.commit()
+        done = offset + len(rows)
+        print(f"seeded {done}/{users} ({done / (time.perf_counter() - start):.0f} rows/s)", flush=True)
+
+
+def percentiles(latencies: list[float]) -> dict:
+    latencies = sorted(latencies)
+    return {
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1],
+        "max_ms": latencies[-1],
+    }
+
+
+async def run(registry: NicknameRegistry, queries: int, users: int, taken_ratio: float, batch_size: int):
+    rng = random.Random(7)
+    # 사용 중인 닉네임과 새 닉네임을 taken_ratio 비율로 섞어 요청
+    names = [
+        f"{PREFIX}{rng.randrange(users)}" if rng.random() < taken_ratio else f"new{rng.getrandbits(48):x}"
+        for _ in range(queries * batch_size)
+    ]
+    batches = [names[i:i + batch_size] for i in range(0, len(names), batch_size)]
+
+    async def measure(check) -> tuple[list[float], list[dict]]:
+        latencies, results = [], []
+        async with SessionLocal() as db:
+            for names in batches:
+                start = time.perf_counter()
+                results.append(await check(db, names))
+                latencies.append((time.perf_counter() - start) * 1000)
+        return latencies, results
+
+    async def db_only(db, names):
+        result = await db.execute(select(User.nickname).where(User.nickname.in_(names)))
+        found = set(result.scalars())
+        return {name: name not in found for name in names}
+
+    db_latencies, expected = await measure(db_only)
+    registry.checks = registry.db_checks = 0
+    filter_latencies, actual = await measure(registry.available)
+
+    free = [name for result in expected for name, available in result.items() if available]
+    false_positives = sum(normalize(name) in registry.filter for name in free)
+    return {
+        "dialect": engine.dialect.name,
+        "queries": queries,
+        "batch_size": batch_size,
+        "taken_ratio": taken_ratio,
+        "mismatches": sum(a != e for a, e in zip(actual, expected)),
+        "false_positive_rate": false_positives / len(free) if free else 0.0,
+        "db_check_ratio": registry.db_checks / registry.checks,
+        "db_only": percentiles(db_latencies),
+        "filter": percentiles(filter_latencies),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=2_000_000)
+    parser.add_argument("--batch", type=int, default=10_000)
+    parser.add_argument("--queries", type=int, default=2_000)
+    parser.add_argument("--batch-size", type=int, default=1, help="요청 하나에 확인할 닉네임 수")
+    parser.add_argument("--taken-ratio", type=float, default=0.2, help="이미 사용 중인 닉네임을 요청하는 비율")
+    parser.add_argument("--skip-seed", action="store_true", help="이미 채워진 bench 데이터를 사용")
+    args = parser.parse_args()
+
+    if args.skip_seed:
+        async with SessionLocal() as db:
+            args.users = (await db.execute(select(func.count()).select_from(User).where(User.kakao_id.like(f"{PREFIX}-%")))).scalar()
+    else:
+        await seed(args.users, args.batch)
+
+    registry = NicknameRegistry()
+    start = time.perf_counter()
+    items = await registry.rebuild()
+    build = {
+        "nicknames": items,
+        "build_s": time.perf_counter() - start,
+        "filter_bytes": len(registry.filter.bits),
+        "hashes": registry.filter.hashes,
+    }
+
+    print(json.dumps({"build": build, **await run(registry, args.queries, args.users, args.taken_ratio, args.batch_size)}, indent=2))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
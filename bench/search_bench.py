@@ -0,0 +1,116 @@
+# 다이어리 검색 벤치마크
+# 합성 한국어 코퍼스를 DATABASE_URL 의 DB 에 채운 뒤 search_query 의 지연 시간을 측정
+#
+# 실행 (alembic upgrade head 가 끝난 MySQL 에서):
+#   python -m bench.search_bench --diaries 3000000 --users 20000
+#   python -m bench.search_bench --skip-seed --queries 2000
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import time
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import func, insert, select
+
+from app.api.diaries import CREATED_KEYS, LIST_COLUMNS
+from app.database import engine, SessionLocal
+from app.models import Diary, User
+from app.pagination import paginate
+from app.search import search_query
+
+WORDS = (
+    "산책 공원 강아지 고양이 친구 가족 학교 회사 점심 저녁 커피 케이크 비 눈 바람 햇살 "
+    "영화 음악 책 여행 바다 산 버스 지하철 운동 수영 자전거 시험 숙제 생일 선물 떡볶이 "
+    "김밥 라면 치킨 피자 행복 슬픔 화남 즐거움 피곤 졸림 설렘 걱정 감사 사랑 추억 꿈"
+).split()
+ENDINGS = ["했다", "했어요", "갔다", "먹었다", "봤다", "좋았다", "싫었다", "재밌었다"]
+
+
+def sentence(rng: random.Random) -> str:
+    return " ".join(f"{rng.choice(WORDS)}{rng.choice(['', '을', '를', '에서', '와', '이랑'])}" for _ in range(rng.randint(3, 8))) + " " + rng.choice(ENDINGS) + "."
+
+
+async def seed(diaries: int, users: int, batch: int):
+    rng = random.Random(42)
+    now = datetime.now()
+    async with SessionLocal() as db:
+        await db.execute(insert(User), [{"kakao_id": f"bench-{i}", "nickname": f"bench{i}", "created_at": now} for i in range(users)])
+        await db.commit()
+        first_user = (await db.execute(select(func.min(User.user_id)).where(User.kakao_id.like("bench-%")))).scalar()
+
+    start = time.perf_counter()
+    for offset in range(0, diaries, batch):
+        rows = []
+        for _ in range(min(batch, diaries - offset)):
+            day = date(2015, 1, 1) + timedelta(days=rng.randrange(3650))
+            rows.append({
+                "user_id": first_user + rng.randrange(users),
+                "title": " ".join(rng.sample(WORDS, 2)),
+                "content": " ".join(sentence(rng) for _ in range(rng.randint(3, 10))),
+                "weather": rng.randint(1, 6),
+                "emotion": rng.randint(1, 6),
+                "diary_date": day,
+                "created_at": now,
+                "updated_at": now,
+                "is_deleted": rng.random() < 0.05,
+                "like": rng.random() < 0.2,
+            })
+        async with SessionLocal() as db:
+            await db.execute(insert(Diary), rows)
+            await db.commit()
+        done = offset + len(rows)
+        print(f"seeded {done}/{diaries} ({done / (time.perf_counter() - start):.0f} rows/s)", flush=True)
+    return first_user
+
+
+async def run(queries: int, users: int, first_user: int, page_size: int):
+    rng = random.Random(7)
+    dialect = engine.dialect.name
+    latencies = []
+    hits = 0
+    for _ in range(queries):
+        keyword = " ".join(rng.sample(WORDS, rng.choice([1, 1, 2])))
+        user_id = first_user + rng.randrange(users)
+        query = paginate(search_query(user_id, keyword, dialect, LIST_COLUMNS), CREATED_KEYS, "bench", None, page_size)
+        async with SessionLocal() as db:
+            start = time.perf_counter()
+            rows = (await db.execute(query)).all()
+            latencies.append((time.perf_counter() - start) * 1000)
+        hits += bool(rows)
+
+    latencies.sort()
+    return {
+        "dialect": dialect,
+        "queries": queries,
+        "hit_ratio": hits / queries,
+        "p50_ms": statistics.median(latencies),
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1],
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1],
+        "max_ms": latencies[-1],
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--diaries", type=int, default=3_000_000)
+    parser.add_argument("--users", type=int, default=20_000)
+    parser.add_argument("--batch", type=int, default=5_000)
+    parser.add_argument("--queries", type=int, default=1_000)
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--skip-seed", action="store_true", help="이미 채워진 bench 데이터를 사용")
+    args = parser.parse_args()
+
+    if args.skip_seed:
+        async with SessionLocal() as db:
+            first_user = (await db.execute(select(func.min(User.user_id)).where(User.kakao_id.like("bench-%")))).scalar()
+    else:
+        first_user = await seed(args.diaries, args.users, args.batch)
+
+    print(json.dumps(await run(args.queries, args.users, first_user, args.page_size), indent=2))
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
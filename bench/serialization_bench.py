@@ -0,0 +1,95 @@
+# 응답 직렬화 마이크로 벤치마크
+# 응답 형태(상세, 캘린더 한 달, 목록 수백 개)별로 DB 조회 결과(row)에서 응답 bytes 를 만드는 데 드는 시간을 비교
+#
+# 실행:
+#   python -m bench.serialization_bench --items 300
+import argparse
+import json
+import os
+import timeit
+from collections import namedtuple
+from datetime import date, timedelta
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import TypeAdapter
+
+from app.api.diaries import (
+    CalendarItem,
+    CalendarResponse,
+    DiaryDetail,
+    DiaryDetailResponse,
+    DiaryListItem,
+    DiaryListResponse,
+    calendar_item,
+    list_item,
+)
+
+THUMB = "/api/v1/images/fb792097d298f3dca2562ad1f6fbbff4f33ffd7b6182c7c98ac50a55d6cd9abe/thumb"
+Row = namedtuple("Row", "diary_id diary_date title thumbnail_url like")
+
+
+def rows(count: int) -> list[Row]:
+    first = date(2024, 1, 1)
+    return [Row(i, first + timedelta(days=i), f"신나는 산책을 했따 {i}", THUMB, i % 3 == 0) for i in range(count)]
+
+
+def detail_dict(row: Row) -> dict:
+    return {"id": row.diary_id, "date": row.diary_date, "nickname": "팡팡이", "mood": 1, "weather": 3,
+            "title": row.title, "image": row.thumbnail_url, "story": "아침에 쿨쿨자고 " * 100}
+
+
+# 응답 형태별 (응답 모델, 항목 모델, row → dict 변환, 조회 결과)
+def shapes(items: int):
+    return {
+        "detail": (DiaryDetailResponse, DiaryDetail, detail_dict, rows(1)),
+        "calendar": (CalendarResponse, CalendarItem, calendar_item, rows(31)),
+        "list": (DiaryListResponse, DiaryListItem, list_item, rows(items)),
+    }
+
+
+def envelope(data, is_detail: bool) -> dict:
+    return {"status": 200, "message": "조회 완료", "data": data[0] if is_detail else data, **({} if is_detail else {"next_cursor": None})}
+
+
+def strategies(response_model, item_model, to_dict, result):
+    adapter = TypeAdapter(response_model)
+    is_detail = response_model is DiaryDetailResponse
+
+    def build_models():
+        items = [item_model(**to_dict(row)) for row in result]
+        return response_model(**envelope(items, is_detail))
+
+    return {
+        # 이전 방식 : dict 반환 → jsonable_encoder → json.dumps
+        "dict+jsonable_encoder": lambda: JSONResponse(jsonable_encoder(envelope([to_dict(r) for r in result], is_detail))).body,
+        # dict 반환 + response_model 선언 : 모델로 검증 후 다시 직렬화
+        "dict+response_model": lambda: JSONResponse(
+            adapter.dump_python(adapter.validate_python(envelope([to_dict(r) for r in result], is_detail)), mode="json")
+        ).body,
+        # 모델 인스턴스를 만든 뒤 pydantic-core 로 직렬화
+        "model+pydantic_json": lambda: build_models().model_dump_json().encode(),
+        # dict 를 orjson 으로 바로 직렬화 (현재 방식)
+        "dict+ORJSONResponse": lambda: ORJSONResponse(envelope([to_dict(r) for r in result], is_detail)).body,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--items", type=int, default=300, help="목록 응답의 항목 수")
+    parser.add_argument("--number", type=int, default=200)
+    args = parser.parse_args()
+
+    results = {}
+    for shape, spec in shapes(args.items).items():
+        results[shape] = {}
+        for name, fn in strategies(*spec).items():
+            best = min(timeit.repeat(fn, number=args.number, repeat=5)) / args.number
+            results[shape][name] = {"us_per_response": round(best * 1e6, 2), "bytes": len(fn())}
+    print(json.dumps(results, indent=2, ensure_ascii=False))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+# 시작/종료/재시작 벤치마크 (Linux)
+# app.serve(앱을 마스터에서 한 번 임포트한 뒤 fork)와 uvicorn --workers(워커마다 앱을 다시 임포트)를 비교
+# - import_s        : python 프로세스에서 app.main 임포트에 걸린 시간 (중앙값)
+# - ready_s         : 프로세스 시작부터 모든 워커의 lifespan 시작이 끝날 때까지
+# - pss_mb          : 마스터 + 워커의 PSS 합 (공유 페이지는 나누어 계산) / uss_mb_per_worker : 워커 고유 메모리
+# - reload          : SIGHUP 으로 워커를 모두 교체하는 동안 보낸 요청 수와 실패 수 (app.serve 만)
+#                     이전 워커가 쉬고 있는 keep-alive 연결을 닫는 순간 그 연결로 요청을 보내면 연결이 끊길 수 있음
+#                     (프록시/브라우저는 GET 같은 멱등 요청을 다시 보내지만 이 벤치는 재시도하지 않고 실패로 셈)
+# - shutdown_s      : SIGTERM 부터 프로세스 종료까지 (DRAIN_DELAY=0)
+#
+# 실행:
+#   python -m bench.startup_bench --workers 4
+import argparse
+import json
+import os
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def children(pid: int) -> list[int]:
+    pids = []
+    for task in os.listdir(f"/proc/{pid}/task"):
+        with open(f"/proc/{pid}/task/{task}/children") as f:
+            for child in f.read().split():
+                pids.append(int(child))
+                pids.extend(children(int(child)))
+    return pids
+
+
+def memory(pid: int) -> tuple[float, float]:
+    # (PSS, USS) MB
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[2] == "kB":
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return values["Pss"] / 1024, (values["Private_Clean"] + values["Private_Dirty"]) / 1024
+
+
+def import_time(env: dict, runs: int) -> float:
+    code = "import time; t = time.perf_counter(); import app.main; print(time.perf_counter() - t)"
+    return statistics.median(
+        float(subprocess.run([sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True).stdout)
+        for _ in range(runs)
+    )
+
+
+def wait_started(process: subprocess.Popen, workers: int, timeout: float = 60) -> None:
+    # 워커마다 한 번씩 찍히는 uvicorn 시작 완료 로그를 셈
+    started = 0
+    deadline = time.monotonic() + timeout
+    while started < workers:
+        line = process.stderr.readline()
+        if not line or time.monotonic() > deadline:
+            raise RuntimeError("서버가 시작되지 않았습니다.")
+        started += "Application startup complete" in line
+    threading.Thread(target=lambda: [None for _ in process.stderr], daemon=True).start()  # 나머지 로그는 버림
+
+
+def hammer(url: str, stop: threading.Event, result: dict) -> None:
+    with httpx.Client(timeout=10) as client:
+        while not stop.is_set():
+            try:
+                ok = client.get(url).status_code == 200
+            except httpx.TransportError:
+                ok = False
+            result["requests"] += 1
+            result["errors"] += not ok
+
+
+def run(mode: str, workers: int, port: int, env: dict) -> dict:
+    if mode == "serve":
+        command = [sys.executable, "-m", "app.serve", "--port", str(port), "--workers", str(workers)]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--workers", str(workers)]
+    start = time.perf_counter()
+    # 접근 로그(stdout)는 버리고 시작 완료 로그(stderr)만 읽음
+    process = subprocess.Popen(
+        command + ["--log-level", "info"], cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    try:
+        wait_started(process, workers)
+        ready = time.perf_counter() - start
+        base_url = f"http://127.0.0.1:{port}"
+        with httpx.Client() as client:
+            for _ in range(200):
+                client.get(f"{base_url}/")
+
+        pids = [process.pid] + children(process.pid)
+        usage = [memory(pid) for pid in pids]
+        worker_uss = [uss for pid, (_, uss) in zip(pids, usage) if pid != process.pid]
+        result = {
+            "ready_s": round(ready, 2),
+            "processes": len(pids),
+            "pss_mb": round(sum(pss for pss, _ in usage), 1),
+            "uss_mb_per_worker": round(statistics.mean(worker_uss), 1) if worker_uss else None,
+        }
+
+        if mode == "serve":
+            # 요청을 계속 보내는 동안 모든 워커 교체
+            stop = threading.Event()
+            counts = {"requests": 0, "errors": 0}
+            threads = [threading.Thread(target=hammer, args=(f"{base_url}/", stop, counts)) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            time.sleep(1)
+            reload_start = time.perf_counter()
+            process.send_signal(signal.SIGHUP)
+            while len([pid for pid in children(process.pid) if pid not in pids]) < workers:
+                time.sleep(0.05)
+            reload = time.perf_counter() - reload_start
+            time.sleep(1)
+            stop.set()
+            for thread in threads:
+                thread.join()
+            result["reload"] = {"seconds": round(reload, 2), **counts}
+    finally:
+        shutdown_start = time.perf_counter()
+        process.send_signal(signal.SIGTERM)
+        process.wait(timeout=60)
+    result["shutdown_s"] = round(time.perf_counter() - shutdown_start, 2)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--imports", type=int, default=5, help="임포트 시간 측정 반복 수")
+    parser.add_argument("--database-url", help="기본값: 임시 디렉터리의 SQLite 파일")
+    parser.add_argument("--port", type=int, default=8770)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="ddrawry-bench-")
+    env = {
+        **os.environ,
+        "DATABASE_URL": args.database_url or f"sqlite:///{workdir}/bench.db",
+        "JWT_SECRET": os.getenv("JWT_SECRET", "bench-secret-bench-secret-bench-secret"),
+        "KAKAO_CLIENT_ID": "bench",
+        "KAKAO_REDIRECT_URI": "http://localhost/callback",
+        "IMAGE_STORE_DIR": os.path.join(workdir, "images"),
+        "RATE_LIMIT_ENABLED": "false",
+        "DRAIN_DELAY": "0",
+    }
+    try:
+        subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=ROOT, env=env, check=True, capture_output=True)
+        result = {
+            "workers": args.workers,
+            "import_s": round(import_time(env, args.imports), 3),
+            "serve": run("serve", args.workers, args.port, env),
+            "uvicorn": run("uvicorn", args.workers, args.port + 1, env),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    print(json.dumps(result, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""token indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17 14:35:02.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_token_user_expires_created', 'token', ['user_id', 'expires_at', 'created_at'], unique=False)
+    op.create_index('ix_token_expires_at', 'token', ['expires_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_token_expires_at', table_name='token')
+    op.drop_index('ix_token_user_expires_created', table_name='token')
@@ -0,0 +1,34 @@
+"""diary date column and month index
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17 15:02:41.530712
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('diary', sa.Column('diary_date', sa.Date(), nullable=True))
+    op.add_column('diary', sa.Column('thumbnail_url', sa.String(length=255), nullable=True))
+    # 기존 행은 작성일을 일기 날짜로 사용
+    op.execute("UPDATE diary SET diary_date = DATE(created_at) WHERE diary_date IS NULL")
+    op.execute("UPDATE diary SET is_deleted = false WHERE is_deleted IS NULL")
+    op.execute("UPDATE diary SET `like` = false WHERE `like` IS NULL")
+    op.create_index('ix_diary_user_deleted_date', 'diary', ['user_id', 'is_deleted', 'diary_date'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_diary_user_deleted_date', table_name='diary')
+    op.drop_column('diary', 'thumbnail_url')
+    op.drop_column('diary', 'diary_date')
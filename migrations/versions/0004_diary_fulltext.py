@@ -0,0 +1,32 @@
+"""diary ngram fulltext index
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17 15:40:12.904117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # ngram 파서는 MySQL 전용 (개발용 SQLite 는 LIKE 검색 사용)
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    op.create_index('ft_diary_title_content', 'diary', ['title', 'content'], unique=False,
+                    mysql_prefix='FULLTEXT', mysql_with_parser='ngram')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'mysql':
+        return
+    op.drop_index('ft_diary_title_content', table_name='diary')
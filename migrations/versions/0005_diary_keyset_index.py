@@ -0,0 +1,26 @@
+"""diary keyset pagination index
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17 16:21:55.067341
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_diary_user_deleted_created', 'diary', ['user_id', 'is_deleted', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_diary_user_deleted_created', table_name='diary')
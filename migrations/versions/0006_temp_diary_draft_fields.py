@@ -0,0 +1,32 @@
+"""temp diary draft fields
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17 16:58:30.402518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.batch_alter_table('temp_diary') as batch_op:
+        batch_op.alter_column('diary_id', existing_type=sa.Integer(), nullable=True)
+        batch_op.add_column(sa.Column('diary_date', sa.Date(), nullable=True))
+        batch_op.add_column(sa.Column('image_url', sa.String(length=255), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('temp_diary') as batch_op:
+        batch_op.drop_column('image_url')
+        batch_op.drop_column('diary_date')
+        batch_op.alter_column('diary_id', existing_type=sa.Integer(), nullable=False)
@@ -0,0 +1,26 @@
+"""notification unread index
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17 19:02:41.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_notification_user_read_created', 'notification', ['user_id', 'is_read', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_notification_user_read_created', table_name='notification')
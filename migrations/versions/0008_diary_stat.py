@@ -0,0 +1,38 @@
+"""diary mood/weather monthly rollup
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17 20:11:37.402916
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('diary_stat',
+    sa.Column('stat_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('value', sa.Integer(), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['user.user_id'], ),
+    sa.PrimaryKeyConstraint('stat_id')
+    )
+    op.create_index('ux_diary_stat_user_month_kind_value', 'diary_stat', ['user_id', 'month', 'kind', 'value'], unique=True)
+    # 기존 일기는 python -m app.stats rebuild 로 채움
+
+
+def downgrade() -> None:
+    op.drop_index('ux_diary_stat_user_month_kind_value', table_name='diary_stat')
+    op.drop_table('diary_stat')
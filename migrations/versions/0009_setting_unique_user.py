@@ -0,0 +1,31 @@
+"""unique setting per user
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17 20:52:09.118730
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0009'
+down_revision: Union[str, None] = '0008'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 사용자별로 가장 최근 행만 남기고 중복 설정 삭제 (MySQL 은 같은 테이블 서브쿼리를 파생 테이블로 감싸야 함)
+    op.execute(
+        "DELETE FROM setting WHERE setting_id NOT IN "
+        "(SELECT setting_id FROM (SELECT MAX(setting_id) AS setting_id FROM setting GROUP BY user_id) AS latest)"
+    )
+    op.create_index('ux_setting_user_id', 'setting', ['user_id'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('ux_setting_user_id', table_name='setting')
@@ -0,0 +1,34 @@
+"""unique user nickname
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17 22:14:37.502816
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0010'
+down_revision: Union[str, None] = '0009'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 같은 닉네임은 가장 먼저 가입한 사용자만 유지하고 나머지는 비움 (다음 로그인 후 다시 설정)
+    # (MySQL 은 같은 테이블 서브쿼리를 파생 테이블로 감싸야 함)
+    op.execute(
+        "UPDATE user SET nickname = NULL WHERE nickname IS NOT NULL AND user_id NOT IN "
+        "(SELECT user_id FROM (SELECT MIN(user_id) AS user_id FROM user WHERE nickname IS NOT NULL GROUP BY nickname) AS first)"
+    )
+    op.create_index('ux_user_nickname', 'user', ['nickname'], unique=True)
+    op.create_index('ix_user_updated_at', 'user', ['updated_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_user_updated_at', table_name='user')
+    op.drop_index('ux_user_nickname', table_name='user')
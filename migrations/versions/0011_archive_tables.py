@@ -0,0 +1,80 @@
+"""archive tables
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17 23:02:47.493936
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0011'
+down_revision: Union[str, None] = '0010'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('diary_archive',
+    sa.Column('diary_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=True),
+    sa.Column('content', sa.Text(), nullable=True),
+    sa.Column('weather', sa.Integer(), nullable=True),
+    sa.Column('emotion', sa.Integer(), nullable=True),
+    sa.Column('diary_date', sa.Date(), nullable=True),
+    sa.Column('thumbnail_url', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(), nullable=True),
+    sa.Column('updated_at', sa.TIMESTAMP(), nullable=True),
+    sa.Column('is_deleted', sa.Boolean(), nullable=True),
+    sa.Column('like', sa.Boolean(), nullable=True),
+    sa.Column('archived_at', sa.TIMESTAMP(), nullable=False),
+    sa.PrimaryKeyConstraint('diary_id')
+    )
+    op.create_index('ix_diary_archive_archived_at', 'diary_archive', ['archived_at'], unique=False)
+    op.create_table('image_archive',
+    sa.Column('image_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('diary_id', sa.Integer(), nullable=False),
+    sa.Column('image_url', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(), nullable=True),
+    sa.Column('is_temp', sa.Boolean(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('is_deleted', sa.Boolean(), nullable=True),
+    sa.Column('archived_at', sa.TIMESTAMP(), nullable=False),
+    sa.PrimaryKeyConstraint('image_id')
+    )
+    op.create_index('ix_image_archive_archived_at', 'image_archive', ['archived_at'], unique=False)
+    op.create_index('ix_image_archive_diary_id', 'image_archive', ['diary_id'], unique=False)
+    op.create_table('temp_diary_archive',
+    sa.Column('temp_diary_id', sa.Integer(), autoincrement=False, nullable=False),
+    sa.Column('diary_id', sa.Integer(), nullable=True),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('title', sa.String(length=255), nullable=True),
+    sa.Column('content', sa.Text(), nullable=True),
+    sa.Column('weather', sa.String(length=50), nullable=True),
+    sa.Column('emotion', sa.String(length=50), nullable=True),
+    sa.Column('diary_date', sa.Date(), nullable=True),
+    sa.Column('image_url', sa.String(length=255), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(), nullable=True),
+    sa.Column('updated_at', sa.TIMESTAMP(), nullable=True),
+    sa.Column('is_deleted', sa.Boolean(), nullable=True),
+    sa.Column('archived_at', sa.TIMESTAMP(), nullable=False),
+    sa.PrimaryKeyConstraint('temp_diary_id')
+    )
+    op.create_index('ix_temp_diary_archive_archived_at', 'temp_diary_archive', ['archived_at'], unique=False)
+    op.create_index('ix_temp_diary_archive_diary_id', 'temp_diary_archive', ['diary_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_temp_diary_archive_diary_id', table_name='temp_diary_archive')
+    op.drop_index('ix_temp_diary_archive_archived_at', table_name='temp_diary_archive')
+    op.drop_table('temp_diary_archive')
+    op.drop_index('ix_image_archive_diary_id', table_name='image_archive')
+    op.drop_index('ix_image_archive_archived_at', table_name='image_archive')
+    op.drop_table('image_archive')
+    op.drop_index('ix_diary_archive_archived_at', table_name='diary_archive')
+    op.drop_table('diary_archive')
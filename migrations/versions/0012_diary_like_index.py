@@ -0,0 +1,26 @@
+"""diary like index
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17 23:41:12.208315
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0012'
+down_revision: Union[str, None] = '0011'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_diary_user_like_created', 'diary', ['user_id', 'like', 'is_deleted', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_diary_user_like_created', table_name='diary')
@@ -0,0 +1,51 @@
+"""image jobs
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-18 10:12:40.518203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0013'
+down_revision: Union[str, None] = '0012'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('image_job',
+    sa.Column('job_id', sa.String(length=32), nullable=False),
+    sa.Column('job_key', sa.String(length=64), nullable=False),
+    sa.Column('status', sa.String(length=10), nullable=False),
+    sa.Column('digest', sa.String(length=64), nullable=True),
+    sa.Column('error', sa.String(length=100), nullable=True),
+    sa.Column('created_at', sa.TIMESTAMP(), nullable=True),
+    sa.Column('updated_at', sa.TIMESTAMP(), nullable=True),
+    sa.PrimaryKeyConstraint('job_id')
+    )
+    op.create_index('ix_image_job_created_at', 'image_job', ['created_at'], unique=False)
+    op.create_index('ix_image_job_key_created', 'image_job', ['job_key', 'created_at'], unique=False)
+    op.create_table('image_job_user',
+    sa.Column('image_job_user_id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sa.String(length=32), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('diary_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['job_id'], ['image_job.job_id'], ),
+    sa.ForeignKeyConstraint(['user_id'], ['user.user_id'], ),
+    sa.PrimaryKeyConstraint('image_job_user_id')
+    )
+    op.create_index('ix_image_job_user_job_user', 'image_job_user', ['job_id', 'user_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_image_job_user_job_user', table_name='image_job_user')
+    op.drop_table('image_job_user')
+    op.drop_index('ix_image_job_key_created', table_name='image_job')
+    op.drop_index('ix_image_job_created_at', table_name='image_job')
+    op.drop_table('image_job')
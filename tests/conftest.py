@@ -0,0 +1,27 @@
+import os
+
+import pytest
+
+# 앱 모듈은 임포트할 때 환경 변수를 읽으므로 테스트용 기본값을 먼저 넣어 둠
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+os.environ.setdefault("JWT_SECRET", "test-secret")
+
+
+@pytest.fixture
+def session_db(tmp_path, monkeypatch):
+    # 모듈 전역 SessionLocal 을 쓰는 코드(temp_buffer, image_jobs 등)가 테스트마다 새 SQLite 파일을 쓰도록 기본 DB 엔진을 바꿈
+    # (테스트는 asyncio.run 마다 이벤트 루프가 바뀌므로 커넥션을 풀에 보관하지 않음)
+    from sqlalchemy import create_engine
+    from sqlalchemy.ext.asyncio import create_async_engine
+    from sqlalchemy.pool import NullPool
+
+    from app import database
+    from app.models import Base
+
+    path = tmp_path / "session.db"
+    sync_engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(sync_engine)
+    sync_engine.dispose()
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", poolclass=NullPool)
+    monkeypatch.setattr(database, "engine", engine)
+    return engine
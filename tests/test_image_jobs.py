@@ -0,0 +1,58 @@
+# 이미지 생성 작업 큐 : 같은 (프롬프트, 일기 내용) 요청 합치기와 큐가 가득 찼을 때 거절
+import asyncio
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.image_jobs import QUEUED, ImageJobQueue, QueueFull, prompt_cache
+from app.models import ImageJobUser, User
+
+
+async def setup(engine):
+    async with engine.begin() as conn:
+        await conn.execute(insert(User), [{"user_id": 1, "kakao_id": "1"}, {"user_id": 2, "kakao_id": "2"}])
+    prompt_cache.invalidate()
+
+
+def test_identical_submissions_share_one_job(session_db):
+    async def run():
+        await setup(session_db)
+        queue = ImageJobQueue(workers=0)
+        first = await queue.submit(1, "공원 산책")
+        second = await queue.submit(2, "공원 산책")
+        # 다른 워커 프로세스의 큐에서도 같은 작업으로 합류하고 상태를 조회할 수 있음
+        other = ImageJobQueue(workers=0)
+        third = await other.submit(2, "공원 산책")
+        async with session_db.connect() as conn:
+            users = (await conn.execute(select(ImageJobUser.user_id).where(ImageJobUser.job_id == first["job_id"]))).scalars().all()
+        return first, second, third, queue.queue.qsize(), other.queue.qsize(), users, await other.get(first["job_id"], 1)
+
+    first, second, third, queued, other_queued, users, status = asyncio.run(run())
+    assert first["job_id"] == second["job_id"] == third["job_id"]
+    assert first["status"] == QUEUED
+    assert (queued, other_queued) == (1, 0)
+    assert sorted(users) == [1, 2, 2]
+    assert status == first
+
+
+def test_job_is_hidden_from_other_users(session_db):
+    async def run():
+        await setup(session_db)
+        queue = ImageJobQueue(workers=0)
+        job = await queue.submit(1, "공원 산책")
+        return await queue.get(job["job_id"], 2)
+
+    assert asyncio.run(run()) is None
+
+
+def test_full_queue_rejects_new_jobs(session_db):
+    async def run():
+        await setup(session_db)
+        queue = ImageJobQueue(workers=0, max_queue=1)
+        await queue.submit(1, "첫 번째")
+        with pytest.raises(QueueFull):
+            await queue.submit(1, "두 번째")
+        # 이미 있는 작업에 합류하는 요청은 큐 자리를 쓰지 않음
+        return await queue.submit(2, "첫 번째")
+
+    assert asyncio.run(run())["status"] == QUEUED
@@ -0,0 +1,60 @@
+# 좋아요 토글 : 보관 중인 좋아요 집합이 다른 워커의 변경으로 오래된 경우에도 실제 상태를 뒤집어야 함
+import asyncio
+from datetime import datetime
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.likes import liked_ids, toggle_like
+from app.models import Diary, User
+
+
+async def setup(engine):
+    async with engine.begin() as conn:
+        await conn.execute(insert(User), [{"user_id": 1, "kakao_id": "1"}])
+        await conn.execute(insert(Diary), [
+            {"diary_id": 1, "user_id": 1, "title": "t", "content": "s", "created_at": datetime(2024, 8, 1), "is_deleted": False, "like": False}
+        ])
+    liked_ids.discard(1)
+
+
+async def toggle(engine, diary_id: int) -> bool | None:
+    async with AsyncSession(engine) as db:
+        bookmark = await toggle_like(db, 1, diary_id)
+        await db.commit()
+    if bookmark is not None:
+        liked_ids.apply(1, {diary_id: bookmark})
+    return bookmark
+
+
+async def stored_like(engine) -> bool:
+    async with engine.connect() as conn:
+        return (await conn.execute(select(Diary.like).where(Diary.diary_id == 1))).scalar()
+
+
+def test_toggle_flips_state(session_db):
+    async def run():
+        await setup(session_db)
+        return await toggle(session_db, 1), await toggle(session_db, 1), await stored_like(session_db)
+
+    assert asyncio.run(run()) == (True, False, False)
+
+
+def test_toggle_on_stale_cache_reads_the_row(session_db):
+    async def run():
+        await setup(session_db)
+        assert await toggle(session_db, 1) is True  # 이 워커의 집합 : {1}
+        # 다른 워커에서 좋아요를 취소
+        async with session_db.begin() as conn:
+            await conn.execute(update(Diary).where(Diary.diary_id == 1).values(like=False))
+        return await toggle(session_db, 1), await stored_like(session_db)
+
+    assert asyncio.run(run()) == (True, True)
+
+
+def test_toggle_missing_diary(session_db):
+    async def run():
+        await setup(session_db)
+        return await toggle(session_db, 99)
+
+    assert asyncio.run(run()) is None
@@ -0,0 +1,128 @@
+# 커서 페이지네이션 : 커서 인코딩/서명과, 페이지 사이에 새 일기가 들어와도 중복/누락이 없는지 확인
+import asyncio
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.models import Base, Diary, User
+from app.pagination import InvalidCursor, decode_cursor, encode_cursor, page, paginate
+
+CREATED_KEYS = [Diary.created_at, Diary.diary_id]
+DATE_KEYS = [Diary.diary_date, Diary.diary_id]
+START = datetime(2024, 8, 1, 21)
+
+
+def test_cursor_round_trip():
+    values = (datetime(2024, 8, 1, 21, 30, 5), date(2024, 8, 1), 42, "x")
+    assert decode_cursor("like:1", encode_cursor("like:1", values)) == list(values)
+
+
+@pytest.mark.parametrize("cursor", [
+    "",
+    "abc",
+    "a.b.c",
+    "abc.é",  # ASCII 가 아닌 서명
+    "!!!.abc",
+])
+def test_malformed_cursor(cursor):
+    with pytest.raises(InvalidCursor):
+        decode_cursor("like:1", cursor)
+
+
+def test_tampered_cursor():
+    cursor = encode_cursor("like:1", (START, 10))
+    body, signature = cursor.split(".")
+    forged = encode_cursor("like:1", (START, 99)).split(".")[0]
+    with pytest.raises(InvalidCursor):
+        decode_cursor("like:1", f"{forged}.{signature}")
+    with pytest.raises(InvalidCursor):
+        decode_cursor("like:1", f"{body}.{signature[:-1]}{'A' if signature[-1] != 'A' else 'B'}")
+    # 다른 사용자/조회에서 만든 커서
+    with pytest.raises(InvalidCursor):
+        decode_cursor("like:2", cursor)
+
+
+async def setup_db(tmp_path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/test.db")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(insert(User), [{"user_id": 1, "kakao_id": "1"}])
+    return engine
+
+
+async def add_diaries(engine, items: list[tuple[datetime, date]]):
+    async with engine.begin() as conn:
+        await conn.execute(insert(Diary), [
+            {"user_id": 1, "title": "t", "content": "s", "weather": 1, "emotion": 1, "diary_date": diary_date,
+             "created_at": created_at, "updated_at": created_at, "is_deleted": False, "like": True}
+            for created_at, diary_date in items
+        ])
+
+
+async def fetch(engine, keys, key_names, cursor, size, descending):
+    query = select(Diary.diary_id, Diary.created_at, Diary.diary_date).where(Diary.user_id == 1, Diary.is_deleted == False)
+    async with engine.connect() as conn:
+        rows = (await conn.execute(paginate(query, keys, "test", cursor, size, descending))).all()
+    return page(rows, key_names, "test", size)
+
+
+async def read_all(engine, keys, key_names, size, descending, between=None) -> list[int]:
+    # 모든 페이지를 읽으며 페이지 사이마다 between() 을 실행
+    ids = []
+    cursor = None
+    while True:
+        rows, cursor = await fetch(engine, keys, key_names, cursor, size, descending)
+        ids.extend(row.diary_id for row in rows)
+        if cursor is None:
+            return ids
+        if between:
+            await between()
+
+
+def test_newest_first_pages_ignore_new_diaries(tmp_path):
+    # 최신순 목록 : 읽는 도중 새로 쓴 일기(같은 작성 시각 포함)는 앞쪽에 들어가므로 남은 페이지에 섞이지 않아야 함
+    async def run():
+        engine = await setup_db(tmp_path)
+        await add_diaries(engine, [(START + timedelta(minutes=i // 2), date(2024, 8, 1)) for i in range(25)])
+        before = await read_all(engine, CREATED_KEYS, ["created_at", "diary_id"], 5, True)
+
+        inserted = 0
+
+        async def insert_newer():
+            nonlocal inserted
+            inserted += 1
+            # 가장 최근 일기와 작성 시각이 같은 일기는 diary_id 가 더 크므로 역시 앞쪽에 들어감
+            await add_diaries(engine, [(START + timedelta(minutes=30 + inserted), date(2024, 8, 2)), (START + timedelta(minutes=12), date(2024, 8, 2))])
+
+        during = await read_all(engine, CREATED_KEYS, ["created_at", "diary_id"], 5, True, insert_newer)
+        await engine.dispose()
+        return before, during, inserted
+
+    before, during, inserted = asyncio.run(run())
+    assert inserted == 4
+    assert len(before) == 25 == len(set(before))
+    assert during == before
+
+
+def test_oldest_first_pages_include_later_diaries_once(tmp_path):
+    # 날짜순 목록 : 읽는 도중 뒤쪽 날짜에 쓴 일기는 중복 없이 한 번만 나와야 함
+    async def run():
+        engine = await setup_db(tmp_path)
+        await add_diaries(engine, [(START, date(2024, 8, 1) + timedelta(days=i % 10)) for i in range(20)])
+        before = await read_all(engine, DATE_KEYS, ["diary_date", "diary_id"], 3, False)
+
+        async def insert_later():
+            await add_diaries(engine, [(START, date(2024, 8, 20))])
+
+        during = await read_all(engine, DATE_KEYS, ["diary_date", "diary_id"], 3, False, insert_later)
+        async with engine.connect() as conn:
+            added = (await conn.execute(select(Diary.diary_id).where(Diary.diary_date == date(2024, 8, 20)))).scalars().all()
+        await engine.dispose()
+        return before, during, added
+
+    before, during, added = asyncio.run(run())
+    assert len(during) == len(set(during))
+    assert during[:len(before)] == before
+    assert during[len(before):] == sorted(added)
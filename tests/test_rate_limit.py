@@ -0,0 +1,92 @@
+# 요청 속도 제한 : 토큰 버킷, 429/503 응답과 Retry-After, 로그인 사용자 구분
+import asyncio
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from app import rate_limit
+from app.api.auth import token_cache
+from app.rate_limit import Limiter, MemoryBackend, RateLimitMiddleware, client_key
+
+
+def test_bucket_allows_burst_then_asks_to_wait():
+    async def run():
+        backend = MemoryBackend()
+        waits = [await backend.take("k", 2, 3) for _ in range(4)]
+        other = await backend.take("other", 2, 3)
+        return waits, other
+
+    waits, other = asyncio.run(run())
+    assert waits[:3] == [0, 0, 0]
+    assert 0 < waits[3] <= 0.5  # 초당 2개씩 다시 채워짐
+    assert other == 0
+
+
+def test_client_key_uses_verified_token_cache():
+    token_cache.set("cached-token", 7, time.time() + 60)
+    scope = {"headers": [(b"cookie", b"access_token=cached-token")], "client": ("10.0.0.1", 1234)}
+    assert client_key(scope) == "user:7"
+    # 캐시에 없고 서명도 올바르지 않은 토큰은 IP 로 구분
+    scope = {"headers": [(b"cookie", b"access_token=forged")], "client": ("10.0.0.1", 1234)}
+    assert client_key(scope) == "ip:10.0.0.1"
+
+
+def make_app():
+    app = FastAPI()
+    release = asyncio.Event()
+
+    @app.get("/limited")
+    async def limited():
+        return {"status": 200}
+
+    @app.get("/slow")
+    async def slow():
+        await release.wait()
+        return {"status": 200}
+
+    app.state.release = release
+    app.add_middleware(RateLimitMiddleware)
+    return app
+
+
+def test_over_budget_requests_get_429_with_retry_after(monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rate_limit, "limiter", Limiter())
+    monkeypatch.setitem(rate_limit.ROUTE_BUDGETS, ("GET", "/limited"), (0.5, 2))
+
+    async def run():
+        transport = httpx.ASGITransport(app=make_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return [await client.get("/limited") for _ in range(3)]
+
+    responses = asyncio.run(run())
+    assert [r.status_code for r in responses] == [200, 200, 429]
+    assert responses[2].headers["retry-after"] == "2"
+    assert responses[2].json()["status"] == 429
+    assert rate_limit.limiter.limited == 1
+
+
+def test_requests_over_concurrency_are_shed_with_503(monkeypatch):
+    monkeypatch.setattr(rate_limit, "RATE_LIMIT_ENABLED", True)
+    monkeypatch.setattr(rate_limit, "MAX_QUEUED_REQUESTS", 0)
+
+    async def run():
+        limiter = Limiter()
+        limiter.concurrency = asyncio.Semaphore(1)
+        monkeypatch.setattr(rate_limit, "limiter", limiter)
+        app = make_app()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            slow = asyncio.create_task(client.get("/slow"))
+            while not limiter.concurrency.locked():
+                await asyncio.sleep(0.01)
+            shed = await client.get("/limited")
+            app.state.release.set()
+            return await slow, shed, limiter.shed
+
+    slow, shed, count = asyncio.run(run())
+    assert slow.status_code == 200
+    assert shed.status_code == 503
+    assert shed.headers["retry-after"] == "1"
+    assert count == 1
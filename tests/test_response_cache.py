@@ -0,0 +1,59 @@
+# 다이어리 조회 응답 캐시 : If-None-Match → 304, 무효화, 기본 DB 고정 중 캐시 우회
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app import response_cache as response_cache_module
+from app.database import PRIMARY_PIN_COOKIE, PrimaryPinMiddleware
+from app.response_cache import ResponseCache, cached_response
+
+
+def make_client(monkeypatch):
+    monkeypatch.setattr(response_cache_module, "response_cache", ResponseCache())
+    app = FastAPI()
+    app.state.builds = 0
+
+    @app.get("/calendar")
+    async def calendar(request: Request):
+        async def build():
+            app.state.builds += 1
+            return {"status": 200, "data": app.state.builds}
+        return await cached_response(request, 1, ("calendar",), build)
+
+    app.add_middleware(PrimaryPinMiddleware)
+    return TestClient(app), app
+
+
+def test_matching_etag_returns_304_from_cache(monkeypatch):
+    client, app = make_client(monkeypatch)
+    first = client.get("/calendar")
+    assert first.status_code == 200 and first.json()["data"] == 1
+    etag = first.headers["etag"]
+
+    again = client.get("/calendar", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+    assert app.state.builds == 1
+
+
+def test_invalidate_rebuilds_response(monkeypatch):
+    client, app = make_client(monkeypatch)
+    etag = client.get("/calendar").headers["etag"]
+    response_cache_module.response_cache.invalidate(1)
+
+    changed = client.get("/calendar", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["etag"] != etag
+    assert changed.json()["data"] == 2
+
+
+def test_pinned_requests_bypass_cache(monkeypatch):
+    client, app = make_client(monkeypatch)
+    client.get("/calendar")
+    # 다른 워커에서 방금 쓴 요청 (기본 DB 고정 쿠키)
+    client.cookies.set(PRIMARY_PIN_COOKIE, f"{time.time() + 2:.3f}")
+    assert client.get("/calendar").json()["data"] == 2
+    assert client.get("/calendar").json()["data"] == 3
+    assert response_cache_module.response_cache.stats()["size"] == 1
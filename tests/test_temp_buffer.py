@@ -0,0 +1,92 @@
+# 임시 저장 write-behind 버퍼 : 저장 요청 합치기, 오래된 내용/삭제된 임시 저장본 처리, 종료 시 flush
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert, select, update
+
+from app.models import TempDiary, User
+from app.temp_buffer import TempDiaryBuffer
+
+NOW = datetime(2024, 8, 1, 21)
+
+
+async def add_temps(engine, count: int):
+    async with engine.begin() as conn:
+        await conn.execute(insert(User), [{"user_id": 1, "kakao_id": "1"}])
+        await conn.execute(insert(TempDiary), [
+            {"temp_diary_id": i, "user_id": 1, "title": "draft", "created_at": NOW, "updated_at": NOW, "is_deleted": False}
+            for i in range(1, count + 1)
+        ])
+
+
+async def read_temps(engine) -> dict[int, tuple]:
+    async with engine.connect() as conn:
+        rows = await conn.execute(select(TempDiary.temp_diary_id, TempDiary.title, TempDiary.content))
+        return {row.temp_diary_id: (row.title, row.content) for row in rows}
+
+
+def test_saves_are_coalesced_into_one_row_update(session_db):
+    async def run():
+        await add_temps(session_db, 1)
+        buffer = TempDiaryBuffer()
+        assert await buffer.is_owner(1, 1)
+        assert not await buffer.is_owner(2, 1)
+        for i in range(10):
+            buffer.put(1, 1, {"title": f"title {i}", "updated_at": NOW + timedelta(seconds=i)})
+        buffer.put(1, 1, {"content": "story", "updated_at": NOW + timedelta(seconds=10)})
+        # 읽기는 아직 기록되지 않은 최신 내용을 봄
+        assert buffer.get(1, 1)["title"] == "title 9"
+        written = await buffer.flush()
+        return written, buffer.stats(), await read_temps(session_db)
+
+    written, stats, temps = asyncio.run(run())
+    assert written == 1
+    assert stats == {"pending": 0, "writes": 11, "flushed": 1, "dropped": 0}
+    assert temps[1] == ("title 9", "story")
+
+
+def test_older_draft_does_not_overwrite_newer_row(session_db):
+    async def run():
+        await add_temps(session_db, 1)
+        buffer = TempDiaryBuffer()
+        buffer.put(1, 1, {"title": "older", "updated_at": NOW - timedelta(seconds=1)})
+        return await buffer.flush(), await read_temps(session_db)
+
+    written, temps = asyncio.run(run())
+    assert written == 0
+    assert temps[1] == ("draft", None)
+
+
+def test_deleted_draft_is_dropped_from_owner_cache(session_db):
+    async def run():
+        await add_temps(session_db, 2)
+        buffer = TempDiaryBuffer()
+        assert await buffer.is_owner(1, 1) and await buffer.is_owner(1, 2)
+        # 다른 워커에서 삭제(보관)된 임시 저장본
+        async with session_db.begin() as conn:
+            await conn.execute(update(TempDiary).where(TempDiary.temp_diary_id == 2).values(is_deleted=True))
+        buffer.put(1, 1, {"title": "kept", "updated_at": NOW + timedelta(seconds=1)})
+        buffer.put(1, 2, {"title": "lost", "updated_at": NOW + timedelta(seconds=1)})
+        written = await buffer.flush()
+        return written, buffer.dropped, await buffer.is_owner(1, 2), await read_temps(session_db)
+
+    written, dropped, owner, temps = asyncio.run(run())
+    assert (written, dropped, owner) == (1, 1, False)
+    assert temps == {1: ("kept", None), 2: ("draft", None)}
+
+
+def test_pending_saves_are_flushed_on_shutdown(session_db):
+    # main.lifespan 과 같은 순서 : 주기적 flush 태스크를 취소한 뒤 마지막으로 flush
+    async def run():
+        await add_temps(session_db, 1)
+        buffer = TempDiaryBuffer(interval=60)
+        task = asyncio.create_task(buffer.run())
+        buffer.put(1, 1, {"title": "last", "updated_at": NOW + timedelta(seconds=1)})
+        await asyncio.sleep(0)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        assert buffer.stats()["pending"] == 1
+        await buffer.flush()
+        return await read_temps(session_db)
+
+    assert asyncio.run(run())[1] == ("last", None)
@@ -0,0 +1,39 @@
+# 검증된 JWT 캐시 : 적중/만료/LRU 제거
+import time
+
+from app.token_cache import TokenCache
+
+
+def test_hit_after_set():
+    cache = TokenCache()
+    assert cache.get("token") is None
+    cache.set("token", 7, time.time() + 60)
+    assert cache.get("token") == 7
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_expired_entry_is_removed():
+    cache = TokenCache()
+    cache.set("token", 7, time.time() - 1)
+    assert cache.get("token") is None
+    assert cache.stats()["size"] == 0
+    assert cache.misses == 1
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TokenCache(maxsize=2)
+    exp = time.time() + 60
+    cache.set("a", 1, exp)
+    cache.set("b", 2, exp)
+    cache.get("a")  # b 가 가장 오래 쓰지 않은 항목이 됨
+    cache.set("c", 3, exp)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_discard():
+    cache = TokenCache()
+    cache.set("token", 7, time.time() + 60)
+    cache.discard("token")
+    assert cache.get("token") is None